@@ -1,12 +1,19 @@
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, session
-from news_fetcher import fetch_live_news, get_available_countries, get_available_categories
-from model import predict_fake_news
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, session, Response, stream_with_context, g, before_render_template, template_rendered
+from news_fetcher import fetch_live_news, get_available_countries, get_available_categories, get_news_cache_stats
+from model import predict_fake_news, predict_fake_news_batch, predict_fake_news_stream, get_local_model_stats, get_result_cache_stats, get_model_status, get_available_backends, start_warmup
 from animations import add_animation
-from gemini_analyze import test_gemini_connection
+from http_client import get_http_stats
+from gemini_health import health_monitor, check_gemini_available
+from gemini_analyze import get_gemini_client_stats, get_gemini_resilience_stats, get_prompt_compaction_stats
+from diagnostics_store import diagnostics_store, RECENT_KINDS
+from ingestion import ingestion_worker, get_stored_news, get_ingestion_stats, INGESTION_ENABLED
+import metrics
 import os
 import json
 from datetime import datetime
 import traceback
+import time
+import hmac
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,6 +22,40 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "verinews-secure-secret-key-1234567890")
 
+# How many of its own diagnostic records a session can look up
+SESSION_DIAGNOSTIC_IDS = 10
+# Token that unlocks every session's diagnostic records (X-Admin-Token header or ?token=)
+DIAGNOSTICS_ADMIN_TOKEN = os.getenv("DIAGNOSTICS_ADMIN_TOKEN", "")
+
+# Start the first Gemini health check so the status is warm by the first page view
+# (pre-fork servers start it in every worker instead, see serve.py)
+if os.getenv("GEMINI_HEALTH_STARTUP_CHECK", "true").lower() in ("1", "true", "yes"):
+    health_monitor.refresh_async()
+
+# Load the local model in the background so startup (and non-analysis pages) stay fast
+if os.getenv("LOCAL_MODEL_WARMUP", "true").lower() in ("1", "true", "yes"):
+    start_warmup()
+
+# Keep the configured news feeds pre-fetched and pre-scored in the local store
+# (pre-fork servers start it in one worker instead, see serve.py)
+if INGESTION_ENABLED and os.getenv("INGESTION_AUTOSTART", "true").lower() in ("1", "true", "yes"):
+    ingestion_worker.start()
+
+# Template render time, measured with Flask's rendering signals
+RENDER_SECONDS = metrics.histogram(
+    "verinews_template_render_seconds", "Time spent rendering a page template", ["template"])
+
+def _render_started(sender, template, context, **extra):
+    g._render_started = time.perf_counter()
+
+def _render_finished(sender, template, context, **extra):
+    started = g.pop('_render_started', None)
+    if started is not None:
+        RENDER_SECONDS.observe(time.perf_counter() - started, template=template.name or "unknown")
+
+before_render_template.connect(_render_started, app)
+template_rendered.connect(_render_finished, app)
+
 @app.route('/')
 def index():
     # Get country and category from query parameters, default to US and general
@@ -23,15 +64,20 @@ def index():
     search_term = request.args.get('q', '')
     page = request.args.get('page', None)
     
-    # Fetch news based on selected country and category
-    news = fetch_live_news(country_code, category, search_term, page=page)
+    # Serve pre-fetched, pre-scored feeds from the ingestion store; searches, later
+    # pages and feeds the worker does not cover are fetched live
+    news = None
+    if not search_term and not page:
+        news = get_stored_news(country_code, category)
+    if not news:
+        news = fetch_live_news(country_code, category, search_term, page=page)
     
     # Get available countries and categories for the dropdowns
     countries = get_available_countries()
     categories = get_available_categories()
     
-    # Check if Gemini is available
-    gemini_success, gemini_message = test_gemini_connection()
+    # Check if Gemini is available (cached status, refreshed in the background)
+    gemini_success, gemini_message = check_gemini_available()
     gemini_available = gemini_success
     
     # Store next page token if it exists
@@ -74,10 +120,13 @@ def analyze():
         
         # Check if Gemini is available if requested
         if use_gemini:
-            gemini_success, gemini_message = test_gemini_connection()
+            gemini_success, gemini_message = check_gemini_available()
+            gemini_status = health_monitor.get_status()
             diagnostic_info['gemini_connection_test'] = {
                 'success': gemini_success,
-                'message': gemini_message
+                'message': gemini_message,
+                'latency_ms': gemini_status.get('latency_ms'),
+                'checked_at': gemini_status.get('checked_at_str')
             }
             
             if not gemini_success:
@@ -92,16 +141,25 @@ def analyze():
             diagnostic_info['enhanced_length'] = len(combined_content)
             article_content = combined_content
         
+        # In progressive mode the page is rendered with the local verdict right away and
+        # the browser streams the Gemini analysis from /analyze/stream
+        progressive = use_gemini and _progressive_results_enabled() and request.form.get('progressive', '1') != '0'
+        diagnostic_info['progressive'] = progressive
+        
         # Predict using the model
         try:
             result, confidence, additional_data = predict_fake_news(
                 article_content, 
                 title=article_title,
                 source=article_source,
-                use_gemini=use_gemini
+                use_gemini=use_gemini and not progressive,
+                endpoint="analyze"
             )
             diagnostic_info['predict_result'] = result
             diagnostic_info['predict_confidence'] = confidence
+            diagnostic_info['cache'] = additional_data.get('cache', {})
+            if 'reused' in additional_data:
+                diagnostic_info['reused'] = additional_data['reused']
         except Exception as e:
             error_trace = traceback.format_exc()
             diagnostic_info['error'] = str(e)
@@ -114,8 +172,8 @@ def analyze():
         # Get appropriate animation
         animation = add_animation(result, confidence)
         
-        # Get Gemini data if used
-        gemini_data = additional_data.get('gemini', None) if use_gemini else None
+        # Get Gemini data if used (in progressive mode it arrives later via the stream)
+        gemini_data = additional_data.get('gemini', None) if use_gemini and not progressive else None
         diagnostic_info['gemini_data_received'] = bool(gemini_data)
         
         # Check for Gemini errors and set a flag
@@ -124,8 +182,12 @@ def analyze():
             gemini_error = True
             diagnostic_info['gemini_error'] = gemini_data.get('error', 'Unknown error')
         
-        # Save diagnostics to session for troubleshooting
-        session['last_analysis_diagnostic'] = diagnostic_info
+        # Keep the diagnostics server-side; the session cookie only carries the record ID
+        diagnostic_info['duration_ms'] = round((datetime.now() - analysis_start_time).total_seconds() * 1000, 1)
+        diagnostic_info['id'] = diagnostics_store.save(diagnostic_info)
+        session.pop('last_analysis_diagnostic', None)
+        session['last_analysis_diagnostic_id'] = diagnostic_info['id']
+        session['diagnostic_ids'] = (_owned_diagnostic_ids() + [diagnostic_info['id']])[-SESSION_DIAGNOSTIC_IDS:]
         
         return render_template(
             'result.html', 
@@ -141,6 +203,7 @@ def analyze():
             gemini_available=use_gemini,
             gemini_error=gemini_error,
             use_gemini=use_gemini,
+            progressive=progressive,
             diagnostics=diagnostic_info
         )
     except Exception as e:
@@ -151,6 +214,68 @@ def analyze():
         flash(f"An error occurred during analysis: {str(e)}", "error")
         return redirect(url_for('index'))
 
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """
+    Server-sent events stream of an analysis: the local verdict first, then the
+    Gemini analysis and the recalculated combined verdict when Gemini answers.
+    
+    Accepts form or JSON fields content, title, source and use_gemini.
+    """
+    data = request.get_json(silent=True) or request.form
+    article_content = data.get('content', '')
+    article_title = data.get('title', '')
+    article_source = data.get('source', '')
+    use_gemini = str(data.get('use_gemini', '')).lower() in ('1', 'true', 'on', 'yes')
+    # Diagnostics record of the /analyze request that rendered the page; only records
+    # created in this session can be updated
+    diagnostics_id = data.get('diagnostics_id')
+    if diagnostics_id not in _owned_diagnostic_ids():
+        diagnostics_id = None
+    
+    if not article_content:
+        return jsonify({'error': 'Missing content field'}), 400
+    
+    def generate():
+        stream_start = time.perf_counter()
+        outcome = {}
+        try:
+            # Same endpoint as /analyze so the local verdict the page was rendered with is reused
+            for event, payload in predict_fake_news_stream(article_content, title=article_title,
+                                                           source=article_source, use_gemini=use_gemini,
+                                                           endpoint="analyze"):
+                if event in ('local', 'combined'):
+                    payload = dict(payload)
+                    payload['confidence_pct'] = round(payload['confidence'] * 100, 1)
+                    payload['animation'] = add_animation(payload['result'], payload['confidence'])
+                if event == 'gemini':
+                    outcome['gemini_data_received'] = bool(payload)
+                    if payload and not payload.get('success', False):
+                        outcome['gemini_error'] = payload.get('error', 'Unknown error')
+                yield _sse_event(event, payload)
+            yield _sse_event('done', {})
+        except Exception as e:
+            app.logger.error(f"Error in analysis stream: {str(e)}")
+            outcome['error'] = str(e)
+            outcome['traceback'] = traceback.format_exc()
+            yield _sse_event('error', {'error': str(e)})
+        finally:
+            if diagnostics_id:
+                outcome['stream_duration_ms'] = round((time.perf_counter() - stream_start) * 1000, 1)
+                diagnostics_store.update(diagnostics_id, outcome)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop reverse proxies from buffering the stream
+    })
+
+def _sse_event(event, data):
+    """Formats one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _progressive_results_enabled():
+    return os.getenv("PROGRESSIVE_RESULTS", "true").lower() in ("1", "true", "yes")
+
 @app.route('/api/analyze', methods=['POST'])
 def api_analyze():
     """API endpoint for analyzing news article"""
@@ -163,6 +288,10 @@ def api_analyze():
     article_title = data.get('title', '')
     article_source = data.get('source', '')
     use_gemini = data.get('use_gemini', False)
+    backend = data.get('backend')
+    
+    if backend and backend not in get_available_backends():
+        return jsonify({'error': f"Unknown backend '{backend}' (available: {', '.join(get_available_backends())})"}), 400
     
     # Analyze using the model
     try:
@@ -170,7 +299,9 @@ def api_analyze():
             article_content,
             title=article_title,
             source=article_source,
-            use_gemini=use_gemini
+            use_gemini=use_gemini,
+            backend=backend,
+            endpoint="api"
         )
         
         # Return results as JSON
@@ -186,6 +317,69 @@ def api_analyze():
             'confidence': 0.5
         }), 500
 
+@app.route('/api/analyze/batch', methods=['POST'])
+def api_analyze_batch():
+    """API endpoint for analyzing a list of news articles in one call"""
+    data = request.json
+    
+    # Accept either a bare list or {"articles": [...]}
+    articles = data.get('articles') if isinstance(data, dict) else data
+    if not isinstance(articles, list) or not articles:
+        return jsonify({'error': 'Expected a non-empty list of articles'}), 400
+    
+    max_items = int(os.getenv("API_BATCH_MAX_ITEMS", 100))
+    if len(articles) > max_items:
+        return jsonify({'error': f'Too many articles in one batch (maximum {max_items})'}), 400
+    
+    try:
+        results = predict_fake_news_batch(articles, endpoint="api")
+        return jsonify({
+            'count': len(results),
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/api/stats')
+def api_stats():
+    """Runtime statistics for the analysis pipeline"""
+    return jsonify({
+        'local_model': get_local_model_stats(),
+        'model_status': get_model_status(),
+        'result_cache': get_result_cache_stats(),
+        'news_cache': get_news_cache_stats(),
+        'ingestion': get_ingestion_stats(),
+        'http': get_http_stats(),
+        'diagnostics': diagnostics_store.get_stats(),
+        'gemini': {
+            'health': health_monitor.get_status(),
+            'client': get_gemini_client_stats(),
+            'prompt_compaction': get_prompt_compaction_stats(),
+            **get_gemini_resilience_stats()
+        }
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus-style metrics: stage latency histograms, counters and gauges"""
+    return Response(metrics.render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: model weights are loaded and a warm-up inference has run"""
+    status = get_model_status()
+    return jsonify({
+        'ready': status['ready'],
+        'model': status
+    }), 200 if status['ready'] else 503
+
 @app.route('/about')
 def about():
     """Information about the VeriNews application"""
@@ -193,22 +387,84 @@ def about():
 
 @app.route('/test-gemini')
 def test_gemini():
-    """Test the Gemini API connection"""
-    success, message = test_gemini_connection()
+    """Report the last-known Gemini API status (pass ?refresh=1 to re-check in the background)"""
+    if request.args.get('refresh'):
+        health_monitor.refresh_async()
+    status = health_monitor.get_status()
+    success, message = health_monitor.check()
     return jsonify({
         'success': success,
-        'message': message
+        'message': message,
+        'latency_ms': status['latency_ms'],
+        'error': status['error'],
+        'checked_at': status.get('checked_at_str'),
+        'age_seconds': status['age_seconds'],
+        'refreshing': status['refreshing'],
+        'ttl_seconds': health_monitor.ttl_seconds,
+        'client': get_gemini_client_stats()
     })
 
+def _owned_diagnostic_ids():
+    """IDs of the diagnostic records created by this session, oldest first"""
+    return list(session.get('diagnostic_ids', []))
+
+def _is_diagnostics_admin():
+    """Whether the request carries the diagnostics admin token"""
+    token = request.headers.get('X-Admin-Token') or request.args.get('token') or ''
+    return bool(DIAGNOSTICS_ADMIN_TOKEN) and hmac.compare_digest(token, DIAGNOSTICS_ADMIN_TOKEN)
+
+def _visible_diagnostics(record_id):
+    """The diagnostic record if this session created it (or the admin token is given), else None"""
+    if not record_id or not (_is_diagnostics_admin() or record_id in _owned_diagnostic_ids()):
+        return None
+    return diagnostics_store.get(record_id)
+
+def _recent_diagnostics(kind):
+    """Recent analyses of this session, or of every session for an admin"""
+    ids = None if _is_diagnostics_admin() else _owned_diagnostic_ids()
+    return diagnostics_store.recent(kind, limit=request.args.get('limit', 20, type=int), ids=ids)
+
 @app.route('/diagnostics')
 def diagnostics():
-    """View the last analysis diagnostic information"""
-    diagnostics = session.get('last_analysis_diagnostic', {})
-    if not diagnostics:
+    """
+    View the diagnostic information of one of your analyses (?id=, by default your last
+    one) and a list of your recent analyses (?recent=all|slow|failed, by default failed ones).
+    With the admin token every session's analyses are visible.
+    """
+    diagnostics = _visible_diagnostics(request.args.get('id') or session.get('last_analysis_diagnostic_id')) or {}
+    if request.args.get('id') and not diagnostics:
+        flash("That diagnostic record has expired or does not exist", "error")
+    
+    kind = request.args.get('recent', 'failed')
+    if kind not in RECENT_KINDS:
+        kind = 'failed'
+    recent = _recent_diagnostics(kind)
+    if not diagnostics and not recent and 'recent' not in request.args:
         flash("No diagnostic information available", "info")
         return redirect(url_for('index'))
     
-    return render_template('diagnostics.html', diagnostics=diagnostics)
+    return render_template('diagnostics.html', diagnostics=diagnostics, cache_stats=get_result_cache_stats(),
+                           recent=recent, recent_kind=kind, slow_ms=diagnostics_store.slow_ms,
+                           admin_token=request.args.get('token') if _is_diagnostics_admin() else None)
+
+@app.route('/api/diagnostics')
+def api_diagnostics():
+    """
+    Your recent analyses (?recent=all|slow|failed&limit=20), or one full record with ?id=.
+    With the admin token every session's analyses are visible.
+    """
+    if request.args.get('id'):
+        record = _visible_diagnostics(request.args['id'])
+        if record is None:
+            return jsonify({'error': 'Diagnostic record not found'}), 404
+        return jsonify(record)
+    kind = request.args.get('recent', 'all')
+    if kind not in RECENT_KINDS:
+        return jsonify({'error': f"recent must be one of {', '.join(RECENT_KINDS)}"}), 400
+    return jsonify({
+        'recent': _recent_diagnostics(kind),
+        'stats': diagnostics_store.get_stats()
+    })
 
 @app.template_filter('truncate_chars')
 def truncate_chars(s, n=300):
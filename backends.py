@@ -0,0 +1,296 @@
+import re
+import resource
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import metrics
+from batching import MicroBatcher
+
+BACKEND_BATCH_SECONDS = metrics.histogram(
+    "verinews_backend_batch_seconds", "Time a local model backend takes to score one batch", ["backend"])
+LOCAL_PREDICTIONS = metrics.counter(
+    "verinews_local_predictions_total", "Articles scored by the local model, by backend", ["backend"])
+
+
+def process_rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class ClassifierBackend:
+    """
+    A local classifier that loads lazily and scores batches of articles.
+
+    load_fn() returns the loaded handle (e.g. a (model, tokenizer) pair) and is called
+    once; predict_fn(handle, articles) returns a (result, confidence, details) tuple per
+    article; version_fn(handle) identifies the loaded model for cache keys and
+    expected_version_fn(), if given, identifies it from configuration alone, so cache
+    keys can be built before the model has loaded. Single-article
+    requests from concurrent callers are micro-batched per backend. prefetch_fn(handle,
+    articles), if given, is called as articles are queued (e.g. to start tokenizing them
+    before their batch runs). A "timing" entry with "tokenize_ms" and "forward_ms" in the
+    details of a batch is added to the backend's stage totals.
+
+    The memory reported for a backend is the growth of the process RSS while it loaded,
+    so it is approximate (shared libraries count towards the first backend loaded).
+    """
+
+    def __init__(self, name, load_fn, predict_fn, version_fn, fallback_fn=None, prefetch_fn=None,
+                 max_batch_size=16, max_wait_ms=5, description="", expected_version_fn=None):
+        self.name = name
+        self.description = description
+        self.load_fn = load_fn
+        self.predict_fn = predict_fn
+        self.version_fn = version_fn
+        self.expected_version_fn = expected_version_fn
+        self.fallback_fn = fallback_fn
+        self.prefetch_fn = prefetch_fn
+        self.batcher = MicroBatcher(self.predict_batch, max_batch_size=max_batch_size,
+                                    max_wait_ms=max_wait_ms, name=f"{name}-batcher")
+
+        self._handle = None
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_seconds = deque(maxlen=1000)
+        self._batches = 0
+        self._articles = 0
+        self._total_seconds = 0.0
+        self._stage_ms = {"tokenize_ms": 0.0, "forward_ms": 0.0}
+        self.state = {
+            "loading": False,
+            "loaded": False,
+            "warmed_up": False,
+            "fallback": False,
+            "load_seconds": None,
+            "warmup_seconds": None,
+            "memory_mb": None,
+            "error": None
+        }
+
+    def load(self):
+        """Returns the loaded handle, loading it on first use (concurrent callers wait for one load)"""
+        if self.state["loaded"]:
+            return self._handle
+        with self._load_lock:
+            if not self.state["loaded"]:
+                self.state["loading"] = True
+                rss_before = process_rss_mb()
+                start = time.perf_counter()
+                try:
+                    self._handle = self.load_fn()
+                except Exception as e:
+                    self.state["error"] = str(e)
+                    self.state["loading"] = False
+                    raise
+                self.state["load_seconds"] = round(time.perf_counter() - start, 2)
+                self.state["memory_mb"] = round(max(0.0, process_rss_mb() - rss_before), 1)
+                self.state["fallback"] = bool(self.fallback_fn and self.fallback_fn(self._handle))
+                self.state["loading"] = False
+                self.state["loaded"] = True
+        return self._handle
+
+    def predict_batch(self, articles):
+        """Scores a batch of article texts in the calling thread"""
+        handle = self.load()
+        label = "keyword-fallback" if self.state["fallback"] else self.name
+        start = time.perf_counter()
+        verdicts = self.predict_fn(handle, articles)
+        elapsed = time.perf_counter() - start
+
+        BACKEND_BATCH_SECONDS.observe(elapsed, backend=self.name)
+        LOCAL_PREDICTIONS.inc(len(articles), backend=label)
+        with self._stats_lock:
+            self._batch_seconds.append(elapsed)
+            self._batches += 1
+            self._articles += len(articles)
+            self._total_seconds += elapsed
+            timing = verdicts[0][2].get("timing") if verdicts else None
+            if timing:
+                for stage in self._stage_ms:
+                    self._stage_ms[stage] += timing.get(stage, 0.0)
+        return [(result, confidence, {"backend": label, **details}) for result, confidence, details in verdicts]
+
+    def predict(self, article):
+        """Scores one article, batched with concurrent callers"""
+        return self.submit(article).result()
+
+    def submit(self, article):
+        """Queues one article for batched scoring and returns a Future"""
+        return self.submit_many([article])[0]
+
+    def submit_many(self, articles):
+        """Queues several articles for batched scoring and returns one Future per article"""
+        if self.prefetch_fn is not None and self.state["loaded"]:
+            try:
+                self.prefetch_fn(self._handle, articles)
+            except Exception as e:
+                # Prefetching is an optimization; the batch still tokenizes inline
+                print(f"Error prefetching for {self.name} backend: {e}")
+        return [self.batcher.submit(article) for article in articles]
+
+    def warm_up(self):
+        """Loads the backend and runs one inference so the first real request is not slow"""
+        self.load()
+        start = time.perf_counter()
+        self.predict_batch(["VeriNews warm-up inference."])
+        self.state["warmup_seconds"] = round(time.perf_counter() - start, 2)
+        self.state["warmed_up"] = True
+
+    def version(self):
+        """
+        Identifies the model, so cached results from another model are not reused. Until
+        the backend has loaded this is the version expected from configuration (if the
+        backend has one), so building a cache key never waits for a model load.
+        """
+        if not self.state["loaded"] and self.expected_version_fn is not None:
+            return self.expected_version_fn()
+        return self.version_fn(self.load())
+
+    def get_stats(self):
+        """Returns load state, memory, latency and batching statistics"""
+        with self._stats_lock:
+            recent = np.array(self._batch_seconds) * 1000
+            stats = {
+                "description": self.description,
+                **self.state,
+                "batches": self._batches,
+                "articles": self._articles,
+                "avg_batch_ms": round(self._total_seconds / self._batches * 1000, 2) if self._batches else 0.0,
+                "avg_article_ms": round(self._total_seconds / self._articles * 1000, 2) if self._articles else 0.0,
+                "p50_batch_ms": round(float(np.percentile(recent, 50)), 2) if len(recent) else 0.0,
+                "p95_batch_ms": round(float(np.percentile(recent, 95)), 2) if len(recent) else 0.0,
+                "avg_tokenize_ms": round(self._stage_ms["tokenize_ms"] / self._batches, 2) if self._batches else 0.0,
+                "avg_forward_ms": round(self._stage_ms["forward_ms"] / self._batches, 2) if self._batches else 0.0
+            }
+        stats["batching"] = self.batcher.get_stats()
+        return stats
+
+
+# Routing rules: "endpoint:<name>=<backend>" or "chars<op><n>=<backend>" with op one of < <= > >=
+_ENDPOINT_RULE = re.compile(r'^endpoint:([\w-]+)=([\w-]+)$')
+_LENGTH_RULE = re.compile(r'^chars(<=|>=|<|>)(\d+)=([\w-]+)$')
+_COMPARISONS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b
+}
+
+
+def parse_routes(spec):
+    """
+    Parses a LOCAL_MODEL_ROUTES value, e.g. "endpoint:ingestion=lexicon,chars<400=tflite".
+
+    Returns:
+        list: (kind, operator, value, backend) rules in the order given; malformed
+              rules are skipped with a warning
+    """
+    routes = []
+    for rule in (spec or "").split(","):
+        rule = rule.replace(" ", "")
+        if not rule:
+            continue
+        match = _ENDPOINT_RULE.match(rule)
+        if match:
+            routes.append(("endpoint", "==", match.group(1), match.group(2)))
+            continue
+        match = _LENGTH_RULE.match(rule)
+        if match:
+            routes.append(("chars", match.group(1), int(match.group(2)), match.group(3)))
+            continue
+        print(f"Ignoring malformed local model route '{rule}'")
+    return routes
+
+
+def _format_route(route):
+    """Renders a parsed route the way it is written in LOCAL_MODEL_ROUTES"""
+    kind, operator, value, name = route
+    return f"{kind}{':' if kind == 'endpoint' else operator}{value}={name}"
+
+
+class BackendRegistry:
+    """
+    Named local classifier backends with a default and routing rules.
+
+    A backend requested explicitly wins; otherwise the first route matching the
+    endpoint or the content length picks the backend; otherwise the default is used.
+    """
+
+    def __init__(self, default, routes=None):
+        self.default_name = default
+        self.routes = list(routes or [])
+        self._backends = {}
+
+    def register(self, backend):
+        self._backends[backend.name] = backend
+        return backend
+
+    def names(self):
+        return list(self._backends)
+
+    def validate(self, fallback_default):
+        """
+        Checks the configured default and routes against the registered backends, so a
+        typo in the configuration is reported once at startup instead of failing every
+        request it matches. Routes to unknown backends are dropped with a warning, and
+        an unknown default is replaced by fallback_default.
+        """
+        if self.default_name not in self._backends:
+            print(f"WARNING: Unknown default local model backend '{self.default_name}' "
+                  f"(available: {', '.join(self._backends)}); using '{fallback_default}'")
+            self.default_name = fallback_default
+        routes = []
+        for route in self.routes:
+            if route[3] not in self._backends:
+                print(f"WARNING: Ignoring local model route '{_format_route(route)}': unknown backend "
+                      f"(available: {', '.join(self._backends)})")
+                continue
+            routes.append(route)
+        self.routes = routes
+        return self
+
+    def get(self, name):
+        backend = self._backends.get(name)
+        if backend is None:
+            raise ValueError(f"Unknown local model backend '{name}' (available: {', '.join(self._backends)})")
+        return backend
+
+    @property
+    def default(self):
+        return self.get(self.default_name)
+
+    def select(self, content=None, endpoint=None, requested=None):
+        """Returns the backend for a request"""
+        if requested:
+            return self.get(requested)
+        for kind, operator, value, name in self.routes:
+            if kind == "endpoint" and endpoint == value:
+                return self.get(name)
+            if kind == "chars" and content is not None and _COMPARISONS[operator](len(content), value):
+                return self.get(name)
+        return self.default
+
+    def routed_backends(self):
+        """The default backend and every backend a route can select"""
+        names = [self.default_name] + [name for _, _, _, name in self.routes]
+        return [self.get(name) for name in dict.fromkeys(names) if name in self._backends]
+
+    def get_stats(self):
+        """Returns the routing configuration and the statistics of every backend"""
+        return {
+            "default": self.default_name,
+            "routes": [_format_route(route) for route in self.routes],
+            "backends": {name: backend.get_stats() for name, backend in self._backends.items()}
+        }
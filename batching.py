@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching engine.
+
+    Callers submit single items from any thread. A background worker collects
+    queued items until either max_batch_size items are waiting or max_wait_ms
+    has passed since the first item of the batch arrived, runs batch_fn once on
+    the whole batch and hands each caller its own result.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5, name="micro-batcher"):
+        """
+        Args:
+            batch_fn (callable): Function taking a list of items and returning a list
+                                 of results in the same order
+            max_batch_size (int): Maximum number of items per batch
+            max_wait_ms (float): Maximum time to wait for a batch to fill up
+            name (str): Name of the worker thread
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._largest_batch = 0
+        self._total_queue_wait = 0.0
+        self._total_batch_time = 0.0
+        self._batch_size_counts = {}
+
+    def submit(self, item):
+        """Queue an item for batched processing and return a Future for its result"""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def predict(self, item, timeout=None):
+        """Submit an item and block until its result is ready"""
+        return self.submit(item).result(timeout=timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        # Block until the first item arrives, then fill the batch until it is full
+        # or the wait window for that first item has closed
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            items = [item for item, _, _ in batch]
+            started = time.perf_counter()
+
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"Batch function returned {len(results)} results for {len(items)} items")
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+                failed = False
+            except Exception as e:
+                print(f"Error in {self.name} batch of {len(items)}: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                failed = True
+
+            finished = time.perf_counter()
+            with self._lock:
+                self._batches += 1
+                self._items += len(items)
+                self._errors += 1 if failed else 0
+                self._largest_batch = max(self._largest_batch, len(items))
+                self._total_queue_wait += sum(started - queued_at for _, _, queued_at in batch)
+                self._total_batch_time += finished - started
+                self._batch_size_counts[len(items)] = self._batch_size_counts.get(len(items), 0) + 1
+
+    def get_stats(self):
+        """Returns batching statistics for monitoring"""
+        with self._lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": self._queue.qsize(),
+                "batches": batches,
+                "items": items,
+                "errors": self._errors,
+                "largest_batch": self._largest_batch,
+                "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+                "avg_queue_wait_ms": round(self._total_queue_wait / items * 1000, 2) if items else 0.0,
+                "avg_batch_time_ms": round(self._total_batch_time / batches * 1000, 2) if batches else 0.0,
+                "batch_size_counts": dict(sorted(self._batch_size_counts.items()))
+            }
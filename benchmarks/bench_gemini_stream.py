@@ -0,0 +1,140 @@
+"""
+Time to the credibility score vs time to the full Gemini analysis with streaming.
+
+Runs --requests analyses through analyze_with_gemini_stream and reports, per request,
+when the first chunk arrived, when the credibility score could be extracted and when
+the whole response had been parsed (p50/p90 of each). By default Gemini is replaced
+by the stub from stubs.py (--latency-ms, --first-chunk-share); --live uses the real
+API with GEMINI_API_KEY. Requests run one at a time so the numbers are per request.
+
+The script also measures the parsing cost: feeding a response chunk by chunk to
+GeminiStreamParser vs parsing the complete text once with parse_gemini_response.
+
+Usage (from the project root):
+    python benchmarks/bench_gemini_stream.py [--requests 30] [--latency-ms 2000] [--first-chunk-share 0.2]
+                                             [--live] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_analyze import GeminiStreamParser, analyze_with_gemini_stream, parse_gemini_response  # noqa: E402
+from stubs import StubLatency, install_gemini_stub, make_article_text  # noqa: E402
+
+
+def percentiles(values):
+    if not values:
+        return {"p50_ms": None, "p90_ms": None}
+    return {"p50_ms": round(float(np.percentile(values, 50)), 1), "p90_ms": round(float(np.percentile(values, 90)), 1)}
+
+
+def run_requests(args):
+    rng = random.Random(args.seed)
+    timings = {"first_chunk": [], "score": [], "full": []}
+    partials = []
+    failures = 0
+    for index in range(args.requests):
+        article = make_article_text(rng, args.article_words)
+        count = 0
+        final = None
+        for event, data in analyze_with_gemini_stream(article, f"Benchmark article {index}", "Benchmark"):
+            if event == "final":
+                final = data
+            else:
+                count += 1
+        stream = final.get("stream") if final else None
+        if not final or not final.get("success") or not stream:
+            failures += 1
+            continue
+        partials.append(count)
+        timings["first_chunk"].append(stream["time_to_first_chunk_ms"])
+        timings["full"].append(stream["time_to_full_ms"])
+        if stream.get("time_to_score_ms") is not None:
+            timings["score"].append(stream["time_to_score_ms"])
+    return {
+        "requests": args.requests,
+        "failures": failures,
+        "avg_partial_events": round(sum(partials) / len(partials), 1) if partials else 0.0,
+        **{name: percentiles(values) for name, values in timings.items()}
+    }
+
+
+def parse_cost(args):
+    """Microseconds to parse one response incrementally vs in one go"""
+    text = json.dumps({
+        "credibility_score": 7,
+        "reasoning": make_article_text(random.Random(args.seed), 120),
+        "recommendations": make_article_text(random.Random(args.seed + 1), 30)
+    }, indent=2)
+    chunks = [text[i:i + args.chunk_chars] for i in range(0, len(text), args.chunk_chars)]
+
+    start = time.perf_counter()
+    for _ in range(args.parse_rounds):
+        parser = GeminiStreamParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.finish()
+    incremental = (time.perf_counter() - start) / args.parse_rounds
+
+    start = time.perf_counter()
+    for _ in range(args.parse_rounds):
+        parse_gemini_response(text)
+    whole = (time.perf_counter() - start) / args.parse_rounds
+    return {
+        "response_chars": len(text),
+        "chunks": len(chunks),
+        "stream_parser_us": round(incremental * 1e6, 1),
+        "parse_gemini_response_us": round(whole * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=2000, help="Stub: total generation time")
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--first-chunk-share", type=float, default=0.2,
+                        help="Stub: share of the generation time before the first chunk")
+    parser.add_argument("--chunk-chars", type=int, default=24, help="Characters per streamed chunk")
+    parser.add_argument("--article-words", type=int, default=250)
+    parser.add_argument("--parse-rounds", type=int, default=2000)
+    parser.add_argument("--live", action="store_true", help="Call the real Gemini API (needs GEMINI_API_KEY)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.live:
+        install_gemini_stub(StubLatency(args.latency_ms, args.jitter_ms, seed=args.seed),
+                            first_chunk_share=args.first_chunk_share, chunk_chars=args.chunk_chars)
+
+    print(f"Running {args.requests} streamed analyses ({'live Gemini' if args.live else 'stub Gemini'})...")
+    report = {"requests": run_requests(args), "parse_cost": parse_cost(args)}
+
+    requests_report = report["requests"]
+    print(f"\n{'milestone':<14}{'p50 ms':>10}{'p90 ms':>10}")
+    for name in ("first_chunk", "score", "full"):
+        print(f"{name:<14}{requests_report[name]['p50_ms'] or 0:>10.1f}{requests_report[name]['p90_ms'] or 0:>10.1f}")
+    print(f"failures: {requests_report['failures']}, partial events per request: "
+          f"{requests_report['avg_partial_events']}")
+    cost = report["parse_cost"]
+    print(f"\nParsing a {cost['response_chars']}-char response: {cost['stream_parser_us']} us in "
+          f"{cost['chunks']} chunks vs {cost['parse_gemini_response_us']} us in one go")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), **report}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark the compiled lexicon scorer against the original keyword loop.
+
+The original fallback lowercased the whole article once per keyword and ran a
+substring scan for each one. This script builds a synthetic weighted phrase list
+(10,000+ phrases by default), scores a batch of synthetic articles both ways and
+reports compile time, throughput and whether both find the same phrases.
+
+Usage (from the project root):
+    python benchmarks/bench_lexicon.py [--phrases 10000] [--articles 200] [--words 400]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import Lexicon  # noqa: E402
+
+
+def make_vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = set()
+    while len(vocabulary) < size:
+        vocabulary.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return sorted(vocabulary)
+
+
+def make_phrases(count, vocabulary, rng):
+    phrases = {}
+    while len(phrases) < count:
+        phrase = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4)))
+        phrases[phrase] = round(rng.uniform(0.1, 1.0), 2)
+    return phrases
+
+
+def make_articles(count, words, vocabulary, phrases, rng):
+    phrase_list = list(phrases)
+    articles = []
+    for _ in range(count):
+        tokens = [rng.choice(vocabulary) for _ in range(words)]
+        # Plant a few known phrases in every article
+        for _ in range(rng.randint(0, 5)):
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(phrase_list).upper())
+        articles.append(" ".join(tokens) + ".")
+    return articles
+
+
+def naive_hits(article, phrases):
+    """The original approach: one lowercase + substring scan per phrase"""
+    return {phrase for phrase in phrases if phrase.lower() in article.lower()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phrases", type=int, default=10000)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    phrases = make_phrases(args.phrases, vocabulary, rng)
+    articles = make_articles(args.articles, args.words, vocabulary, phrases, rng)
+
+    start = time.perf_counter()
+    lexicon = Lexicon(phrases)
+    compile_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = lexicon.score_batch(articles)
+    lexicon_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [naive_hits(article, phrases) for article in articles]
+    naive_seconds = time.perf_counter() - start
+
+    # The substring loop also matches inside longer words, so the compiled matcher's
+    # whole-word hits must be a subset of what the loop finds
+    subset_ok = all(set(score["hits"]) <= hits for score, hits in zip(scores, expected))
+    found = sum(len(score["hits"]) for score in scores)
+
+    print(f"phrases: {len(lexicon)}, articles: {len(articles)} x ~{args.words} words")
+    print(f"compile:          {compile_seconds * 1000:10.1f} ms")
+    print(f"lexicon scorer:   {lexicon_seconds * 1000:10.1f} ms  ({len(articles) / lexicon_seconds:10.1f} articles/s)")
+    print(f"keyword loop:     {naive_seconds * 1000:10.1f} ms  ({len(articles) / naive_seconds:10.1f} articles/s)")
+    print(f"speedup:          {naive_seconds / lexicon_seconds:10.1f}x")
+    print(f"phrase hits:      {found} (whole-word hits contained in loop hits: {'OK' if subset_ok else 'FAILED'})")
+    return 0 if subset_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
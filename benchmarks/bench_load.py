@@ -0,0 +1,224 @@
+"""
+Offline load test of the web app and the analysis pipeline.
+
+Starts local stub servers for NewsData.io and NewsAPI, replaces the Gemini SDK with a
+stub, serves the app on a local port and measures throughput and p50/p90/p99 latency
+of GET /, POST /analyze and POST /api/analyze, plus raw predict_fake_news calls.
+Stub latency and failure rates are configurable, and the results are written as a
+JSON report that can be compared against an earlier run with --baseline.
+
+Use a small local checkpoint for the model so the run needs no network, e.g.
+--model /path/to/tiny-roberta (any directory loadable by from_pretrained).
+
+Usage (from the project root):
+    python benchmarks/bench_load.py --model ./tiny-model --requests 200 --concurrency 8 \\
+        --news-latency-ms 50 --gemini-latency-ms 300 --gemini-failure-rate 0.05 \\
+        --output report.json [--baseline previous-report.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stubs import StubLatency, StubNewsServer, install_gemini_stub, make_article_text  # noqa: E402
+
+SCENARIOS = ["index", "analyze", "api_analyze", "predict_fake_news"]
+
+
+def summarize(latencies, errors, wall_seconds):
+    """Throughput and latency percentiles (milliseconds) of one scenario"""
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    completed = len(latencies)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "error_rate": round(errors / (completed + errors), 4) if completed + errors else 0.0,
+        "throughput_rps": round(completed / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p90_ms": round(float(np.percentile(ms, 90)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2)
+    }
+
+
+def run_load(call, total, concurrency):
+    """Runs call(i) total times on concurrency threads; call returns True on success"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = call(i)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    header = f"{'scenario':<20}{'rps':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    if baseline:
+        header += f"{'Δ rps':>10}{'Δ p50':>10}{'Δ p99':>10}"
+    print(header)
+    for name, stats in report["scenarios"].items():
+        line = (f"{name:<20}{stats['throughput_rps']:>10.1f}{stats['p50_ms']:>10.1f}"
+                f"{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['errors']:>8}")
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old:
+            line += "".join(f"{_change(stats[key], old[key]):>10}" for key in ("throughput_rps", "p50_ms", "p99_ms"))
+        print(line)
+
+
+def _change(new, old):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Local checkpoint directory (sets LOCAL_MODEL_NAME)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--use-gemini", action="store_true", help="Request Gemini analysis (served by the stub)")
+    parser.add_argument("--news-latency-ms", type=float, default=50)
+    parser.add_argument("--news-jitter-ms", type=float, default=10)
+    parser.add_argument("--news-failure-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300)
+    parser.add_argument("--gemini-jitter-ms", type=float, default=100)
+    parser.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    parser.add_argument("--article-words", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    news = StubNewsServer(StubLatency(args.news_latency_ms, args.news_jitter_ms, args.news_failure_rate, args.seed),
+                          seed=args.seed).start()
+
+    # The app reads its configuration at import time
+    os.environ.update({
+        "NEWSDATA_API_KEY": "stub", "NEWSDATA_API_URL": news.newsdata_url,
+        "NEWS_API_KEY": "stub", "NEWSAPI_URL": news.newsapi_url,
+        "GEMINI_API_KEY": "AIzaStubKeyForBenchmarks",
+        "LOCAL_MODEL_WARMUP": "false", "INGESTION_ENABLED": "false",
+        "HTTP_BACKOFF_BASE": "0.01", "HTTP_BACKOFF_MAX": "0.05"
+    })
+    if args.model:
+        os.environ["LOCAL_MODEL_NAME"] = args.model
+
+    import logging
+    import requests
+    from werkzeug.serving import make_server
+
+    # Install the Gemini stub before the app starts its first health check
+    install_gemini_stub(StubLatency(args.gemini_latency_ms, args.gemini_jitter_ms, args.gemini_failure_rate, args.seed))
+    from app import app
+    import model
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    model.warm_up()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+
+    # Distinct articles so every analysis is a result cache miss
+    rng = random.Random(args.seed)
+    articles = [make_article_text(rng, args.article_words) for _ in range(args.requests)]
+    countries = ["us", "gb", "ca", "au", "in", "de", "fr"]
+    categories = ["", "business", "technology", "health", "politics", "science"]
+
+    def index(i):
+        params = {"country": countries[i % len(countries)], "category": categories[i // len(countries) % len(categories)]}
+        return session.get(f"{base_url}/", params=params).status_code == 200
+
+    def analyze(i):
+        form = {"article_title": f"Benchmark article {i}", "article_content": "(form) " + articles[i],
+                "article_source": "Stub Times", "progressive": "0"}
+        if args.use_gemini:
+            form["use_gemini"] = "on"
+        return session.post(f"{base_url}/analyze", data=form, allow_redirects=False).status_code == 200
+
+    def api_analyze(i):
+        payload = {"title": f"Benchmark article {i}", "content": "(api) " + articles[i],
+                   "source": "Stub Times", "use_gemini": args.use_gemini}
+        return session.post(f"{base_url}/api/analyze", json=payload).status_code == 200
+
+    def predict(i):
+        result, _, _ = model.predict_fake_news("(direct) " + articles[i], title=f"Benchmark article {i}",
+                                               source="Stub Times", use_gemini=args.use_gemini)
+        return result != "Error"
+
+    calls = {"index": index, "analyze": analyze, "api_analyze": api_analyze, "predict_fake_news": predict}
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": model.get_model_version(),
+            "config": vars(args)
+        },
+        "scenarios": {}
+    }
+    for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})...")
+        report["scenarios"][name] = run_load(calls[name], args.requests, args.concurrency)
+
+    report["stubs"] = {"news_requests": news.requests, "news_failures": news.failures}
+    server.shutdown()
+    news.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print()
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Speed and accuracy of the SimHash near-duplicate index (near_duplicates.py).
+
+Speed: fills an index with --entries fingerprints (random 64-bit values, which spread
+over the bands like real SimHashes of unrelated articles) and measures insert and
+lookup time per operation, candidates compared per lookup and the memory the index
+adds (tracemalloc).
+
+Accuracy: builds --stories synthetic articles and a "syndicated" copy of each with
+--edits small word edits plus a wire-style dateline and byline (as different outlets
+republish the same story), and reports for every maximum distance in --distances
+how many copies are matched to their original (recall) and how many distinct
+stories are matched to each other (false matches).
+
+Usage (from the project root):
+    python benchmarks/bench_near_duplicates.py [--entries 200000] [--lookups 20000]
+                                               [--stories 300] [--edits 5] [--distances 3,5,7]
+                                               [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from near_duplicates import NearDuplicateIndex, hamming_distance, normalize_words, simhash  # noqa: E402
+from stubs import make_article_text  # noqa: E402
+
+FILLER = ["the", "a", "new", "local", "officials", "reported", "city", "week"]
+
+
+def syndicate(rng, text, edits):
+    """A republished copy: a dateline, a byline and a few word substitutions, deletions and insertions"""
+    words = text.split()
+    for _ in range(edits):
+        index = rng.randrange(len(words))
+        operation = rng.random()
+        if operation < 0.4:
+            words[index] = rng.choice(FILLER)
+        elif operation < 0.7:
+            del words[index]
+        else:
+            words.insert(index, rng.choice(FILLER))
+    return f"WASHINGTON ({rng.choice(['AP', 'Reuters', 'AFP'])}) - " + " ".join(words) + " Reporting by staff."
+
+
+def speed(args):
+    rng = random.Random(args.seed)
+    index = NearDuplicateIndex(max_distance=args.max_distance, max_entries=args.entries)
+    fingerprints = [rng.getrandbits(64) for _ in range(args.entries)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for position, fingerprint in enumerate(fingerprints):
+        index.add(fingerprint, position)
+    insert_seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Half of the lookups are near an indexed fingerprint, half are new
+    queries = []
+    for i in range(args.lookups):
+        if i % 2:
+            flipped = rng.choice(fingerprints)
+            for bit in rng.sample(range(64), rng.randint(0, args.max_distance)):
+                flipped ^= 1 << bit
+            queries.append(flipped)
+        else:
+            queries.append(rng.getrandbits(64))
+    start = time.perf_counter()
+    for query in queries:
+        index.lookup(query)
+    lookup_seconds = time.perf_counter() - start
+
+    stats = index.get_stats()
+    text = make_article_text(rng, args.article_words)
+    start = time.perf_counter()
+    for _ in range(200):
+        index.fingerprint(text)
+    return {
+        "entries": args.entries,
+        "insert_us": round(insert_seconds / args.entries * 1e6, 2),
+        "lookup_us": round(lookup_seconds / args.lookups * 1e6, 2),
+        "fingerprint_us": round((time.perf_counter() - start) / 200 * 1e6, 1),
+        "avg_candidates": stats["avg_candidates"],
+        "hit_rate": stats["hit_rate"],
+        "memory_mb": round(memory / 1024 / 1024, 1)
+    }
+
+
+def accuracy(args):
+    rng = random.Random(args.seed + 1)
+    originals = [make_article_text(rng, rng.choice([150, 300, 600])) for _ in range(args.stories)]
+    copies = [syndicate(rng, text, args.edits) for text in originals]
+    original_hashes = [simhash(normalize_words(text)) for text in originals]
+    copy_hashes = [simhash(normalize_words(text)) for text in copies]
+
+    results = {}
+    for max_distance in args.distances:
+        index = NearDuplicateIndex(max_distance=max_distance, max_entries=len(originals))
+        for position, fingerprint in enumerate(original_hashes):
+            index.add(fingerprint, position)
+        matched = sum(index.lookup(fingerprint)[0] == position for position, fingerprint in enumerate(copy_hashes))
+        false_matches = sum(hamming_distance(a, b) <= max_distance
+                            for i, a in enumerate(original_hashes) for b in original_hashes[i + 1:])
+        results[str(max_distance)] = {
+            "recall": round(matched / len(copies), 3),
+            "false_matches": false_matches,
+            "pairs": len(originals) * (len(originals) - 1) // 2
+        }
+    distances = sorted(hamming_distance(a, b) for a, b in zip(original_hashes, copy_hashes))
+    results["copy_distance_p50"] = distances[len(distances) // 2]
+    results["copy_distance_p90"] = distances[int(len(distances) * 0.9)]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--max-distance", type=int, default=5, help="Maximum distance for the speed test")
+    parser.add_argument("--stories", type=int, default=300)
+    parser.add_argument("--edits", type=int, default=5, help="Word edits per syndicated copy")
+    parser.add_argument("--distances", default="3,5,7")
+    parser.add_argument("--article-words", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+    args.distances = [int(d) for d in args.distances.split(",") if d.strip()]
+
+    print(f"Indexing {args.entries} fingerprints...")
+    speed_report = speed(args)
+    print(f"insert {speed_report['insert_us']} us, lookup {speed_report['lookup_us']} us "
+          f"({speed_report['avg_candidates']} candidates), fingerprint of a {args.article_words}-word article "
+          f"{speed_report['fingerprint_us']} us, index memory {speed_report['memory_mb']} MB")
+
+    print(f"\nMatching {args.stories} syndicated copies ({args.edits} edits each)...")
+    accuracy_report = accuracy(args)
+    print(f"copy distance p50 {accuracy_report['copy_distance_p50']}, p90 {accuracy_report['copy_distance_p90']} bits")
+    print(f"{'max distance':<14}{'recall':>8}{'false matches':>15}")
+    for max_distance in args.distances:
+        row = accuracy_report[str(max_distance)]
+        print(f"{max_distance:<14}{row['recall']:>8.3f}{row['false_matches']:>8} / {row['pairs']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "speed": speed_report, "accuracy": accuracy_report}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Benchmark local model padding strategies.
+
+Compares the original fixed padding to 512 tokens with dynamic padding to the
+longest sequence and with length buckets, for batches of articles of different
+lengths. It also checks that every strategy produces the same probabilities as
+the fixed-padding path within float tolerance.
+
+Usage (from the project root):
+    python benchmarks/bench_padding.py [--batch-size 16] [--repeats 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import model  # noqa: E402
+
+STRATEGIES = ["max_length", "longest", "bucket"]
+WORDS = ("government officials said on tuesday that the new policy would affect millions "
+         "of residents across the region according to a statement released by the ministry").split()
+
+
+def make_article(num_words, rng):
+    return " ".join(rng.choice(WORDS) for _ in range(num_words)).capitalize() + "."
+
+
+def make_batches(batch_size, rng):
+    """Returns article sets roughly filling each length bucket, plus a mixed set"""
+    sets = {}
+    for bucket, num_words in [(64, 40), (128, 90), (256, 190), (512, 420)]:
+        sets[f"~{bucket} tokens"] = [make_article(num_words, rng) for _ in range(batch_size)]
+    sets["mixed"] = [make_article(rng.choice([20, 40, 90, 190, 420]), rng) for _ in range(batch_size)]
+    return sets
+
+
+def time_strategy(articles, strategy, repeats):
+    model._fake_probabilities(articles, padding_strategy=strategy)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        probs = model._fake_probabilities(articles, padding_strategy=strategy)
+        timings.append(time.perf_counter() - start)
+    return probs, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _, tokenizer = model.get_model()
+    if hasattr(tokenizer, "fake_count"):
+        print("The transformer model is not loaded (keyword fallback in use); nothing to benchmark.")
+        return 1
+
+    rng = random.Random(args.seed)
+    print(f"{'articles':<14}{'strategy':<12}{'p50 ms':>10}{'articles/s':>12}{'max |diff|':>12}")
+    parity_ok = True
+    for label, articles in make_batches(args.batch_size, rng).items():
+        reference = None
+        for strategy in STRATEGIES:
+            probs, timings = time_strategy(articles, strategy, args.repeats)
+            if reference is None:
+                reference = probs
+            diff = float(np.max(np.abs(probs - reference)))
+            parity_ok = parity_ok and diff <= args.tolerance
+            p50 = float(np.median(timings))
+            print(f"{label:<14}{strategy:<12}{p50 * 1000:>10.1f}{len(articles) / p50:>12.1f}{diff:>12.2e}")
+
+    print(f"\nParity with max_length padding (tolerance {args.tolerance}): {'OK' if parity_ok else 'FAILED'}")
+    return 0 if parity_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
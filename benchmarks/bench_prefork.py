@@ -0,0 +1,179 @@
+"""
+Memory per worker and throughput of the pre-fork server (serve.py) as workers scale.
+
+For every worker count and mode ("preload": the model loads once in the parent and is
+shared copy-on-write; "no-preload": every worker loads its own copy) the script starts
+serve.py on a free port, waits until it is ready, sends --requests distinct analyses to
+/api/analyze at --concurrency per worker and then reads the memory of every process
+from /proc/<pid>/smaps_rollup (Linux only):
+
+    rss_mb  resident memory as reported by ps, counting shared pages in every process
+    pss_mb  proportional set size: shared pages split between the processes sharing them
+    uss_mb  memory private to the process (what a worker really adds)
+
+The total PSS of the parent and the workers is the memory the whole server uses.
+
+Use a small local checkpoint so the run needs no network, e.g. --model /path/to/tiny-roberta.
+
+Usage (from the project root):
+    python benchmarks/bench_prefork.py --model ./tiny-model [--workers 1,2,4] [--modes preload,no-preload]
+                                       [--requests 200] [--concurrency 4] [--backend tflite] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load import run_load  # noqa: E402
+from stubs import make_article_text  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def process_memory(pid):
+    """RSS, PSS and USS of a process in MB, from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "uss_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1)
+    }
+
+
+def memory_report(parent_pid, workers):
+    """Memory of the parent and every worker, plus per-worker averages and the total PSS"""
+    pids = [pid for pid in child_pids(parent_pid)][:workers]
+    parent = process_memory(parent_pid)
+    per_worker = [process_memory(pid) for pid in pids]
+    average = {key: round(sum(w[key] for w in per_worker) / len(per_worker), 1) for key in parent} if per_worker else {}
+    return {
+        "parent": parent,
+        "workers": per_worker,
+        "worker_avg": average,
+        "total_pss_mb": round(parent["pss_mb"] + sum(w["pss_mb"] for w in per_worker), 1)
+    }
+
+
+def wait_until_ready(base_url, workers, process, timeout):
+    """Waits until /readyz succeeds several times in a row, so every worker is likely ready"""
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline and process.poll() is None:
+        try:
+            streak = streak + 1 if requests.get(f"{base_url}/readyz", timeout=5).status_code == 200 else 0
+        except requests.RequestException:
+            streak = 0
+        if streak >= workers * 4:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def run_case(args, workers, mode):
+    port = free_port()
+    env = dict(os.environ, SERVE_WORKERS=str(workers), SERVE_PRELOAD="true" if mode == "preload" else "false",
+               GEMINI_API_KEY="", INGESTION_ENABLED="false", RESULT_CACHE_SIZE="0", RESULT_CACHE_DB="",
+               TF_CPP_MIN_LOG_LEVEL="3")
+    if args.model:
+        env["LOCAL_MODEL_NAME"] = args.model
+    if args.backend:
+        env["LOCAL_MODEL_BACKEND"] = args.backend
+    command = [sys.executable, os.path.join(ROOT, "serve.py"), "--workers", str(workers), "--port", str(port)]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        if not wait_until_ready(base_url, workers, process, args.timeout):
+            return {"error": "server did not become ready"}
+        ready_seconds = round(time.perf_counter() - started, 2)
+        idle = memory_report(process.pid, workers)
+
+        rng = random.Random(args.seed)
+        articles = [make_article_text(rng, args.article_words) for _ in range(args.requests)]
+        session = requests.Session()
+        session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency * workers))
+
+        def analyze(i):
+            payload = {"title": f"Benchmark article {i}", "content": f"({mode} {workers}) {articles[i]}"}
+            return session.post(f"{base_url}/api/analyze", json=payload, timeout=60).status_code == 200
+
+        load = run_load(analyze, args.requests, args.concurrency * workers)
+        return {"ready_seconds": ready_seconds, "memory_idle": idle,
+                "memory_after_load": memory_report(process.pid, workers), "load": load}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Local checkpoint directory (sets LOCAL_MODEL_NAME)")
+    parser.add_argument("--backend", help="Local model backend (sets LOCAL_MODEL_BACKEND)")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--modes", default="preload,no-preload")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients per worker")
+    parser.add_argument("--article-words", type=int, default=250)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for the server to be ready")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+            print(f"Running {mode} with {workers} worker(s)...")
+            results[f"{mode}-{workers}"] = {"mode": mode, "workers": workers, **run_case(args, workers, mode)}
+
+    print(f"\n{'case':<16}{'ready s':>9}{'total PSS':>11}{'PSS/wkr':>9}{'USS/wkr':>9}{'RSS/wkr':>9}"
+          f"{'rps':>8}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<16} failed: {result['error']}")
+            continue
+        memory = result["memory_after_load"]
+        average = memory["worker_avg"]
+        load = result["load"]
+        print(f"{name:<16}{result['ready_seconds']:>9.1f}{memory['total_pss_mb']:>11.1f}{average['pss_mb']:>9.1f}"
+              f"{average['uss_mb']:>9.1f}{average['rss_mb']:>9.1f}{load['throughput_rps']:>8.1f}"
+              f"{load['p50_ms']:>9.1f}{load['p99_ms']:>9.1f}{load['errors']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "cpu_count": os.cpu_count(), "cases": results}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Benchmark the TFLite backends against the full-precision TensorFlow model.
+
+Every backend runs in its own subprocess so resident memory is measured in isolation.
+For each one the script reports load time, resident memory after loading and after
+inference, per-batch latency, and the drift of its fake-class probabilities from the
+TF model (max/mean absolute difference and verdict agreement).
+
+TFLite artifacts are converted before the timed runs, so load times show the cached
+path that a restarted server takes.
+
+Usage (from the project root):
+    python benchmarks/bench_tflite.py [--model roberta-base] [--backends tf,tflite-dynamic,tflite-int8]
+                                      [--batch-size 8] [--batches 10] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = ("government officials said on tuesday that the new policy would affect millions "
+         "of residents across the region according to a statement released by the ministry "
+         "shocking secret cure doctors hide miracle conspiracy insiders reveal").split()
+
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def make_articles(count, seed):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.choice([30, 80, 150, 300]))).capitalize() + "."
+            for _ in range(count)]
+
+
+def run_worker(args):
+    """Loads one backend in this process, scores the articles and prints a JSON result"""
+    backend = args.worker
+    os.environ["LOCAL_MODEL_BACKEND"] = "tf" if backend == "tf" else "tflite"
+    if backend.startswith("tflite-"):
+        os.environ["LOCAL_MODEL_TFLITE_QUANTIZATION"] = backend.split("-", 1)[1]
+    if args.model:
+        os.environ["LOCAL_MODEL_NAME"] = args.model
+
+    baseline_rss = rss_mb()
+    import model
+
+    start = time.perf_counter()
+    model.get_model()
+    load_seconds = time.perf_counter() - start
+    loaded_rss = rss_mb()
+    if model.get_model_status()["fallback"]:
+        print(json.dumps({"backend": backend, "error": "model failed to load (keyword fallback in use)"}))
+        return 1
+
+    articles = make_articles(args.batch_size * args.batches, args.seed)
+    batches = [articles[i:i + args.batch_size] for i in range(0, len(articles), args.batch_size)]
+    model._fake_probabilities(batches[0])  # warm-up
+
+    timings = []
+    probabilities = []
+    for batch in batches:
+        start = time.perf_counter()
+        probabilities.extend(model._fake_probabilities(batch).tolist())
+        timings.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "backend": backend,
+        "model_version": model.get_model_version(),
+        "load_seconds": round(load_seconds, 2),
+        "rss_import_mb": round(baseline_rss, 1),
+        "rss_loaded_mb": round(loaded_rss, 1),
+        "rss_after_inference_mb": round(rss_mb(), 1),
+        "batch_p50_ms": round(float(np.median(timings)) * 1000, 2),
+        "batch_p90_ms": round(float(np.percentile(timings, 90)) * 1000, 2),
+        "articles_per_second": round(len(articles) / sum(timings), 2),
+        "probabilities": probabilities
+    }))
+    return 0
+
+
+def spawn(backend, args):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", backend,
+               "--batch-size", str(args.batch_size), "--batches", str(args.batches), "--seed", str(args.seed)]
+    if args.model:
+        command += ["--model", args.model]
+    output = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    for line in reversed(output.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"backend": backend, "error": (output.stderr or output.stdout).strip()[-500:]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Model name or local checkpoint (sets LOCAL_MODEL_NAME)")
+    parser.add_argument("--backends", default="tf,tflite-dynamic,tflite-int8")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=0.7, help="Fake verdict threshold for agreement")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args)
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if "tf" not in backends:
+        backends.insert(0, "tf")  # Reference for the drift numbers
+
+    # Convert (and cache) the TFLite artifacts outside the timed runs
+    for backend in backends:
+        if backend != "tf":
+            print(f"Preparing {backend}...")
+            spawn(backend, argparse.Namespace(**{**vars(args), "batches": 1}))
+
+    results = {}
+    for backend in backends:
+        print(f"Running {backend}...")
+        results[backend] = spawn(backend, args)
+
+    reference = np.array(results["tf"].get("probabilities", []))
+    print(f"\n{'backend':<16}{'load s':>8}{'RSS MB':>9}{'p50 ms':>9}{'art/s':>9}{'max drift':>11}{'agree':>8}")
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<16} failed: {result['error']}")
+            continue
+        probs = np.array(result.pop("probabilities"))
+        if len(reference) == len(probs) and len(probs):
+            drift = np.abs(probs - reference)
+            result["max_drift"] = round(float(drift.max()), 6)
+            result["mean_drift"] = round(float(drift.mean()), 6)
+            result["verdict_agreement"] = round(float(np.mean((probs > args.threshold) == (reference > args.threshold))), 4)
+        print(f"{backend:<16}{result['load_seconds']:>8.2f}{result['rss_after_inference_mb']:>9.1f}"
+              f"{result['batch_p50_ms']:>9.1f}{result['articles_per_second']:>9.1f}"
+              f"{result.get('max_drift', float('nan')):>11.2e}{result.get('verdict_agreement', float('nan')):>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "backends": results}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
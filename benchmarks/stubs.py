@@ -0,0 +1,248 @@
+"""
+Local stand-ins for the external services, used by the load benchmark.
+
+StubNewsServer is an HTTP server that answers like NewsData.io (/newsdata/api/1/news)
+and NewsAPI (/newsapi/v2/top-headlines). install_gemini_stub() replaces the Gemini SDK
+with a fake whose models return well-formed credibility JSON, whole or streamed in
+chunks. Latency (with jitter) and failure rates are configurable for all of them.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+WORDS = ("government officials said on tuesday that the new policy would affect millions "
+         "of residents across the region according to a statement released by the ministry "
+         "experts warned the plan could raise costs while supporters called it overdue").split()
+
+
+def make_article_text(rng, num_words):
+    return " ".join(rng.choice(WORDS) for _ in range(num_words)).capitalize() + "."
+
+
+class StubLatency:
+    """Sleeps for latency_ms +/- jitter_ms and fails with probability failure_rate"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, failure_rate=0.0, seed=None):
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.failure_rate = float(failure_rate)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait_and_decide(self, share=1.0):
+        """Sleeps for share of the simulated latency; returns True if this call should fail"""
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) * share
+            fail = self._rng.random() < self.failure_rate
+        if delay:
+            time.sleep(delay / 1000)
+        return fail
+
+
+def _newsdata_payload(query, rng, page_size):
+    results = []
+    for index in range(page_size):
+        results.append({
+            "title": f"Stub headline {index} for {query.get('category', ['top'])[0]}",
+            "description": make_article_text(rng, 30),
+            "content": make_article_text(rng, rng.choice([60, 150, 300])),
+            "image_url": None,
+            "link": f"https://example.com/newsdata/{rng.getrandbits(32)}",
+            "source_id": "stubwire",
+            "pubDate": "2025-01-15 10:30:00",
+            "creator": ["Stub Reporter"],
+            "country": [query.get("country", ["us"])[0]],
+            "category": [query.get("category", ["top"])[0]]
+        })
+    return {"status": "success", "totalResults": len(results), "results": results, "nextPage": "stubpage2"}
+
+
+def _newsapi_payload(query, rng, page_size):
+    articles = []
+    for index in range(page_size):
+        articles.append({
+            "source": {"id": None, "name": "Stub Times"},
+            "author": "Stub Reporter",
+            "title": f"Stub NewsAPI headline {index}",
+            "description": make_article_text(rng, 30),
+            "url": f"https://example.com/newsapi/{rng.getrandbits(32)}",
+            "urlToImage": None,
+            "publishedAt": "2025-01-15T10:30:00Z",
+            "content": make_article_text(rng, rng.choice([60, 150, 300]))
+        })
+    return {"status": "ok", "totalResults": len(articles), "articles": articles}
+
+
+class StubNewsServer:
+    """
+    Threaded HTTP server mimicking the NewsData.io and NewsAPI JSON shapes.
+
+    Failed requests answer HTTP 500, which the app retries and then falls back on.
+    """
+
+    def __init__(self, latency=None, page_size=10, host="127.0.0.1", port=0, seed=0):
+        self.latency = latency or StubLatency()
+        self.page_size = page_size
+        self.requests = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def newsdata_url(self):
+        return f"{self.base_url}/newsdata/api/1/news"
+
+    @property
+    def newsapi_url(self):
+        return f"{self.base_url}/newsapi/v2/top-headlines"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                fail = stub.latency.wait_and_decide()
+                with stub._lock:
+                    stub.requests += 1
+                    stub.failures += int(fail)
+                    rng = random.Random(stub._rng.getrandbits(64))
+
+                if fail:
+                    return self._send(500, {"status": "error", "message": "stub failure"})
+                if parsed.path.startswith("/newsdata"):
+                    return self._send(200, _newsdata_payload(query, rng, stub.page_size))
+                if parsed.path.startswith("/newsapi"):
+                    return self._send(200, _newsapi_payload(query, rng, stub.page_size))
+                return self._send(404, {"status": "error", "message": "not found"})
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-news", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _StubStream:
+    """Iterates over response chunks, sleeping between them like a streamed generation"""
+
+    def __init__(self, chunks, interval):
+        self.chunks = chunks
+        self.interval = interval
+
+    def __iter__(self):
+        for index, chunk in enumerate(self.chunks):
+            if index and self.interval:
+                time.sleep(self.interval)
+            yield _StubResponse(chunk)
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+
+STUB_REASONING = ("Stub analysis: the article makes verifiable claims attributed to named officials. "
+                  "The figures it quotes are consistent with the ministry statement it cites, the tone is "
+                  "measured and the piece separates reporting from the reactions of critics and supporters.")
+
+
+class StubGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel returning credibility JSON.
+
+    With stream=True the first chunk arrives after first_chunk_share of the simulated
+    latency and the rest of the response is spread over the remaining time in chunks
+    of chunk_chars characters.
+    """
+
+    def __init__(self, name, latency, first_chunk_share=0.2, chunk_chars=24, **kwargs):
+        self.name = name
+        self.latency = latency
+        self.first_chunk_share = first_chunk_share
+        self.chunk_chars = chunk_chars
+        self._rng = random.Random(name)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if not stream:
+            if self.latency.wait_and_decide():
+                raise RuntimeError("503 stub Gemini failure")
+            if "Connection successful" in prompt:
+                return _StubResponse("Connection successful")
+            return _StubResponse(self._analysis_text())
+
+        # Time to the first chunk; the rest of the simulated latency is spent streaming
+        if self.latency.wait_and_decide(self.first_chunk_share):
+            raise RuntimeError("503 stub Gemini failure")
+        text = "Connection successful" if "Connection successful" in prompt else self._analysis_text()
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        remaining = self.latency.latency_ms * (1 - self.first_chunk_share) / 1000
+        return _StubStream(chunks, remaining / max(1, len(chunks) - 1))
+
+    def _analysis_text(self):
+        with self._lock:
+            score = self._rng.randint(2, 9)
+        return json.dumps({
+            "credibility_score": score,
+            "reasoning": STUB_REASONING,
+            "recommendations": "Cross-check the quoted figures with the original statement."
+        }, indent=2)
+
+
+class StubGenAI:
+    """Stand-in for the google.generativeai module"""
+
+    def __init__(self, latency, **model_options):
+        self.latency = latency
+        self.model_options = model_options
+
+    def configure(self, **kwargs):
+        pass
+
+    def GenerativeModel(self, name, **kwargs):
+        return StubGenerativeModel(name, self.latency, **self.model_options, **kwargs)
+
+
+def install_gemini_stub(latency=None, **model_options):
+    """
+    Routes every Gemini call of the app through StubGenAI. Must be called after
+    gemini_analyze is imported and before the first Gemini call.
+    """
+    import gemini_analyze
+    gemini_analyze._genai = StubGenAI(latency or StubLatency(), **model_options)
+    gemini_analyze.gemini_client._handles.clear()
+    gemini_analyze.gemini_configured = True
+    return gemini_analyze._genai
@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to an unreliable upstream service.
+
+    closed:    calls go through; after failure_threshold consecutive failures the
+               circuit opens
+    open:      calls are rejected immediately until recovery_timeout has passed
+    half-open: up to half_open_max_calls trial calls go through; a success closes
+               the circuit again, a failure re-opens it
+    """
+
+    def __init__(self, name, failure_threshold=3, recovery_timeout=30, half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = float(recovery_timeout)
+        self.half_open_max_calls = max(1, int(half_open_max_calls))
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._half_open_calls = 0
+
+        self._successes = 0
+        self._failures = 0
+        self._rejected = 0
+        self._trips = 0
+        self._last_failure = None
+
+    @property
+    def state(self):
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def _update_state(self):
+        # Must be called with the lock held
+        if self._state == OPEN and time.time() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+
+    def allow_request(self):
+        """Returns True if a call may go through now, False if it should fail fast"""
+        with self._lock:
+            self._update_state()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._successes += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                print(f"Circuit breaker '{self.name}' closed")
+            self._state = CLOSED
+
+    def release(self):
+        """Gives back a half-open trial call that ended without an outcome, e.g. because its caller went away"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self._consecutive_failures += 1
+            self._last_failure = str(error) if error is not None else None
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.time()
+                self._trips += 1
+                print(f"Circuit breaker '{self.name}' opened after {self._consecutive_failures} consecutive failures")
+
+    def get_stats(self):
+        """Returns the breaker state and counters"""
+        with self._lock:
+            self._update_state()
+            retry_in = None
+            if self._state == OPEN:
+                retry_in = round(max(0.0, self.recovery_timeout - (time.time() - self._opened_at)), 1)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "seconds_until_half_open": retry_in,
+                "successes": self._successes,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "trips": self._trips,
+                "last_failure": self._last_failure
+            }
+
+
+class RetryPolicy:
+    """
+    Exponential backoff policy with optional full jitter and a cap on the total time
+    a single call may spend waiting between retries.
+    """
+
+    def __init__(self, max_retries=1, base_delay=0.25, max_delay=2.0, multiplier=2.0, jitter=True, max_total_delay=3.0):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.multiplier = float(multiplier)
+        self.jitter = jitter
+        self.max_total_delay = float(max_total_delay)
+
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._total_delay = 0.0
+        self._budget_exhausted = 0
+
+    def delay(self, attempt, waited_so_far=0.0):
+        """
+        Seconds to wait before retry number attempt + 1, or None if the wait would
+        exceed max_total_delay for this call.
+        """
+        delay = min(self.max_delay, self.base_delay * (self.multiplier ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if waited_so_far + delay > self.max_total_delay:
+            with self._lock:
+                self._budget_exhausted += 1
+            return None
+        with self._lock:
+            self._retries += 1
+            self._total_delay += delay
+        return delay
+
+    def get_stats(self):
+        """Returns the policy configuration and how much retrying it has caused"""
+        with self._lock:
+            return {
+                "max_retries": self.max_retries,
+                "base_delay": self.base_delay,
+                "max_delay": self.max_delay,
+                "multiplier": self.multiplier,
+                "jitter": self.jitter,
+                "max_total_delay": self.max_total_delay,
+                "retries": self._retries,
+                "total_delay_seconds": round(self._total_delay, 2),
+                "budget_exhausted": self._budget_exhausted
+            }
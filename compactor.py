@@ -0,0 +1,282 @@
+import math
+import re
+import threading
+import time
+from collections import deque
+
+from lexicon import get_default_lexicon
+
+# Sentences that carry no claims: site furniture, newsletter prompts and the context
+# sentence /analyze prepends to short articles (the title and source are in the prompt)
+BOILERPLATE_PATTERNS = [
+    r'^this article appears to be from\b',
+    r'^(advertisement|sponsored( content)?|related( articles?| stories| coverage)?)\b\W*$',
+    r'^(read (more|next|also)|see also|more on this|click here|tap here)\b',
+    r'^(sign up|subscribe|follow us|share (this|on)|download (our|the) app|listen to (this|the) (article|story))\b',
+    r'^(image|photo|photograph|video)( source| credit| caption)?\s*[:,]',
+    r'\b(all rights reserved|copyright \d{4}|©)',
+    r'\b(sign up|subscribe) (for|to) (our|the|a) (free )?(daily |weekly )?newsletter',
+    r'\b(we use cookies|cookie (policy|settings)|privacy policy|terms of (use|service))\b',
+    r'^this (story|article) (has been|was) updated\b',
+    r'^(reporting|writing|editing|additional reporting) by\b'
+]
+
+# Noise removed from inside sentences, e.g. the "[+1234 chars]" NewsAPI appends to truncated content
+INLINE_NOISE = re.compile(r'\s*\[\+\d+ chars\]|\s*\[(?:…|\.\.\.)\]')
+
+# Marks where sentences were left out between the ones kept
+GAP_MARKER = "[...]"
+
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "jr.", "sr.", "gen.", "sen.", "rep.", "gov.",
+                  "prof.", "inc.", "co.", "ltd.", "no.", "vs.", "lt.", "col.", "sgt.", "capt."}
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?]["”’)\]])\s+|(?<=[.!?])\s+(?=["“‘(\[]?[A-Z0-9])')
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n|\n(?=\s*[-•*]\s)')
+_NUMBER = re.compile(r'\b\d[\d,.]*%?')
+_ATTRIBUTION = re.compile(
+    r'\b(said|says|told|according to|reported|announced|claimed|claims|stated|confirmed|denied|alleged|'
+    r'estimated|found|showed|revealed|warned|admitted)\b', re.IGNORECASE)
+_QUOTE = re.compile(r'["“”]')
+_CAPITALIZED = re.compile(r'(?<=\s)[A-Z][a-zA-Z]+')
+_WORD = re.compile(r'\w+')
+
+
+def estimate_tokens(text, chars_per_token=4.0):
+    """Approximate LLM token count of a text (about 4 characters per token for English)"""
+    return int(math.ceil(len(text) / chars_per_token)) if text else 0
+
+
+def split_sentences(text):
+    """
+    Splits text into sentences, keeping track of paragraphs.
+
+    Returns:
+        list: (paragraph_index, sentence) pairs in order
+    """
+    sentences = []
+    for paragraph_index, paragraph in enumerate(_PARAGRAPH_SPLIT.split(text)):
+        paragraph = re.sub(r'\s+', ' ', paragraph).strip()
+        if not paragraph:
+            continue
+        pieces = _SENTENCE_SPLIT.split(paragraph)
+        merged = []
+        for piece in pieces:
+            # "Mr. Smith" or "Gen. Lee" do not end a sentence
+            if merged and merged[-1].rsplit(" ", 1)[-1].lower() in _ABBREVIATIONS:
+                merged[-1] = f"{merged[-1]} {piece}"
+            else:
+                merged.append(piece)
+        sentences.extend((paragraph_index, sentence) for sentence in merged if sentence)
+    return sentences
+
+
+def _normalize(text):
+    return " ".join(_WORD.findall(text.lower()))
+
+
+class PromptCompactor:
+    """
+    Shrinks article text before it is put into a Gemini prompt.
+
+    Exact repeats of a sentence (after normalizing case and punctuation) and boilerplate
+    sentences are dropped. If the rest is still over token_budget estimated tokens,
+    sentences are ranked by claim density (numbers, attributions, quotes, named
+    entities and phrases from the fake-news lexicon, per word, with a bonus for the
+    lede) and the best ones that fit the budget are kept in their original order, with
+    GAP_MARKER where sentences were left out.
+
+    Optionally a sample of requests is also scored with the full text (see
+    record_shadow) to measure how much compaction changes the credibility score.
+    """
+
+    def __init__(self, token_budget=2000, enabled=True, chars_per_token=4.0, lexicon=None,
+                 boilerplate_patterns=None):
+        self.token_budget = max(1, int(token_budget))
+        self.enabled = enabled
+        self.chars_per_token = float(chars_per_token)
+        self._lexicon = lexicon
+        self._boilerplate = [re.compile(pattern, re.IGNORECASE)
+                             for pattern in (boilerplate_patterns or BOILERPLATE_PATTERNS)]
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.compacted = 0
+        self.original_tokens = 0
+        self.compacted_tokens = 0
+        self.duplicates = 0
+        self.boilerplate = 0
+        self.dropped_for_budget = 0
+        self.compact_seconds = 0.0
+        self.shadow_comparisons = 0
+        self.shadow_abs_delta = 0.0
+        self.shadow_max_abs_delta = 0
+        self._recent_shadows = deque(maxlen=50)
+
+    @property
+    def lexicon(self):
+        if self._lexicon is None:
+            self._lexicon = get_default_lexicon()
+        return self._lexicon
+
+    def compact(self, text, title=None):
+        """
+        Compacts article text for a prompt.
+
+        Args:
+            text (str): Article text
+            title (str, optional): Article title; a sentence repeating it is dropped
+
+        Returns:
+            tuple: (compacted_text, report) where report holds the estimated tokens before
+                   and after, the ratio and how many sentences each step removed
+        """
+        original_tokens = estimate_tokens(text, self.chars_per_token)
+        if not self.enabled or not text:
+            return text, {"enabled": False, "original_tokens": original_tokens}
+
+        start = time.perf_counter()
+        title_key = _normalize(title) if title else None
+        seen = set()
+        kept = []
+        duplicates = 0
+        boilerplate = 0
+        for paragraph_index, sentence in split_sentences(text):
+            sentence = INLINE_NOISE.sub("", sentence).strip()
+            key = _normalize(sentence)
+            if not key:
+                continue
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            if key == title_key or any(pattern.search(sentence) for pattern in self._boilerplate):
+                boilerplate += 1
+                continue
+            kept.append((len(kept), paragraph_index, sentence))
+
+        selected = kept
+        if sum(estimate_tokens(s, self.chars_per_token) + 1 for _, _, s in kept) > self.token_budget:
+            selected = self._select(kept)
+        compacted = self._join(selected, len(kept))
+        if not compacted.strip():
+            # Everything looked like boilerplate; send the text as it was rather than nothing
+            compacted = text
+
+        compacted_tokens = estimate_tokens(compacted, self.chars_per_token)
+        elapsed = time.perf_counter() - start
+        report = {
+            "enabled": True,
+            "original_chars": len(text),
+            "compacted_chars": len(compacted),
+            "original_tokens": original_tokens,
+            "compacted_tokens": compacted_tokens,
+            "ratio": round(compacted_tokens / original_tokens, 3) if original_tokens else 1.0,
+            "sentences": len(kept) + duplicates + boilerplate,
+            "kept": len(selected),
+            "duplicates": duplicates,
+            "boilerplate": boilerplate,
+            "dropped_for_budget": len(kept) - len(selected),
+            "compact_ms": round(elapsed * 1000, 2)
+        }
+        with self._lock:
+            self.requests += 1
+            self.compacted += int(compacted != text)
+            self.original_tokens += original_tokens
+            self.compacted_tokens += compacted_tokens
+            self.duplicates += duplicates
+            self.boilerplate += boilerplate
+            self.dropped_for_budget += report["dropped_for_budget"]
+            self.compact_seconds += elapsed
+        return compacted, report
+
+    def _select(self, sentences):
+        """Keeps the most claim-dense sentences that fit the token budget, in original order"""
+        ranked = sorted(((self._claim_density(item[0], item[2]), item) for item in sentences),
+                        key=lambda scored: (-scored[0], scored[1][0]))
+        selected = []
+        used = 0
+        for density, item in ranked:
+            if density == 0.0 and selected:
+                # Sentences without any claim signal are not worth the budget
+                break
+            # One token per sentence for the separator, plus room for a gap marker
+            cost = estimate_tokens(item[2], self.chars_per_token) + 2
+            if used + cost <= self.token_budget:
+                selected.append(item)
+                used += cost
+        if not selected:
+            # Not even one sentence fits: keep the start of the best one
+            index, paragraph_index, sentence = ranked[0][1]
+            limit = int(self.token_budget * self.chars_per_token)
+            selected = [(index, paragraph_index, sentence[:limit].rsplit(" ", 1)[0])]
+        return sorted(selected)
+
+    def _claim_density(self, position, sentence):
+        words = len(_WORD.findall(sentence))
+        if words < 4:
+            return 0.0
+        signals = (2.0 * len(_NUMBER.findall(sentence))
+                   + 1.5 * len(_ATTRIBUTION.findall(sentence))
+                   + 1.0 * bool(_QUOTE.search(sentence))
+                   + 0.5 * len(_CAPITALIZED.findall(sentence))
+                   + 2.0 * self.lexicon.score(sentence)["weight"])
+        lede_bonus = 1.0 if position < 2 else 0.0
+        return signals / math.sqrt(words) + lede_bonus
+
+    @staticmethod
+    def _join(selected, total):
+        parts = []
+        previous = None
+        for index, paragraph_index, sentence in selected:
+            if previous is None:
+                if index > 0:
+                    parts.append(GAP_MARKER + " ")
+            elif index != previous[0] + 1:
+                parts.append(" " + GAP_MARKER + "\n\n" if paragraph_index != previous[1] else f" {GAP_MARKER} ")
+            else:
+                parts.append("\n\n" if paragraph_index != previous[1] else " ")
+            parts.append(sentence)
+            previous = (index, paragraph_index)
+        if previous is not None and previous[0] < total - 1:
+            parts.append(" " + GAP_MARKER)
+        return "".join(parts)
+
+    def record_shadow(self, report, compacted_score, full_score):
+        """Records the credibility scores of one request with the compacted and the full text"""
+        delta = compacted_score - full_score
+        with self._lock:
+            self.shadow_comparisons += 1
+            self.shadow_abs_delta += abs(delta)
+            self.shadow_max_abs_delta = max(self.shadow_max_abs_delta, abs(delta))
+            self._recent_shadows.append({
+                "at": time.time(),
+                "ratio": report.get("ratio"),
+                "compacted_score": compacted_score,
+                "full_score": full_score,
+                "delta": delta
+            })
+        return delta
+
+    def get_stats(self):
+        """Returns compression and shadow-comparison statistics for diagnostics"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "token_budget": self.token_budget,
+                "requests": self.requests,
+                "compacted": self.compacted,
+                "original_tokens": self.original_tokens,
+                "compacted_tokens": self.compacted_tokens,
+                "tokens_saved": self.original_tokens - self.compacted_tokens,
+                "avg_ratio": round(self.compacted_tokens / self.original_tokens, 3) if self.original_tokens else 1.0,
+                "duplicates": self.duplicates,
+                "boilerplate": self.boilerplate,
+                "dropped_for_budget": self.dropped_for_budget,
+                "avg_compact_ms": round(self.compact_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+                "shadow": {
+                    "comparisons": self.shadow_comparisons,
+                    "mean_abs_delta": round(self.shadow_abs_delta / self.shadow_comparisons, 2)
+                    if self.shadow_comparisons else 0.0,
+                    "max_abs_delta": self.shadow_max_abs_delta,
+                    "recent": list(self._recent_shadows)
+                }
+            }
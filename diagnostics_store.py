@@ -0,0 +1,276 @@
+import copy
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+RECENT_KINDS = ("all", "slow", "failed")
+
+
+class DiagnosticsStore:
+    """
+    Bounded server-side store of per-analysis diagnostic records.
+
+    Records (timings, cache and Gemini outcomes, error tracebacks) are kept in an
+    in-memory ring buffer of the max_entries most recent analyses and, optionally, in
+    a SQLite table trimmed to max_db_entries so they survive restarts and can be read
+    by every worker of a multi-process server. Each record gets a short random ID; the
+    browser session only holds that ID instead of the record itself.
+    """
+
+    def __init__(self, max_entries=500, db_path=None, max_db_entries=10000, slow_ms=3000):
+        self.max_entries = max(0, int(max_entries))
+        self.db_path = db_path
+        self.max_db_entries = int(max_db_entries)
+        self.slow_ms = float(slow_ms)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._db = None
+        self._db_writes = 0
+
+        self.saved = 0
+        self.updated = 0
+        self.lookups = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS diagnostics ("
+                "id TEXT PRIMARY KEY, created_at REAL NOT NULL, duration_ms REAL NOT NULL, "
+                "failed INTEGER NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_diagnostics_created_at ON diagnostics (created_at)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error opening diagnostics database {db_path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def duration_ms(record):
+        """Total time of an analysis, including a progressive Gemini stream if there was one"""
+        return (record.get('duration_ms') or 0) + (record.get('stream_duration_ms') or 0)
+
+    @staticmethod
+    def is_failed(record):
+        """Whether the analysis or its Gemini part failed"""
+        return bool(record.get('error') or record.get('gemini_error'))
+
+    def save(self, record):
+        """
+        Stores a diagnostic record.
+
+        Args:
+            record (dict): JSON-serializable diagnostic information of one analysis
+
+        Returns:
+            str: The record ID to look it up with
+        """
+        record_id = secrets.token_urlsafe(9)
+        record = copy.deepcopy(record)
+        record['id'] = record_id
+        record.setdefault('created_at', time.time())
+        with self._lock:
+            self._put_memory(record_id, record)
+            self._write_db(record)
+            self.saved += 1
+        return record_id
+
+    def update(self, record_id, fields):
+        """
+        Adds information to a stored record, e.g. the outcome of a progressive Gemini stream.
+
+        Returns:
+            bool: False if there is no record with that ID (any more)
+        """
+        with self._lock:
+            record = self._memory.get(record_id)
+            if record is None:
+                record = self._read_db(record_id)
+                if record is None:
+                    return False
+                self._put_memory(record_id, record)
+            record.update(copy.deepcopy(fields))
+            self._write_db(record)
+            self.updated += 1
+            return True
+
+    def get(self, record_id):
+        """Returns a copy of the record with the given ID, or None"""
+        if not record_id:
+            return None
+        with self._lock:
+            self.lookups += 1
+            record = self._memory.get(record_id)
+            if record is None:
+                record = self._read_db(record_id)
+            if record is None:
+                self.misses += 1
+                return None
+            return copy.deepcopy(record)
+
+    def recent(self, kind="all", limit=20, ids=None):
+        """
+        Lists the most recent analyses, newest first.
+
+        Args:
+            kind (str): 'all', 'slow' (at least slow_ms) or 'failed'
+            limit (int): Maximum number of records
+            ids (list, optional): Only consider these record IDs, e.g. the ones a session created
+
+        Returns:
+            list: Summaries with id, time, duration_ms, failed, result and error
+        """
+        if kind not in RECENT_KINDS:
+            raise ValueError(f"kind must be one of {', '.join(RECENT_KINDS)}")
+        limit = max(1, int(limit))
+        if ids is not None:
+            ids = set(ids)
+            if not ids:
+                return []
+        with self._lock:
+            if self._db is not None:
+                conditions = {"all": [], "slow": ["duration_ms >= ?"], "failed": ["failed = 1"]}[kind]
+                params = [self.slow_ms] if kind == "slow" else []
+                if ids is not None:
+                    conditions.append(f"id IN ({', '.join('?' * len(ids))})")
+                    params.extend(ids)
+                where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+                try:
+                    rows = self._db.execute(
+                        f"SELECT value FROM diagnostics{where} ORDER BY created_at DESC LIMIT ?",
+                        params + [limit]
+                    ).fetchall()
+                    return [self._summary(json.loads(row[0])) for row in rows]
+                except (sqlite3.Error, ValueError) as e:
+                    print(f"Diagnostics read error: {e}")
+
+            summaries = []
+            for record in reversed(self._memory.values()):
+                if ids is not None and record.get('id') not in ids:
+                    continue
+                if kind == "slow" and self.duration_ms(record) < self.slow_ms:
+                    continue
+                if kind == "failed" and not self.is_failed(record):
+                    continue
+                summaries.append(self._summary(record))
+                if len(summaries) >= limit:
+                    break
+            return summaries
+
+    def _summary(self, record):
+        error = record.get('error') or record.get('gemini_error')
+        return {
+            'id': record.get('id'),
+            'time': record.get('time'),
+            'duration_ms': round(self.duration_ms(record), 1),
+            'slow': self.duration_ms(record) >= self.slow_ms,
+            'failed': self.is_failed(record),
+            'result': record.get('predict_result'),
+            'gemini_requested': record.get('gemini_requested', False),
+            'error': str(error)[:200] if error else None
+        }
+
+    def _put_memory(self, record_id, record):
+        if self.max_entries == 0:
+            return
+        self._memory[record_id] = record
+        self._memory.move_to_end(record_id)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _read_db(self, record_id):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT value FROM diagnostics WHERE id = ?", (record_id,)).fetchone()
+            return json.loads(row[0]) if row is not None else None
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Diagnostics read error: {e}")
+            return None
+
+    def _write_db(self, record):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO diagnostics (id, created_at, duration_ms, failed, value) VALUES (?, ?, ?, ?, ?)",
+                (record['id'], record['created_at'], self.duration_ms(record), int(self.is_failed(record)),
+                 json.dumps(record, default=str))
+            )
+            self._db_writes += 1
+            # Trimming needs a COUNT(*), so only do it every so often
+            if self._db_writes % 100 == 0:
+                self._trim_db()
+            self._db.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Diagnostics write error: {e}")
+
+    def _trim_db(self):
+        count = self._db.execute("SELECT COUNT(*) FROM diagnostics").fetchone()[0]
+        excess = count - self.max_db_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM diagnostics WHERE id IN (SELECT id FROM diagnostics ORDER BY created_at LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def reopen(self):
+        """Opens a fresh SQLite connection, e.g. in a worker forked after the store was created"""
+        with self._lock:
+            if self.db_path:
+                self._open_db(self.db_path)
+
+    def clear(self):
+        """Remove every record"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM diagnostics")
+                self._db.commit()
+
+    def get_stats(self):
+        """Returns store size and counters"""
+        with self._lock:
+            stats = {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "slow_ms": self.slow_ms,
+                "saved": self.saved,
+                "updated": self.updated,
+                "lookups": self.lookups,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_enabled": self._db is not None
+            }
+            if self._db is not None:
+                try:
+                    stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM diagnostics").fetchone()[0]
+                except sqlite3.Error:
+                    stats["disk_entries"] = None
+            return stats
+
+
+# Shared store of /analyze diagnostics; the session only keeps the record ID
+diagnostics_store = DiagnosticsStore(
+    max_entries=int(os.getenv("DIAGNOSTICS_STORE_SIZE", 500)),
+    db_path=os.getenv("DIAGNOSTICS_DB") or None,
+    max_db_entries=int(os.getenv("DIAGNOSTICS_DB_MAX_ENTRIES", 10000)),
+    slow_ms=float(os.getenv("DIAGNOSTICS_SLOW_MS", 3000))
+)
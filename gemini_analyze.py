@@ -1,16 +1,46 @@
-import google.generativeai as genai
 import os
 import json
+import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from circuit_breaker import CircuitBreaker, RetryPolicy, CLOSED
+from compactor import PromptCompactor
+import metrics
 
 # Load environment variables
 load_dotenv()
 
+# The Gemini SDK is slow to import, so it is imported and configured on first use
+_genai = None
+_genai_lock = threading.Lock()
+
+def get_genai():
+    """Returns the configured google.generativeai module, importing it on first use"""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _genai = genai
+    return _genai
+
+def reset_gemini_after_fork():
+    """
+    Called in a forked worker: gRPC channels are not fork-safe, so the SDK is configured
+    again (which creates new clients) and the model handles are rebuilt on first use
+    """
+    global _genai, _genai_lock
+    _genai = None
+    _genai_lock = threading.Lock()
+    gemini_client.reset_after_fork()
+
 # Configure Gemini API with improved error handling
 def configure_gemini():
-    """Configure the Gemini API with proper error handling"""
+    """Validate the Gemini API key (the SDK itself is configured lazily by get_genai)"""
     try:
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key or api_key == "your_gemini_api_key_here":
@@ -22,7 +52,6 @@ def configure_gemini():
             print("WARNING: Gemini API key appears to be in incorrect format")
             return False
             
-        genai.configure(api_key=api_key)
         return True
     except Exception as e:
         print(f"Error configuring Gemini API: {e}")
@@ -31,22 +60,230 @@ def configure_gemini():
 # Initialize the configuration
 gemini_configured = configure_gemini()
 
-def analyze_with_gemini(article_text, article_title=None, article_source=None, max_retries=2):
+# Safety settings shared by every Gemini model handle
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
+]
+
+# Generation settings per model; models not listed here use DEFAULT_GENERATION_CONFIG
+GENERATION_CONFIGS = {
+    "gemini-2.0-flash-exp": {
+        "temperature": 0.1,  # Lower temperature for more factual responses
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": 4096,  # Higher output token limit for Gemini 2.0
+    },
+    "gemini-pro": {
+        "temperature": 0.2,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": 2048,
+    }
+}
+DEFAULT_GENERATION_CONFIG = GENERATION_CONFIGS["gemini-pro"]
+
+class GeminiClientManager:
     """
-    Analyze article content using Google Gemini AI with improved error handling.
+    Long-lived Gemini model handles with sticky model selection.
     
-    Args:
-        article_text (str): The article content to analyze
-        article_title (str, optional): The title of the article
-        article_source (str, optional): The source of the article
-        max_retries (int): Maximum number of retry attempts
+    Models are tried in preference order. Once a model fails, the manager sticks with
+    the first one that works instead of retrying the failed model on every request,
+    and re-probes the preferred model at most once per reprobe_interval seconds.
+    """
+    
+    def __init__(self, model_names, reprobe_interval=300):
+        self.model_names = list(model_names)
+        self.reprobe_interval = reprobe_interval
+        self._lock = threading.Lock()
+        self._handles = {}
+        self._current = 0
+        self._last_probe = 0.0
+        self._calls = {name: 0 for name in self.model_names}
+        self._failures = {name: 0 for name in self.model_names}
+        self._fallback_calls = 0
+        self._switches = 0
+        self._last_error = None
+    
+    @property
+    def primary_model(self):
+        return self.model_names[0]
+    
+    def reset_after_fork(self):
+        """Drops the model handles (and their gRPC channels) inherited from the parent process"""
+        self._lock = threading.Lock()
+        self._handles = {}
+    
+    def _get_handle(self, name):
+        """Returns the cached GenerativeModel for a model name, building it once"""
+        handle = self._handles.get(name)
+        if handle is None:
+            with self._lock:
+                handle = self._handles.get(name)
+                if handle is None:
+                    handle = get_genai().GenerativeModel(
+                        name,
+                        safety_settings=SAFETY_SETTINGS,
+                        generation_config=GENERATION_CONFIGS.get(name, DEFAULT_GENERATION_CONFIG)
+                    )
+                    self._handles[name] = handle
+        return handle
+    
+    def _candidate_order(self):
+        """Model indices to try, starting with the sticky model (or the primary when a re-probe is due)"""
+        with self._lock:
+            start = self._current
+            if start != 0 and time.time() - self._last_probe >= self.reprobe_interval:
+                self._last_probe = time.time()
+                start = 0
+        return list(range(start, len(self.model_names)))
+    
+    def generate_content(self, prompt, **kwargs):
+        """
+        Generate content with the currently working model, falling back down the list.
         
+        Returns:
+            tuple: (response, model_name)
+            
+        Raises:
+            Exception: The last model error if every model failed
+        """
+        last_error = None
+        for index in self._candidate_order():
+            name = self.model_names[index]
+            try:
+                response = self._get_handle(name).generate_content(prompt, **kwargs)
+            except Exception as e:
+                print(f"Error with {name} model: {e}")
+                last_error = e
+                with self._lock:
+                    self._failures[name] += 1
+                    self._last_error = f"{name}: {e}"
+                    if index >= self._current and index + 1 < len(self.model_names):
+                        # Stick with the next model until the next re-probe
+                        if self._current != index + 1:
+                            self._switches += 1
+                        self._current = index + 1
+                        self._last_probe = time.time()
+                continue
+            
+            with self._lock:
+                self._calls[name] += 1
+                if index != 0:
+                    self._fallback_calls += 1
+                if index != self._current:
+                    self._switches += 1
+                    self._current = index
+            return response, name
+        
+        raise last_error or RuntimeError("No Gemini models configured")
+    
+    def get_stats(self):
+        """Returns the chosen model and fallback counters"""
+        with self._lock:
+            return {
+                "models": list(self.model_names),
+                "current_model": self.model_names[self._current],
+                "using_fallback": self._current != 0,
+                "reprobe_interval": self.reprobe_interval,
+                "calls": dict(self._calls),
+                "failures": dict(self._failures),
+                "fallback_calls": self._fallback_calls,
+                "model_switches": self._switches,
+                "last_error": self._last_error
+            }
+
+# Shared manager used for analysis and connection tests
+gemini_client = GeminiClientManager(
+    [name.strip() for name in os.getenv("GEMINI_MODELS", "gemini-2.0-flash-exp,gemini-pro").split(",") if name.strip()],
+    reprobe_interval=float(os.getenv("GEMINI_REPROBE_INTERVAL", 300))
+)
+
+# Fails Gemini calls fast while the service is down instead of blocking request threads
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", 3)),
+    recovery_timeout=float(os.getenv("GEMINI_BREAKER_RECOVERY_TIMEOUT", 30))
+)
+
+# Backoff between attempts of a single analysis
+gemini_retry_policy = RetryPolicy(
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", 2)),
+    base_delay=float(os.getenv("GEMINI_RETRY_BASE_DELAY", 0.25)),
+    max_delay=float(os.getenv("GEMINI_RETRY_MAX_DELAY", 2)),
+    jitter=os.getenv("GEMINI_RETRY_JITTER", "true").lower() in ("1", "true", "yes"),
+    max_total_delay=float(os.getenv("GEMINI_RETRY_MAX_TOTAL_DELAY", 3))
+)
+
+# Stream Gemini responses and parse them as they arrive, so the credibility score is
+# known as soon as its field is complete instead of after the whole response
+GEMINI_STREAMING = os.getenv("GEMINI_STREAMING", "true").lower() in ("1", "true", "yes")
+
+# Optionally, article text is de-duplicated, stripped of boilerplate and cut down to its
+# most claim-dense sentences (up to the token budget) before it goes into the prompt.
+# Off by default since it changes what Gemini sees
+GEMINI_PROMPT_COMPACTION = os.getenv("GEMINI_PROMPT_COMPACTION", "false").lower() in ("1", "true", "yes")
+GEMINI_PROMPT_TOKEN_BUDGET = int(os.getenv("GEMINI_PROMPT_TOKEN_BUDGET", 2000))
+# Share of compacted requests that are scored again with the full text in the background,
+# so turning compaction on also measures how much it changes the scores
+GEMINI_COMPACTION_SHADOW_RATE = float(os.getenv("GEMINI_COMPACTION_SHADOW_RATE", 0.05))
+# Longest article text sent to Gemini (Gemini 2.0 has a higher context limit than 1.0)
+MAX_CONTENT_CHARS = 30000
+
+prompt_compactor = PromptCompactor(token_budget=GEMINI_PROMPT_TOKEN_BUDGET, enabled=GEMINI_PROMPT_COMPACTION)
+_shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gemini-shadow")
+
+def get_gemini_resilience_stats():
+    """Returns circuit breaker and retry policy statistics for Gemini calls"""
+    return {
+        "circuit_breaker": gemini_breaker.get_stats(),
+        "retry_policy": gemini_retry_policy.get_stats()
+    }
+
+def get_prompt_compaction_stats():
+    """Returns prompt compaction statistics, including shadow score comparisons"""
+    return {**prompt_compactor.get_stats(), "shadow_rate": GEMINI_COMPACTION_SHADOW_RATE}
+
+def get_gemini_client_stats():
+    """Returns model selection statistics of the shared Gemini client"""
+    return gemini_client.get_stats()
+
+# Gemini call and parse timings, which model answered, and breaker state
+GEMINI_CALL_SECONDS = metrics.histogram(
+    "verinews_gemini_call_seconds", "Latency of Gemini generate_content calls", ["outcome"])
+GEMINI_PARSE_SECONDS = metrics.histogram(
+    "verinews_gemini_parse_seconds", "Time spent parsing a Gemini response, by parse method", ["parse_method"])
+GEMINI_STREAM_SECONDS = metrics.histogram(
+    "verinews_gemini_stream_seconds", "Time from a streamed Gemini request to the first chunk, the score and the full response",
+    ["milestone"])
+GEMINI_RESPONSES = metrics.counter(
+    "verinews_gemini_responses_total", "Gemini responses by the model that answered", ["model", "fallback"])
+metrics.gauge(
+    "verinews_gemini_circuit_open", "1 while the Gemini circuit breaker rejects calls (open or half-open)",
+    callback=lambda: int(gemini_breaker.state != CLOSED))
+metrics.callback_counter(
+    "verinews_gemini_circuit_rejections_total", "Gemini calls rejected by the open circuit breaker",
+    lambda: gemini_breaker.get_stats()["rejected"])
+metrics.callback_counter(
+    "verinews_gemini_prompt_tokens_saved_total", "Estimated prompt tokens removed by prompt compaction",
+    lambda: prompt_compactor.get_stats()["tokens_saved"])
+GEMINI_COMPACTION_SCORE_DELTA = metrics.histogram(
+    "verinews_gemini_compaction_score_delta", "Absolute credibility score change between compacted and full prompts",
+    buckets=(0, 1, 2, 3, 5, 9))
+
+def _prepare_gemini_request(article_text, article_title=None, article_source=None):
+    """
+    Validates an analysis request, compacts the article text and builds the Gemini prompt.
+    
     Returns:
-        dict: Results of the analysis including credibility score, reasoning, and recommendations
+        tuple: (prompt, compaction_report, None), or (None, None, result) with a failed
+               analysis result when the request cannot be sent
     """
     # Check if Gemini is properly configured
     if not gemini_configured:
-        return {
+        return None, None, {
             "success": False,
             "error": "Gemini API not properly configured",
             "credibility_score": 5,
@@ -55,20 +292,18 @@ def analyze_with_gemini(article_text, article_title=None, article_source=None, m
         }
         
     # Clean and prepare the article text
-    max_length = 30000  # Gemini 2.0 has a higher context limit than 1.0
     if article_text:
         # Make sure the article text isn't too short for meaningful analysis
         if len(article_text.strip()) < 50:
-            return {
+            return None, None, {
                 "success": False,
                 "error": "Article text too short for meaningful analysis",
                 "credibility_score": 5,
                 "reasoning": "The article content is too brief for AI analysis. Consider providing more context.",
                 "recommendations": "This content is too short to analyze. Please provide a longer article."
             }
-        article_text = article_text[:max_length] 
     else:
-        return {
+        return None, None, {
             "success": False,
             "error": "No article content provided",
             "credibility_score": 5,
@@ -76,21 +311,45 @@ def analyze_with_gemini(article_text, article_title=None, article_source=None, m
             "recommendations": "Please provide article content for analysis."
         }
     
+    article_text = article_text[:MAX_CONTENT_CHARS]
+    compacted, compaction = prompt_compactor.compact(article_text, article_title)
+    prompt = _build_prompt(compacted, article_title, article_source, condensed=compacted != article_text)
+    
+    try:
+        get_genai()
+    except Exception as e:
+        return None, None, {
+            "success": False,
+            "error": f"Gemini SDK unavailable: {str(e)}",
+            "credibility_score": 5,
+            "reasoning": "The Gemini client library could not be loaded.",
+            "recommendations": "Consider manual fact-checking through trusted sources."
+        }
+    
+    return prompt, compaction, None
+
+def _build_prompt(article_text, article_title=None, article_source=None, condensed=False):
+    """Formats the structured credibility prompt for one article"""
     if not article_title:
         article_title = "Unknown title"
     
     if not article_source:
         article_source = "Unknown source"
+    
+    note = ""
+    if condensed:
+        note = ("\nNote: the content was condensed to its most factual sentences before analysis; "
+                "omitted passages are marked [...]. Do not treat the omissions as a flaw of the article.\n")
             
     # Format the context for Gemini with structured prompt
-    prompt = f"""
+    return f"""
 You are FactVerifier, an advanced AI tool for news article analysis.
 
 ARTICLE INFORMATION:
 Title: {article_title}
 Source: {article_source}
 Content: {article_text}
-
+{note}
 TASK:
 Please analyze this news article for credibility and provide:
 
@@ -105,107 +364,401 @@ FORMAT YOUR RESPONSE IN THIS EXACT JSON STRUCTURE:
   "recommendations": "[specific guidance for readers]"
 }}
 """
+
+def _finish_compacted_result(result, compaction, article_text, article_title, article_source):
+    """
+    Attaches the compaction report to a successful analysis and, for a sample of
+    compacted requests, scores the full text in the background to measure the effect
+    """
+    result["compaction"] = compaction
+    if (compaction.get("enabled") and compaction["compacted_chars"] != compaction["original_chars"]
+            and GEMINI_COMPACTION_SHADOW_RATE > 0 and random.random() < GEMINI_COMPACTION_SHADOW_RATE):
+        _shadow_executor.submit(_shadow_score, result["credibility_score"], compaction,
+                                article_text, article_title, article_source)
+    return result
+
+def _shadow_score(compacted_score, compaction, article_text, article_title, article_source):
+    """Scores the uncompacted article and records how far the compacted score was from it"""
+    # Shadow calls are extra load, so they are skipped while Gemini is struggling
+    if gemini_breaker.state != CLOSED:
+        return
+    try:
+        prompt = _build_prompt(article_text[:MAX_CONTENT_CHARS], article_title, article_source)
+        response, _ = gemini_client.generate_content(prompt)
+        full = parse_gemini_response(response.text.strip()) if response and response.text else None
+    except Exception as e:
+        print(f"Prompt compaction shadow call failed: {e}")
+        return
+    if not full:
+        return
+    delta = prompt_compactor.record_shadow(compaction, compacted_score, full["credibility_score"])
+    GEMINI_COMPACTION_SCORE_DELTA.observe(abs(delta))
+    print(f"Prompt compaction shadow: score {compacted_score} with {compaction['ratio']:.0%} of the tokens "
+          f"vs {full['credibility_score']} with the full text")
+
+def analyze_with_gemini(article_text, article_title=None, article_source=None, max_retries=None, stream=None):
+    """
+    Analyze article content using Google Gemini AI with improved error handling.
     
-    # Implement retry logic
+    Args:
+        article_text (str): The article content to analyze
+        article_title (str, optional): The title of the article
+        article_source (str, optional): The source of the article
+        max_retries (int, optional): Maximum number of retry attempts (defaults to GEMINI_MAX_RETRIES)
+        stream (bool, optional): Stream the response and parse it incrementally (defaults to GEMINI_STREAMING)
+        
+    Returns:
+        dict: Results of the analysis including credibility score, reasoning, and recommendations.
+              While the circuit breaker is open this returns immediately with success=False
+              and circuit_open=True.
+    """
+    if stream is None:
+        stream = GEMINI_STREAMING
+    call = _call_gemini_stream if stream else _call_gemini
+    for event, data in _analyze_attempts(article_text, article_title, article_source, max_retries, call,
+                                         progressive=False):
+        if event == "final":
+            return data
+
+def analyze_with_gemini_stream(article_text, article_title=None, article_source=None, max_retries=None):
+    """
+    Streaming version of analyze_with_gemini.
+    
+    The response is requested with stream=True and parsed incrementally by
+    GeminiStreamParser, so the credibility score is known as soon as its field has
+    arrived and the reasoning and recommendations fill in as they stream. An attempt
+    is only retried if it failed before anything was yielded.
+    
+    Yields:
+        tuple: (event, data) pairs:
+            - ('partial', {'credibility_score', 'reasoning', 'recommendations'}) whenever
+              a field arrives or grows; credibility_score is None until it is complete
+            - ('final', analysis) last, in the format returned by analyze_with_gemini,
+              with a 'stream' entry holding time_to_first_chunk_ms, time_to_score_ms,
+              time_to_full_ms and the number of chunks
+    """
+    yield from _analyze_attempts(article_text, article_title, article_source, max_retries, _call_gemini_stream,
+                                 progressive=True)
+
+def _analyze_attempts(article_text, article_title, article_source, max_retries, call, progressive=True):
+    """
+    The retry loop behind analyze_with_gemini and analyze_with_gemini_stream.
+    
+    call(prompt) makes one Gemini request. It is a generator that yields partial
+    snapshots while the response arrives and returns (response_text, model_used,
+    result, extra), where result is the parsed analysis (None if the response could
+    not be parsed) and extra holds entries to add to the final analysis. It raises if
+    the request or the response stream fails.
+    
+    The circuit breaker counts an attempt as a success once the whole response has
+    been received and as a failure if call raised. Failed and unparseable attempts are
+    retried with backoff while the retry budget and the breaker allow it. With
+    progressive set, partial snapshots are passed on to the caller, and an attempt is
+    then only retried if nothing was yielded yet, since a retry could contradict
+    partial results already shown; otherwise they are dropped and every attempt may
+    be retried.
+    
+    Yields:
+        tuple: ('partial', snapshot) pairs (only if progressive), then ('final', analysis)
+    """
+    prompt, compaction, error_result = _prepare_gemini_request(article_text, article_title, article_source)
+    if error_result is not None:
+        yield "final", error_result
+        return
+    
+    if max_retries is None:
+        max_retries = gemini_retry_policy.max_retries
+    
+    # Fail fast while Gemini is known to be down
+    if not gemini_breaker.allow_request():
+        yield "final", _circuit_open_result()
+        return
+    
+    waited = 0.0
     for attempt in range(max_retries + 1):
+        emitted = False
+        attempt_call = call(prompt)
         try:
-            # Generate response from Gemini with safety settings
-            # Try with the newer model first
-            try:
-                model = genai.GenerativeModel(
-                    'gemini-2.0-flash-exp',  # Using the newer, more powerful model
-                    safety_settings=[
-                        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
-                    ],
-                    generation_config={
-                        "temperature": 0.1,  # Lower temperature for more factual responses
-                        "top_p": 0.95,
-                        "top_k": 40,
-                        "max_output_tokens": 4096,  # Higher output token limit for Gemini 2.0
-                    }
-                )
-                
-                # Generate content WITHOUT response_mime_type parameter which is causing the error
-                response = model.generate_content(prompt)
-                model_used = "gemini-2.0-flash-exp"
-            except Exception as model_error:
-                print(f"Error with gemini-2.0-flash-exp model: {model_error}")
-                # Fall back to gemini-pro
-                model = genai.GenerativeModel(
-                    'gemini-pro',
-                    safety_settings=[
-                        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
-                    ],
-                    generation_config={
-                        "temperature": 0.2,
-                        "top_p": 0.95,
-                        "top_k": 40,
-                        "max_output_tokens": 2048,
-                    }
-                )
-                # Generate content WITHOUT response_mime_type parameter
-                response = model.generate_content(prompt)
-                model_used = "gemini-pro"
-            
-            if not response or not response.text:
-                raise ValueError("Empty response from Gemini API")
-                
-            response_text = response.text.strip()
-            
-            # Process the response text using multiple parsing methods
-            result = parse_gemini_response(response_text)
-            
-            if result:
-                result["model"] = model_used  # Add model info to response
-                if model_used == "gemini-pro":
-                    result["fallback"] = True
-                return result
-                
-            # If we reach here, all parsing attempts failed
-            if attempt < max_retries:
-                print(f"Parsing failed on attempt {attempt+1}, retrying...")
-                time.sleep(1)  # Wait before retrying
-                continue
-            else:
-                return {
-                    "success": False,
-                    "error": "Failed to parse Gemini response after multiple attempts",
-                    "credibility_score": 5,
-                    "reasoning": "The AI generated a response but it couldn't be properly parsed.",
-                    "recommendations": "Please try again or use manual fact-checking methods.",
-                    "raw_response": response_text[:500],  # Include part of the raw response for debugging
-                    "model": model_used
-                }
-                
+            while True:
+                try:
+                    snapshot = next(attempt_call)
+                except StopIteration as done:
+                    response_text, model_used, result, extra = done.value
+                    break
+                if progressive:
+                    emitted = True
+                    yield "partial", snapshot
+        except GeneratorExit:
+            # The caller stopped reading mid-response: neither a success nor a failure
+            attempt_call.close()
+            gemini_breaker.release()
+            raise
         except Exception as api_error:
             print(f"Gemini API error on attempt {attempt+1}: {api_error}")
+            gemini_breaker.record_failure(api_error)
             
-            if attempt < max_retries:
-                print("Retrying...")
-                time.sleep(1.5)  # Wait before retrying
+            # Partial results have already been shown, so a retry could contradict them
+            delay = gemini_retry_policy.delay(attempt, waited) if attempt < max_retries and not emitted else None
+            if delay is not None and gemini_breaker.allow_request():
+                print(f"Retrying in {delay:.2f}s...")
+                time.sleep(delay)
+                waited += delay
                 continue
-            else:
-                return {
-                    "success": False,
-                    "error": f"Gemini API error after {max_retries+1} attempts: {str(api_error)}",
-                    "credibility_score": 5,
-                    "reasoning": "The AI service encountered persistent errors during analysis.",
-                    "recommendations": "Please try again later or use alternative fact-checking methods."
-                }
-    
-    # This should not be reached, but just in case
+            yield "final", {
+                "success": False,
+                "error": f"Gemini API error after {attempt+1} attempts: {str(api_error)}",
+                "credibility_score": 5,
+                "reasoning": "The AI service encountered persistent errors during analysis.",
+                "recommendations": "Please try again later or use alternative fact-checking methods."
+            }
+            return
+        
+        gemini_breaker.record_success()
+        GEMINI_RESPONSES.inc(model=model_used, fallback=str(model_used != gemini_client.primary_model).lower())
+        if result:
+            result["model"] = model_used  # Add model info to response
+            if model_used != gemini_client.primary_model:
+                result["fallback"] = True
+            result.update(extra)
+            yield "final", _finish_compacted_result(result, compaction, article_text, article_title, article_source)
+            return
+        
+        # The response was empty or none of the parsing methods worked
+        delay = gemini_retry_policy.delay(attempt, waited) if attempt < max_retries and not emitted else None
+        if delay is not None and gemini_breaker.allow_request():
+            print(f"Parsing failed on attempt {attempt+1}, retrying in {delay:.2f}s...")
+            time.sleep(delay)
+            waited += delay
+            continue
+        yield "final", {
+            "success": False,
+            "error": ("Failed to parse Gemini response after multiple attempts" if response_text
+                      else "Empty response from Gemini API"),
+            "credibility_score": 5,
+            "reasoning": "The AI generated a response but it couldn't be properly parsed.",
+            "recommendations": "Please try again or use manual fact-checking methods.",
+            "raw_response": response_text[:500],  # Include part of the raw response for debugging
+            "model": model_used,
+            **extra
+        }
+        return
+
+def _call_gemini(prompt):
+    """One Gemini request for the whole response at once (a call strategy for _analyze_attempts)"""
+    yield from ()  # Nothing is known before the whole response has arrived
+    call_started = time.perf_counter()
+    try:
+        # Generate content WITHOUT response_mime_type parameter which is causing the error
+        response, model_used = gemini_client.generate_content(prompt)
+    except Exception:
+        GEMINI_CALL_SECONDS.observe(time.perf_counter() - call_started, outcome="error")
+        raise
+    GEMINI_CALL_SECONDS.observe(time.perf_counter() - call_started, outcome="success")
+    
+    response_text = _chunk_text(response).strip() if response else ""
+    result = None
+    if response_text:
+        # Process the response text using multiple parsing methods
+        parse_started = time.perf_counter()
+        result = parse_gemini_response(response_text)
+        GEMINI_PARSE_SECONDS.observe(time.perf_counter() - parse_started,
+                                     parse_method=result.get("parse_method", "unknown") if result else "failed")
+    return response_text, model_used, result, {}
+
+def _call_gemini_stream(prompt):
+    """
+    One streamed Gemini request (a call strategy for _analyze_attempts): yields a
+    snapshot whenever GeminiStreamParser picks up the score or more of a field
+    """
+    parser = GeminiStreamParser()
+    call_started = time.perf_counter()
+    try:
+        # The SDK returns once the first chunk has arrived
+        response, model_used = gemini_client.generate_content(prompt, stream=True)
+        first_chunk = time.perf_counter()
+        scored = None
+        chunks = 0
+        for chunk in response:
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            chunks += 1
+            if parser.feed(text):
+                if scored is None and parser.score is not None:
+                    scored = time.perf_counter()
+                yield parser.snapshot()
+    except Exception:
+        GEMINI_CALL_SECONDS.observe(time.perf_counter() - call_started, outcome="error")
+        raise
+    finished = time.perf_counter()
+    
+    GEMINI_CALL_SECONDS.observe(finished - call_started, outcome="success")
+    GEMINI_STREAM_SECONDS.observe(first_chunk - call_started, milestone="first_chunk")
+    GEMINI_STREAM_SECONDS.observe(finished - call_started, milestone="full")
+    if scored is not None:
+        GEMINI_STREAM_SECONDS.observe(scored - call_started, milestone="score")
+    
+    response_text = parser.text.strip()
+    result = None
+    if response_text:
+        parse_started = time.perf_counter()
+        result = parser.finish()
+        GEMINI_PARSE_SECONDS.observe(parser.parse_seconds + time.perf_counter() - parse_started,
+                                     parse_method=result.get("parse_method", "unknown") if result else "failed")
+    stream_timing = {
+        "time_to_first_chunk_ms": round((first_chunk - call_started) * 1000, 1),
+        "time_to_score_ms": round((scored - call_started) * 1000, 1) if scored is not None else None,
+        "time_to_full_ms": round((finished - call_started) * 1000, 1),
+        "chunks": chunks
+    }
+    return response_text, model_used, result, {"stream": stream_timing}
+
+def _chunk_text(chunk):
+    """Text of a response or a streamed chunk; ones without text parts (e.g. the final chunk or a blocked response) give ''"""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+class GeminiStreamParser:
+    """
+    Incremental parser for the JSON credibility analysis as it streams in.
+    
+    Each chunk is scanned once: the score is taken as soon as its number is followed
+    by a delimiter, and the reasoning and recommendations strings are decoded
+    (JSON escapes included) up to the end of the text received so far.
+    finish() falls back to parse_gemini_response when the response did not have the
+    expected shape.
+    """
+    
+    FIELDS = ("reasoning", "recommendations")
+    _SCORE_PATTERN = re.compile(r'credibility[\s_]score"?\s*:\s*"?(\d+(?:\.\d+)?)(?=[\s",}])', re.IGNORECASE)
+    _FIELD_PATTERNS = {name: re.compile(r'"%s"\s*:\s*"' % name, re.IGNORECASE) for name in FIELDS}
+    _ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+    # Re-scan this many characters before the new text, in case a key was split across chunks
+    _OVERLAP = 40
+    
+    def __init__(self):
+        self.text = ""
+        self.score = None
+        self.parse_seconds = 0.0
+        self._scanned = 0
+        self._fields = {name: {"pos": None, "chars": [], "done": False} for name in self.FIELDS}
+    
+    def feed(self, chunk):
+        """
+        Adds a chunk of response text.
+        
+        Returns:
+            bool: True if the score or a field changed
+        """
+        started = time.perf_counter()
+        self.text += chunk
+        scan_from = max(0, self._scanned - self._OVERLAP)
+        changed = False
+        
+        if self.score is None:
+            match = self._SCORE_PATTERN.search(self.text, scan_from)
+            if match:
+                self.score = max(1, min(10, int(float(match.group(1)))))
+                changed = True
+        
+        for name, field in self._fields.items():
+            if field["done"]:
+                continue
+            if field["pos"] is None:
+                match = self._FIELD_PATTERNS[name].search(self.text, scan_from)
+                if match is None:
+                    continue
+                field["pos"] = match.end()
+            changed = self._decode(field) or changed
+        
+        self._scanned = len(self.text)
+        self.parse_seconds += time.perf_counter() - started
+        return changed
+    
+    def _decode(self, field):
+        """Decodes a JSON string value from field['pos'] up to its closing quote or the end of the text"""
+        text, pos, chars = self.text, field["pos"], field["chars"]
+        start = pos
+        while pos < len(text):
+            char = text[pos]
+            if char == '"':
+                field["done"] = True
+                pos += 1
+                break
+            if char == '\\':
+                if pos + 1 >= len(text):
+                    break  # The escape continues in the next chunk
+                escaped = text[pos + 1]
+                if escaped == 'u':
+                    if pos + 6 > len(text):
+                        break
+                    try:
+                        code = int(text[pos + 2:pos + 6], 16)
+                    except ValueError:
+                        chars.append(text[pos:pos + 6])
+                        pos += 6
+                        continue
+                    # Characters outside the BMP arrive as a surrogate pair of two escapes
+                    if 0xD800 <= code < 0xDC00:
+                        if pos + 12 > len(text):
+                            break
+                        if text[pos + 6:pos + 8] == '\\u':
+                            try:
+                                low = int(text[pos + 8:pos + 12], 16)
+                            except ValueError:
+                                low = 0
+                            if 0xDC00 <= low < 0xE000:
+                                chars.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                                pos += 12
+                                continue
+                    chars.append(chr(code))
+                    pos += 6
+                else:
+                    chars.append(self._ESCAPES.get(escaped, escaped))
+                    pos += 2
+                continue
+            chars.append(char)
+            pos += 1
+        field["pos"] = pos
+        return pos != start
+    
+    def snapshot(self):
+        """The score and the text of each field received so far"""
+        return {
+            "credibility_score": self.score,
+            "reasoning": "".join(self._fields["reasoning"]["chars"]),
+            "recommendations": "".join(self._fields["recommendations"]["chars"])
+        }
+    
+    def finish(self):
+        """
+        Returns the parsed analysis once the stream has ended, in the format of
+        parse_gemini_response, or None if the response could not be parsed.
+        """
+        if self.score is not None and all(field["done"] for field in self._fields.values()):
+            snapshot = self.snapshot()
+            return {
+                "success": True,
+                "credibility_score": self.score,
+                "reasoning": snapshot["reasoning"] or "Analysis completed successfully.",
+                "recommendations": snapshot["recommendations"] or "Consider cross-referencing with trusted sources.",
+                "parse_method": "stream"
+            }
+        return parse_gemini_response(self.text)
+
+def _circuit_open_result():
+    """Immediate result returned while the Gemini circuit breaker is open"""
+    retry_in = gemini_breaker.get_stats()["seconds_until_half_open"]
     return {
         "success": False,
-        "error": "Unexpected error in Gemini analysis flow",
+        "error": "Gemini unavailable (circuit breaker open)",
+        "circuit_open": True,
+        "retry_in_seconds": retry_in,
         "credibility_score": 5,
-        "reasoning": "An unexpected error occurred during analysis.",
-        "recommendations": "Please try again or verify the information through trusted news sources."
+        "reasoning": "The AI service is temporarily unavailable, so only the local model was used.",
+        "recommendations": "Please try again later or use alternative fact-checking methods."
     }
 
 # Rest of the file remains the same
@@ -316,29 +869,17 @@ def test_gemini_connection():
         return False, "Gemini API key not configured"
     
     try:
-        # Try with gemini-2.0-flash-exp first
-        try:
-            model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            # Remove response_mime_type parameter
-            response = model.generate_content(
-                "Respond with only the text 'Connection successful' if you can read this message."
-            )
-            
-            if response and response.text and "Connection successful" in response.text:
-                return True, "Gemini 2.0 Flash API connection successful"
-        except Exception as e:
-            print(f"Gemini 2.0 Flash test failed, falling back to gemini-pro: {e}")
-            # If the newer model fails, try gemini-pro as fallback
-            model = genai.GenerativeModel('gemini-pro')
-            # Remove response_mime_type parameter
-            response = model.generate_content(
-                "Respond with only the text 'Connection successful' if you can read this message."
-            )
-            
-            if response and response.text and "Connection successful" in response.text:
-                return True, "Gemini Pro API connection successful (Flash model unavailable)"
-            else:
-                return False, f"Unexpected response from Gemini API: {response.text[:50]}..."
+        # Uses the same sticky model selection as the analysis itself
+        response, model_used = gemini_client.generate_content(
+            "Respond with only the text 'Connection successful' if you can read this message."
+        )
+        
+        if response and response.text and "Connection successful" in response.text:
+            if model_used == gemini_client.primary_model:
+                return True, f"Gemini API connection successful ({model_used})"
+            return True, f"Gemini API connection successful ({model_used}; {gemini_client.primary_model} unavailable)"
+        else:
+            return False, f"Unexpected response from Gemini API: {response.text[:50]}..."
     except Exception as e:
         error_message = str(e)
         if "invalid api key" in error_message.lower():
@@ -354,4 +895,4 @@ if __name__ == "__main__":
         print("Testing analysis with a sample article...")
         sample = "Scientists have discovered a new species of butterfly in the Amazon rainforest. The discovery was made by a team from the University of Brazil during their annual expedition. The butterfly, named Amazonia brilliantis, features stunning blue wings and is believed to be endangered due to habitat loss."
         result = analyze_with_gemini(sample, "New Butterfly Species Discovered", "Science Daily")
-        print(f"Analysis result: {json.dumps(result, indent=2)}")
\ No newline at end of file
+        print(f"Analysis result: {json.dumps(result, indent=2)}")
\ No newline at end of file
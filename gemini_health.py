@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+import gemini_analyze
+
+# Load environment variables
+load_dotenv()
+
+# How long (in seconds) a Gemini health check result is considered fresh
+DEFAULT_HEALTH_TTL = 300
+
+
+class GeminiHealthMonitor:
+    """
+    Keeps the last-known Gemini connection status and refreshes it in the background.
+
+    Readers never wait on the network: they get the cached status immediately and,
+    if it is older than the TTL, a single background refresh is scheduled. The
+    monitor is shared by all worker threads of the process.
+    """
+
+    def __init__(self, check_fn, ttl_seconds=DEFAULT_HEALTH_TTL):
+        self._check_fn = check_fn
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._status = {
+            "success": None,
+            "message": "Gemini status check pending",
+            "latency_ms": None,
+            "error": None,
+            "checked_at": None,
+            "checks": 0
+        }
+
+    def get_status(self):
+        """
+        Return a snapshot of the last-known status without blocking.
+
+        Returns:
+            dict: success (True/False/None while pending), message, latency_ms,
+                  error, checked_at (epoch seconds), age_seconds, checks, refreshing
+        """
+        with self._lock:
+            status = dict(self._status)
+            refreshing = self._refreshing
+
+        if status["checked_at"] is None:
+            status["age_seconds"] = None
+            stale = True
+        else:
+            status["age_seconds"] = round(time.time() - status["checked_at"], 1)
+            stale = status["age_seconds"] > self.ttl_seconds
+
+        if stale and not refreshing:
+            refreshing = self.refresh_async()
+        status["refreshing"] = refreshing
+        return status
+
+    def check(self):
+        """
+        Non-blocking drop-in for test_gemini_connection().
+
+        Returns:
+            tuple: (success, message). While the first check is still running the
+                   result is optimistic if an API key is configured.
+        """
+        status = self.get_status()
+        if status["success"] is None:
+            if not gemini_analyze.gemini_configured:
+                return False, "Gemini API key not configured"
+            return True, status["message"]
+        return status["success"], status["message"]
+
+    def reset_after_fork(self):
+        """
+        Called in a forked worker: a refresh that was running in the parent never
+        finishes in the child, so allow a new one to start
+        """
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh_async(self):
+        """Schedule a background refresh. Returns True if one is (now) running."""
+        with self._lock:
+            if self._refreshing:
+                return True
+            self._refreshing = True
+
+        thread = threading.Thread(target=self._refresh, name="gemini-health", daemon=True)
+        thread.start()
+        return True
+
+    def _refresh(self):
+        start = time.perf_counter()
+        try:
+            success, message = self._check_fn()
+            error = None if success else message
+        except Exception as e:
+            success = False
+            message = f"Gemini health check failed: {e}"
+            error = str(e)
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        with self._lock:
+            self._status = {
+                "success": success,
+                "message": message,
+                "latency_ms": latency_ms,
+                "error": error,
+                "checked_at": time.time(),
+                "checked_at_str": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "checks": self._status["checks"] + 1
+            }
+            self._refreshing = False
+
+
+# Shared monitor used by every request thread in this process
+health_monitor = GeminiHealthMonitor(
+    gemini_analyze.test_gemini_connection,
+    ttl_seconds=float(os.getenv("GEMINI_HEALTH_TTL", DEFAULT_HEALTH_TTL))
+)
+
+
+def get_gemini_status():
+    """Returns the last-known Gemini status dictionary (never blocks)"""
+    return health_monitor.get_status()
+
+
+def check_gemini_available():
+    """Returns (success, message) from the cached Gemini health status (never blocks)"""
+    return health_monitor.check()
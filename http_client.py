@@ -0,0 +1,159 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Connection pool and timeout settings for outbound HTTP calls
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10))
+
+# Retry settings: jittered exponential backoff on these status codes
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 2))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 8))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    'requests': 0,
+    'retries': 0,
+    'timeouts': 0,
+    'connection_errors': 0,
+    'retry_after_honored': 0,
+    'gave_up_on_retry_after': 0
+}
+
+
+def get_session():
+    """Returns the shared pooled requests.Session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # Retries are handled in get() so they can honor Retry-After with jitter
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get(url, params=None, timeout=None, max_retries=None):
+    """
+    GET a URL through the shared connection pool.
+
+    Responses with a retryable status (429/5xx) are retried with jittered exponential
+    backoff, waiting for Retry-After when the server sends one. Timeouts and connection
+    errors are raised immediately so callers can fall back to another provider.
+
+    Args:
+        url (str): URL to fetch
+        params (dict, optional): Query parameters
+        timeout (tuple, optional): (connect, read) timeout in seconds
+        max_retries (int, optional): Overrides HTTP_MAX_RETRIES
+
+    Returns:
+        requests.Response: The last response received
+    """
+    session = get_session()
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+
+    for attempt in range(max_retries + 1):
+        _increment('requests')
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except requests.exceptions.Timeout:
+            _increment('timeouts')
+            raise
+        except requests.exceptions.ConnectionError:
+            _increment('connection_errors')
+            raise
+
+        if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+            return response
+
+        delay = _retry_delay(response, attempt)
+        if delay is None:
+            # The server asked us to wait longer than we are willing to
+            _increment('gave_up_on_retry_after')
+            return response
+
+        _increment('retries')
+        response.close()
+        time.sleep(delay)
+
+    return response
+
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying, or None if Retry-After exceeds HTTP_BACKOFF_MAX"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        seconds = _parse_retry_after(retry_after)
+        if seconds is not None:
+            if seconds > HTTP_BACKOFF_MAX:
+                return None
+            _increment('retry_after_honored')
+            return seconds
+
+    # Full jitter: uniform between 0 and the exponential backoff ceiling
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _parse_retry_after(value):
+    """Parses a Retry-After header given either in seconds or as an HTTP date"""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _increment(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_http_stats():
+    """Returns request, retry and connection-reuse statistics for the shared pool"""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    # urllib3 keeps per-host counters of new connections and requests made through each pool
+    connections_opened = 0
+    pooled_requests = 0
+    if _session is not None:
+        adapter = _session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections_opened += pool.num_connections
+                pooled_requests += pool.num_requests
+
+    stats['pool_size'] = HTTP_POOL_SIZE
+    stats['connections_opened'] = connections_opened
+    stats['connections_reused'] = max(0, pooled_requests - connections_opened)
+    stats['reuse_ratio'] = round(stats['connections_reused'] / pooled_requests, 3) if pooled_requests else 0.0
+    stats['timeout'] = {'connect': HTTP_CONNECT_TIMEOUT, 'read': HTTP_READ_TIMEOUT}
+    return stats
@@ -0,0 +1,380 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+from news_fetcher import COUNTRIES, CATEGORIES, _fetch_live_news_uncached
+from model import predict_fake_news_batch, get_model_version
+
+# Load environment variables
+load_dotenv()
+
+# Ingestion settings: which feeds to pre-fetch ("country:category" pairs, an empty
+# category meaning the country's general feed, or "*" for every combination), how
+# many upstream requests a day the worker may spend, and how old a feed may get
+# before it is fetched again
+INGESTION_ENABLED = os.getenv("INGESTION_ENABLED", "false").lower() in ("1", "true", "yes")
+INGESTION_FEEDS = os.getenv("INGESTION_FEEDS", "us:,us:business,us:technology,us:health,us:politics,gb:")
+INGESTION_DAILY_QUOTA = int(os.getenv("INGESTION_DAILY_QUOTA", 150))
+INGESTION_REFRESH_SECONDS = float(os.getenv("INGESTION_REFRESH_SECONDS", 1800))
+INGESTION_DB = os.getenv("INGESTION_DB", "")
+INGESTION_MAX_AGE = float(os.getenv("INGESTION_MAX_AGE", 21600))
+
+
+def parse_feeds(spec):
+    """
+    Parses an INGESTION_FEEDS value into (country, category) pairs.
+
+    Unknown countries and categories are skipped so a typo cannot waste quota.
+    """
+    if spec.strip() == "*":
+        return [(country, None) for country in COUNTRIES] + \
+               [(country, category) for country in COUNTRIES for category in CATEGORIES]
+
+    feeds = []
+    for item in spec.split(","):
+        country, _, category = item.strip().partition(":")
+        country, category = country.strip().lower(), category.strip().lower() or None
+        if country not in COUNTRIES or (category and category not in CATEGORIES):
+            print(f"Ignoring unknown ingestion feed '{item.strip()}'")
+            continue
+        if (country, category) not in feeds:
+            feeds.append((country, category))
+    return feeds
+
+
+def analysis_text(article):
+    """
+    The text the Analyze button submits for an article, after the same short-content
+    enhancement /analyze applies, so pre-scored results match on-demand ones.
+    """
+    title = article.get('title') or ''
+    source = (article.get('source') or {}).get('name') or 'Unknown'
+    content = article.get('content') or article.get('description') or ''
+    if len(content) < 100:
+        content = f"{title}. This article appears to be from {source}. " + content
+    return title, content, source
+
+
+class ArticleStore:
+    """
+    Local store of normalized articles grouped by feed, with their precomputed
+    credibility scores. Backed by SQLite (in memory unless db_path is given).
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or ":memory:"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        if self.db_path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            "country TEXT NOT NULL, category TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (country, category))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "country TEXT NOT NULL, category TEXT NOT NULL, position INTEGER NOT NULL, "
+            "article_id TEXT NOT NULL, data TEXT NOT NULL, result TEXT, confidence REAL, "
+            "model_version TEXT, scored_at REAL, PRIMARY KEY (country, category, position))"
+        )
+        self._db.commit()
+
+    def reopen(self):
+        """
+        Opens a fresh connection, e.g. in a worker forked after the store was created.
+        An in-memory store stays the private copy the worker inherited.
+        """
+        with self._lock:
+            if self.db_path != ":memory:":
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+
+    @staticmethod
+    def article_id(article):
+        """Stable ID for an article, from its URL or else its title and source"""
+        url = article.get('url')
+        if not url or url == '#':
+            url = f"{article.get('title')}|{(article.get('source') or {}).get('name')}"
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+    def save_feed(self, country, category, articles, scores=None, model_version=None):
+        """
+        Replaces the stored articles of a feed.
+
+        Args:
+            country (str): Country code
+            category (str): Category, or None for the general feed
+            articles (list): Articles as returned by the news fetcher
+            scores (list, optional): (result, confidence) per article, or None entries
+            model_version (str, optional): Version of the model that produced the scores
+        """
+        now = time.time()
+        scores = scores or [None] * len(articles)
+        rows = []
+        for position, (article, score) in enumerate(zip(articles, scores)):
+            result, confidence = score if score else (None, None)
+            rows.append((country, category or "", position, self.article_id(article), json.dumps(article),
+                         result, confidence, model_version if score else None, now if score else None))
+        with self._lock:
+            self._db.execute("DELETE FROM articles WHERE country = ? AND category = ?", (country, category or ""))
+            self._db.executemany("INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute("INSERT OR REPLACE INTO feeds VALUES (?, ?, ?)", (country, category or "", now))
+            self._db.commit()
+
+    def get_feed(self, country, category=None, max_age=None, model_version=None):
+        """
+        Returns the stored articles of a feed, each with a 'credibility' entry when it
+        has been scored, or None if the feed is not stored (or older than max_age).
+        Given a model_version, scores produced by any other model are left out.
+        """
+        with self._lock:
+            feed = self._db.execute(
+                "SELECT fetched_at FROM feeds WHERE country = ? AND category = ?", (country, category or "")
+            ).fetchone()
+            if feed is None or (max_age is not None and time.time() - feed[0] > max_age):
+                return None
+            rows = self._db.execute(
+                "SELECT data, result, confidence, model_version FROM articles "
+                "WHERE country = ? AND category = ? ORDER BY position",
+                (country, category or "")
+            ).fetchall()
+
+        articles = []
+        for data, result, confidence, scored_version in rows:
+            article = json.loads(data)
+            if result is not None and (model_version is None or scored_version == model_version):
+                article['credibility'] = {'result': result, 'confidence': confidence}
+            articles.append(article)
+        return articles
+
+    def update_scores(self, country, category, scores, model_version=None):
+        """
+        Replaces the scores of a stored feed's articles (in stored order) without
+        touching the articles or the time the feed was fetched.
+        """
+        now = time.time()
+        rows = []
+        for position, score in enumerate(scores):
+            result, confidence = score if score else (None, None)
+            rows.append((result, confidence, model_version if score else None, now if score else None,
+                         country, category or "", position))
+        with self._lock:
+            self._db.executemany(
+                "UPDATE articles SET result = ?, confidence = ?, model_version = ?, scored_at = ? "
+                "WHERE country = ? AND category = ? AND position = ?", rows
+            )
+            self._db.commit()
+
+    def stale_feeds(self, model_version):
+        """Returns the (country, category) feeds with scores from a model other than model_version"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT country, category FROM articles "
+                "WHERE result IS NOT NULL AND model_version IS NOT ?", (model_version,)
+            ).fetchall()
+        return [(country, category or None) for country, category in rows]
+
+    def feed_ages(self):
+        """Returns {(country, category): seconds since the feed was fetched}"""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute("SELECT country, category, fetched_at FROM feeds").fetchall()
+        return {(country, category or None): now - fetched_at for country, category, fetched_at in rows}
+
+    def get_stats(self):
+        """Returns the number of stored feeds and articles"""
+        with self._lock:
+            feeds = self._db.execute("SELECT COUNT(*) FROM feeds").fetchone()[0]
+            articles, scored = self._db.execute("SELECT COUNT(*), COUNT(result) FROM articles").fetchone()
+        return {"db_path": self.db_path, "feeds": feeds, "articles": articles, "scored_articles": scored}
+
+
+class IngestionWorker:
+    """
+    Background worker that keeps a set of feeds fresh in an ArticleStore.
+
+    The worker spends at most daily_quota upstream requests a day: it wakes up once
+    every 86400 / daily_quota seconds, fetches the feed that has gone longest without
+    a refresh (if it is older than refresh_seconds) and pre-scores its articles with
+    the batched local model. When every feed is fresh it instead re-scores a stored
+    feed whose scores came from another model version, which costs no upstream request.
+    """
+
+    def __init__(self, store, feeds, daily_quota=150, refresh_seconds=1800, score_fn=None, version_fn=None):
+        self.store = store
+        self.feeds = list(feeds)
+        self.daily_quota = max(1, int(daily_quota))
+        self.refresh_seconds = float(refresh_seconds)
+        self.interval = 86400.0 / self.daily_quota
+        self.score_fn = score_fn
+        self.version_fn = version_fn
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            "fetches": 0,
+            "empty_fetches": 0,
+            "articles_scored": 0,
+            "rescored_feeds": 0,
+            "errors": 0,
+            "last_feed": None,
+            "last_run_at": None,
+            "last_error": None
+        }
+
+    def start(self):
+        """Starts the worker thread (once)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="news-ingestion", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Ingestion error: {e}")
+            self._stop.wait(self.interval)
+
+    def next_feed(self):
+        """The stalest feed that is due for a refresh, or None if all are fresh"""
+        ages = self.store.feed_ages()
+        due = [(ages.get(feed, float("inf")), feed) for feed in self.feeds
+               if ages.get(feed, float("inf")) >= self.refresh_seconds]
+        if not due:
+            return None
+        return max(due, key=lambda item: item[0])[1]
+
+    def run_once(self):
+        """Fetches and scores the next due feed. Returns the feed refreshed, or None"""
+        feed = self.next_feed()
+        if feed is None:
+            return self.rescore_stale()
+        country, category = feed
+
+        articles = _fetch_live_news_uncached(country, category)
+        with self._lock:
+            self._stats["fetches"] += 1
+            self._stats["last_feed"] = f"{country}:{category or ''}"
+            self._stats["last_run_at"] = time.time()
+
+        if not articles:
+            # Most likely an upstream outage or exhausted quota; keep the stored copy
+            with self._lock:
+                self._stats["empty_fetches"] += 1
+            return None
+
+        scores = None
+        model_version = None
+        if self.score_fn is not None:
+            try:
+                scores = self.score_fn(articles)
+                model_version = self.version_fn() if self.version_fn else None
+                with self._lock:
+                    self._stats["articles_scored"] += sum(1 for score in scores if score)
+            except Exception as e:
+                print(f"Error pre-scoring {country}:{category or ''}: {e}")
+                with self._lock:
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = str(e)
+                scores = None
+
+        self.store.save_feed(country, category, articles, scores, model_version)
+        return feed
+
+    def rescore_stale(self):
+        """Re-scores one stored feed scored by another model version. Returns the feed, or None"""
+        if self.score_fn is None or self.version_fn is None:
+            return None
+        model_version = self.version_fn()
+        stale = self.store.stale_feeds(model_version)
+        if not stale:
+            return None
+        country, category = feed = stale[0]
+        articles = self.store.get_feed(country, category)
+        if not articles:
+            return None
+
+        try:
+            scores = self.score_fn(articles)
+        except Exception as e:
+            print(f"Error re-scoring {country}:{category or ''}: {e}")
+            with self._lock:
+                self._stats["errors"] += 1
+                self._stats["last_error"] = str(e)
+            return None
+
+        self.store.update_scores(country, category, scores, model_version)
+        with self._lock:
+            self._stats["rescored_feeds"] += 1
+            self._stats["articles_scored"] += sum(1 for score in scores if score)
+        return feed
+
+    def get_stats(self):
+        """Returns worker counters, schedule and store size"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        stats["feeds"] = len(self.feeds)
+        stats["daily_quota"] = self.daily_quota
+        stats["interval_seconds"] = round(self.interval, 1)
+        stats["refresh_seconds"] = self.refresh_seconds
+        stats["store"] = self.store.get_stats()
+        return stats
+
+
+def score_articles(articles):
+    """Pre-scores articles with the local model (no Gemini), in shared batches"""
+    items = []
+    for article in articles:
+        title, content, source = analysis_text(article)
+        items.append({'content': content, 'title': title, 'source': source})
+    return [None if 'error' in item else (item['result'], item['confidence'])
+            for item in predict_fake_news_batch(items, endpoint="ingestion")]
+
+
+def scoring_model_version():
+    """Version of the local model backend that ingestion scores with (see LOCAL_MODEL_ROUTES)"""
+    return get_model_version(endpoint="ingestion")
+
+
+# Shared store and worker; the worker only runs when INGESTION_ENABLED is set
+article_store = ArticleStore(INGESTION_DB or None)
+ingestion_worker = IngestionWorker(
+    article_store,
+    parse_feeds(INGESTION_FEEDS),
+    daily_quota=INGESTION_DAILY_QUOTA,
+    refresh_seconds=INGESTION_REFRESH_SECONDS,
+    score_fn=score_articles,
+    version_fn=scoring_model_version
+)
+
+
+def get_stored_news(country_code, category=None):
+    """
+    Returns a pre-fetched, pre-scored feed from the ingestion store, or None when
+    ingestion is disabled or the feed is not stored (or older than INGESTION_MAX_AGE).
+    Scores from a model other than the current ingestion backend are left out.
+    """
+    if not INGESTION_ENABLED:
+        return None
+    return article_store.get_feed(country_code, category or None, max_age=INGESTION_MAX_AGE,
+                                  model_version=scoring_model_version())
+
+
+def get_ingestion_stats():
+    """Returns ingestion worker and store statistics"""
+    stats = ingestion_worker.get_stats()
+    stats["enabled"] = INGESTION_ENABLED
+    return stats
@@ -0,0 +1,146 @@
+import os
+import re
+import threading
+
+# Default weighted phrase list used by the fallback classifier
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fake_indicators.txt")
+
+# Each matched unit of phrase weight adds this much to the fake probability
+WEIGHT_SCALE = 0.2
+MAX_FAKE_PROB = 0.9
+
+
+class Lexicon:
+    """
+    Weighted phrase matcher compiled into a single regular expression.
+
+    The phrases are merged into a character trie and the trie is rendered as one
+    regex, so an article is scanned once no matter how many phrases there are.
+    Matching is case-insensitive and only counts whole words/phrases.
+    """
+
+    def __init__(self, phrases):
+        """
+        Args:
+            phrases (dict): Mapping of phrase -> weight
+        """
+        self.weights = {}
+        for phrase, weight in phrases.items():
+            key = _normalize(phrase)
+            if key:
+                self.weights[key] = float(weight)
+        self._pattern = self._compile(self.weights)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Load a phrase list. Each line holds a phrase, optionally followed by a tab or
+        '|' and a weight (default 1.0). Blank lines and lines starting with '#' are ignored.
+        """
+        phrases = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = re.split(r'\t|\|', line, maxsplit=1)
+                weight = 1.0
+                if len(parts) == 2:
+                    try:
+                        weight = float(parts[1])
+                    except ValueError:
+                        print(f"Ignoring invalid weight in lexicon line: {line}")
+                phrases[parts[0].strip()] = weight
+        return cls(phrases)
+
+    def __len__(self):
+        return len(self.weights)
+
+    @staticmethod
+    def _compile(weights):
+        if not weights:
+            return None
+        trie = {}
+        for phrase in weights:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = True  # Marks the end of a phrase
+        return re.compile(r'(?<!\w)' + _trie_to_regex(trie) + r'(?!\w)')
+
+    def match(self, text):
+        """
+        Find every phrase occurring in the text.
+
+        Returns:
+            dict: phrase -> number of occurrences
+        """
+        hits = {}
+        if self._pattern is None or not text:
+            return hits
+        for match in self._pattern.finditer(_normalize(text)):
+            phrase = match.group(0)
+            hits[phrase] = hits.get(phrase, 0) + 1
+        return hits
+
+    def score(self, text):
+        """
+        Score one article.
+
+        Returns:
+            dict: 'fake_prob' (0.0-MAX_FAKE_PROB, from the summed weights of the distinct
+                  phrases found), 'weight' (that sum) and 'hits' (phrase -> count)
+        """
+        hits = self.match(text)
+        weight = sum(self.weights[phrase] for phrase in hits)
+        return {
+            "fake_prob": max(0.0, min(weight * WEIGHT_SCALE, MAX_FAKE_PROB)),
+            "weight": weight,
+            "hits": hits
+        }
+
+    def score_batch(self, texts):
+        """Score many articles; returns a list of score() results in input order"""
+        return [self.score(text) for text in texts]
+
+
+def _normalize(text):
+    """Lowercases and collapses whitespace so phrases match across line breaks"""
+    return re.sub(r'\s+', ' ', text.lower()).strip()
+
+
+def _trie_to_regex(node):
+    """Renders a character trie as a regex that prefers the longest phrase"""
+    terminal = "" in node
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items()) if char != ""]
+    if not branches:
+        return ""
+    if len(branches) == 1:
+        body = branches[0]
+        if terminal:
+            return f"(?:{body})?"
+        return body
+    body = "(?:" + "|".join(branches) + ")"
+    return body + "?" if terminal else body
+
+
+_default_lexicon = None
+_default_lexicon_lock = threading.Lock()
+
+
+def get_default_lexicon():
+    """Returns the shared lexicon loaded from LEXICON_PATH (compiled on first use)"""
+    global _default_lexicon
+    if _default_lexicon is None:
+        with _default_lexicon_lock:
+            if _default_lexicon is None:
+                path = os.getenv("LEXICON_PATH", DEFAULT_LEXICON_PATH)
+                try:
+                    _default_lexicon = Lexicon.from_file(path)
+                except OSError as e:
+                    print(f"Error loading lexicon from {path}: {e}")
+                    _default_lexicon = Lexicon({
+                        'clickbait': 1.0, 'shocking': 1.0, 'you won\'t believe': 1.0,
+                        'secret': 1.0, 'conspiracy': 1.0, 'they don\'t want you to know': 1.0
+                    })
+    return _default_lexicon
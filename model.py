@@ -1,17 +1,108 @@
-import tensorflow as tf
-from transformers import AutoTokenizer, TFAutoModelForSequenceClassification
+import copy
 import numpy as np
-from gemini_analyze import analyze_with_gemini
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from gemini_analyze import analyze_with_gemini, analyze_with_gemini_stream, GEMINI_STREAMING
+from backends import ClassifierBackend, BackendRegistry, parse_routes
+from result_cache import result_cache, make_cache_key
+from near_duplicates import near_duplicate_index, NearDuplicateIndex, FINGERPRINT_BITS
+from token_cache import TokenCache
+from lexicon import get_default_lexicon
+import metrics
+from tflite_backend import load_tflite_classifier, TFLiteClassifier, TFLITE_QUANTIZATION
 
-def load_model():
+# Pretrained transformer used by the local model (a hub name or a local checkpoint directory)
+MODEL_NAME = os.getenv("LOCAL_MODEL_NAME", "roberta-base")
+
+# Default local classifier backend: "tf" (full-precision TensorFlow), "tflite" (converted
+# once to a quantized TFLite model, cached on disk; see tflite_backend.py) or "lexicon"
+# (weighted phrase matching only, no model weights)
+LOCAL_MODEL_BACKEND = os.getenv("LOCAL_MODEL_BACKEND", "tf").lower()
+TRANSFORMER_BACKENDS = ("tf", "tflite")
+
+# Rules that send some requests to another backend, evaluated in order, e.g.
+# "endpoint:ingestion=lexicon,chars<400=tflite" (see backends.parse_routes)
+LOCAL_MODEL_ROUTES = os.getenv("LOCAL_MODEL_ROUTES", "")
+
+# Seconds an analysis waits for Gemini before using the local model alone
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 30))
+
+# Longest sequence the classifier accepts
+MAX_LENGTH = 512
+
+# Padding strategy for local model batches:
+#   "longest"    - pad to the longest sequence in the batch (default)
+#   "bucket"     - group sequences into length buckets and pad each group to its bucket
+#   "max_length" - always pad to MAX_LENGTH (original behaviour)
+PADDING_STRATEGY = os.getenv("LOCAL_MODEL_PADDING", "longest")
+LENGTH_BUCKETS = sorted(int(b) for b in os.getenv("LOCAL_MODEL_LENGTH_BUCKETS", "64,128,256,512").split(",") if b.strip())
+
+# Sliding-window inference for articles longer than MAX_LENGTH tokens: long articles are
+# split into overlapping windows (sharing CHUNK_STRIDE tokens), every window is scored and
+# the window probabilities are aggregated with "mean", "max" or "attention" (windows with
+# more decisive logits get more weight). At most MAX_WINDOWS windows are scored per article.
+CHUNKING_ENABLED = os.getenv("LOCAL_MODEL_CHUNKING", "false").lower() in ("1", "true", "yes")
+CHUNK_STRIDE = int(os.getenv("LOCAL_MODEL_CHUNK_STRIDE", 128))
+MAX_WINDOWS = max(1, int(os.getenv("LOCAL_MODEL_MAX_WINDOWS", 8)))
+CHUNK_AGGREGATION = os.getenv("LOCAL_MODEL_CHUNK_AGGREGATION", "mean")
+
+# Token IDs are cached by content hash, since the same descriptions recur across feeds and
+# pages. With PRETOKENIZE_WORKERS > 0 articles are tokenized on a worker pool as soon as
+# they are queued, so the batch thread mostly finds them ready and only runs forward passes.
+TOKEN_CACHE_SIZE = int(os.getenv("LOCAL_MODEL_TOKEN_CACHE_SIZE", 4096))
+PRETOKENIZE_WORKERS = int(os.getenv("LOCAL_MODEL_PRETOKENIZE_WORKERS", 1))
+
+# Local model stage timings (per-backend counts and batch timings live in backends.py)
+TOKENIZE_SECONDS = metrics.histogram(
+    "verinews_tokenize_seconds", "Time spent tokenizing and padding a local model batch")
+FORWARD_SECONDS = metrics.histogram(
+    "verinews_forward_pass_seconds", "Time spent in one TensorFlow forward pass")
+
+token_cache = TokenCache(max_entries=TOKEN_CACHE_SIZE, workers=PRETOKENIZE_WORKERS)
+
+def load_model(backend="tf"):
+    """
+    Loads the transformer classifier for a backend ("tf" or "tflite").
+    
+    Returns:
+        tuple: (model, tokenizer); the keyword fallback pair if loading failed
+    """
+    # TensorFlow and transformers are imported here rather than at module level so that
+    # importing this module (and the app) stays fast; they load with the model
+    from transformers import AutoTokenizer
+    
     try:
         # Use a valid pretrained model for text classification
         # roberta-base is a well-established model that definitely exists
-        model_name = "roberta-base"
+        model_name = MODEL_NAME
+        
+        # Load tokenizer and model; the Rust-backed fast tokenizer encodes whole batches natively
+        tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        if not getattr(tokenizer, "is_fast", False):
+            print(f"WARNING: no fast tokenizer available for {model_name}; tokenization will be slower")
         
-        # Load tokenizer and model
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = TFAutoModelForSequenceClassification.from_pretrained(model_name, num_labels=2)
+        def load_tf_model():
+            # Importing the TF model class pulls in TensorFlow, which a cached TFLite
+            # artifact served by the standalone LiteRT runtime does not need
+            from transformers import TFAutoModelForSequenceClassification
+            return TFAutoModelForSequenceClassification.from_pretrained(model_name, num_labels=2)
+        
+        model = None
+        if backend == "tflite":
+            # The TF weights are only loaded when there is no cached TFLite artifact yet
+            try:
+                classifier, model = load_tflite_classifier(model_name, tokenizer, load_tf_model)
+            except Exception as e:
+                print(f"Error preparing TFLite model, using TensorFlow instead: {e}")
+                classifier = None
+            if classifier is not None:
+                print("Loaded TFLite model successfully")
+                return classifier, tokenizer
+        if model is None:
+            model = load_tf_model()
         
         print("Loaded pretrained model successfully")
         return model, tokenizer
@@ -24,9 +115,8 @@ def create_fallback_model():
     """Creates a simple fallback mechanism when the main model fails to load"""
     print("Using fallback classification mechanism")
     
-    # Define a simple keyword-based classifier
-    fake_indicators = ['clickbait', 'shocking', 'you won\'t believe', 
-                      'secret', 'conspiracy', 'they don\'t want you to know']
+    # Define a simple keyword-based classifier backed by the compiled phrase lexicon
+    fake_indicators = get_default_lexicon()
                       
     # Create simple classifier functions to mimic the expected interface
     class SimpleClassifier:
@@ -34,21 +124,68 @@ def create_fallback_model():
             class Outputs:
                 def __init__(self, logits):
                     self.logits = logits
-            return Outputs(tf.constant([[0.0, 0.0]]))
+            return Outputs(np.array([[0.0, 0.0]], dtype=np.float32))
     
     class SimpleTokenizer:
+        fake_count = 0
+
         def __call__(self, text, **kwargs):
-            # Count how many fake indicators are in the text
-            count = sum(1 for word in fake_indicators if word.lower() in text.lower())
+            # Count how many fake indicators are in the text (single pass over the text)
+            count = len(fake_indicators.match(text))
             # Store this count for later use during prediction
             self.fake_count = count
             return {"fake_count": count}
     
     return SimpleClassifier(), SimpleTokenizer()
 
-model, tokenizer = load_model()
+def get_model(backend=None):
+    """
+    Returns the (model, tokenizer) pair of a transformer backend, loading it on first use.
+    
+    Args:
+        backend (str, optional): "tf" or "tflite"; defaults to LOCAL_MODEL_BACKEND when
+                                 that is a transformer backend, else "tf"
+    """
+    if backend is None:
+        backend = LOCAL_MODEL_BACKEND if LOCAL_MODEL_BACKEND in TRANSFORMER_BACKENDS else "tf"
+    return backend_registry.get(backend).load()
+
+def warm_up():
+    """Loads the default backend and every routed backend and runs one inference on each"""
+    for backend in backend_registry.routed_backends():
+        backend.warm_up()
+
+def start_warmup():
+    """Loads and warms up the model in a background thread"""
+    thread = threading.Thread(target=warm_up, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
 
-def predict_fake_news(article, title=None, source=None, use_gemini=False):
+def get_model_status():
+    """
+    Returns the loading state of the local model.
+    
+    'ready' is True once the default backend and every routed backend is loaded and has
+    run a warm-up inference. When a transformer failed to load and the keyword fallback
+    is in use, it only counts as ready if LOCAL_MODEL_READY_ON_FALLBACK is enabled.
+    """
+    default = backend_registry.default
+    status = {key: value for key, value in default.state.items()}
+    allow_fallback = os.getenv("LOCAL_MODEL_READY_ON_FALLBACK", "false").lower() in ("1", "true", "yes")
+    routed = backend_registry.routed_backends()
+    status["model_name"] = MODEL_NAME
+    status["backend"] = "keyword-fallback" if default.state["fallback"] else default.name
+    status["backends"] = {backend.name: {"loaded": backend.state["loaded"], "warmed_up": backend.state["warmed_up"],
+                                         "fallback": backend.state["fallback"]} for backend in routed}
+    status["ready"] = all(backend.state["loaded"] and backend.state["warmed_up"]
+                          and (allow_fallback or not backend.state["fallback"]) for backend in routed)
+    return status
+
+def get_available_backends():
+    """Names of the local classifier backends a request can ask for"""
+    return backend_registry.names()
+
+def predict_fake_news(article, title=None, source=None, use_gemini=False, backend=None, endpoint=None):
     """
     Analyze news article for credibility using both the local model and optionally Google Gemini.
     
@@ -57,27 +194,433 @@ def predict_fake_news(article, title=None, source=None, use_gemini=False):
         title (str, optional): The title of the article
         source (str, optional): The source of the article
         use_gemini (bool): Whether to use Gemini API for enhanced analysis
+        backend (str, optional): Local classifier backend to use ("tf", "tflite" or "lexicon");
+                                 by default it is chosen by LOCAL_MODEL_ROUTES
+        endpoint (str, optional): Name of the calling endpoint, used by LOCAL_MODEL_ROUTES
         
     Returns:
         tuple: (result, confidence, additional_data)
             - result: 'Fake', 'Real', or 'Uncertain'
             - confidence: 0.0-1.0 confidence score
             - additional_data: Dictionary containing additional analysis information
+    
+    Raises:
+        ValueError: If an unknown backend is requested
     """
-    result = "Uncertain"
-    confidence = 0.5
-    additional_data = {}
+    local_backend = backend_registry.select(article, endpoint, backend)
+    
+    # Reuse a previous analysis of the same content, or of a near-duplicate (e.g. the
+    # same wire story from another source), if we have one
+    model_version = local_backend.version()
+    cache_key = make_cache_key(article, title, source, use_gemini, model_version)
+    cached = _get_cached_result(cache_key)
+    if cached is not None:
+        return cached
+    fingerprint = near_duplicate_index.fingerprint(article)
+    namespace = _near_duplicate_namespace(use_gemini, model_version)
+    reused = _get_near_duplicate_result(fingerprint, namespace)
+    if reused is not None:
+        return reused
+    
+    # Run Gemini and the local model at the same time; Gemini goes first since it is slower
+    started = time.perf_counter()
+    gemini_future = None
+    if use_gemini:
+        gemini_future = _gemini_executor.submit(_timed_call, analyze_with_gemini, article, title, source)
+    
+    try:
+        local_result, local_confidence, local_details = _predict_with_local_model(article, local_backend)
+    except Exception:
+        # Don't leave a queued Gemini call behind for a request that has already failed
+        if gemini_future is not None:
+            gemini_future.cancel()
+        raise
+    local_finished = time.perf_counter()
+    
+    gemini_analysis = None
+    gemini_window = None
+    if gemini_future is not None:
+        gemini_analysis, gemini_window = _wait_for_gemini(gemini_future)
     
-    # First, use the local model
-    local_result, local_confidence = _predict_with_local_model(article)
+    local_stages = local_details.pop("timing", None)
+    result, confidence, additional_data = _combine_results(local_result, local_confidence, gemini_analysis, local_details)
+    additional_data["timing"] = _timing_summary(started, local_finished, gemini_window, time.perf_counter(), local_stages)
+    _store_result(cache_key, result, confidence, additional_data, fingerprint, namespace)
+    return result, confidence, additional_data
+
+def predict_fake_news_stream(article, title=None, source=None, use_gemini=False, backend=None, endpoint=None):
+    """
+    Progressive version of predict_fake_news.
+    
+    Yields the local model verdict as soon as it is ready, then the Gemini analysis
+    and the recalculated combined verdict once Gemini has answered. With
+    GEMINI_STREAMING, Gemini's answer is also yielded as it streams in, so the
+    credibility score can be shown before the reasoning has finished generating.
+    backend and endpoint select the local classifier as in predict_fake_news.
+    
+    Yields:
+        tuple: (event, data) pairs, in order:
+            - ('local', {'result', 'confidence'})
+            - ('gemini_partial', {'credibility_score', 'reasoning', 'recommendations'})
+              zero or more times, only if use_gemini is True and GEMINI_STREAMING is on
+            - ('gemini', gemini_analysis)   only if use_gemini is True
+            - ('combined', {'result', 'confidence', 'additional_data'})
+    """
+    local_backend = backend_registry.select(article, endpoint, backend)
+    model_version = local_backend.version()
+    cache_key = make_cache_key(article, title, source, use_gemini, model_version)
+    cached = _get_cached_result(cache_key)
+    fingerprint = None
+    namespace = _near_duplicate_namespace(use_gemini, model_version)
+    if cached is None:
+        fingerprint = near_duplicate_index.fingerprint(article)
+        cached = _get_near_duplicate_result(fingerprint, namespace)
+    if cached is not None:
+        result, confidence, additional_data = cached
+        yield "local", dict(additional_data["local_model"])
+        if use_gemini and "gemini" in additional_data:
+            yield "gemini", additional_data["gemini"]
+        yield "combined", {"result": result, "confidence": confidence, "additional_data": additional_data}
+        return
+    
+    started = time.perf_counter()
+    gemini_future = None
+    gemini_events = None
+    gemini_stop = threading.Event()
+    if use_gemini and GEMINI_STREAMING:
+        gemini_events = queue.Queue()
+        gemini_future = _gemini_executor.submit(_stream_gemini, article, title, source, gemini_events, gemini_stop)
+    elif use_gemini:
+        gemini_future = _gemini_executor.submit(_timed_call, analyze_with_gemini, article, title, source)
+    
+    try:
+        # The page that opened this stream has usually just scored the article locally
+        local_only = _get_cached_result(make_cache_key(article, title, source, False, model_version))
+        if local_only is not None:
+            local_details = dict(local_only[2]["local_model"])
+            local_result, local_confidence = local_details.pop("result"), local_details.pop("confidence")
+        else:
+            local_result, local_confidence, local_details = _predict_with_local_model(article, local_backend)
+        local_stages = local_details.pop("timing", None)
+    except Exception:
+        gemini_stop.set()
+        if gemini_future is not None:
+            gemini_future.cancel()
+        raise
+    local_finished = time.perf_counter()
+    
+    try:
+        yield "local", {"result": local_result, "confidence": local_confidence, **local_details}
+        
+        gemini_analysis = None
+        gemini_window = None
+        if gemini_future is not None:
+            deadline = time.perf_counter() + GEMINI_TIMEOUT
+            if gemini_events is not None:
+                for partial in _gemini_partials(gemini_events, deadline):
+                    yield "gemini_partial", partial
+            gemini_analysis, gemini_window = _wait_for_gemini(gemini_future, deadline)
+            yield "gemini", gemini_analysis
+    finally:
+        # The client may disconnect before Gemini answers
+        gemini_stop.set()
+        if gemini_future is not None and not gemini_future.done():
+            gemini_future.cancel()
+    
+    result, confidence, additional_data = _combine_results(local_result, local_confidence, gemini_analysis, local_details)
+    additional_data["timing"] = _timing_summary(started, local_finished, gemini_window, time.perf_counter(), local_stages)
+    _store_result(cache_key, result, confidence, additional_data, fingerprint, namespace)
+    yield "combined", {"result": result, "confidence": confidence, "additional_data": additional_data}
+
+def _timed_call(fn, *args):
+    """Runs fn(*args) and returns (result, (started, finished)) with perf_counter timestamps"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (started, time.perf_counter())
+
+def _stream_gemini(article, title, source, events, stop):
+    """
+    Runs a streamed Gemini analysis, putting every partial snapshot on the events queue
+    followed by None. Stops reading the response once stop is set (the client went away).
+    
+    Returns:
+        tuple: (gemini_analysis, (started, finished)) like _timed_call
+    """
+    started = time.perf_counter()
+    gemini_analysis = None
+    try:
+        for event, data in analyze_with_gemini_stream(article, title, source):
+            if stop.is_set():
+                break
+            if event == "final":
+                gemini_analysis = data
+            else:
+                events.put(data)
+    finally:
+        events.put(None)
+    return gemini_analysis, (started, time.perf_counter())
+
+def _gemini_partials(events, deadline):
+    """
+    Yields the partial Gemini snapshots put on the queue by _stream_gemini until the
+    stream ends or the deadline (a perf_counter time) passes. Snapshots are cumulative,
+    so when several are waiting only the newest is yielded.
+    """
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        try:
+            partial = events.get(timeout=remaining)
+        except queue.Empty:
+            return
+        while partial is not None:
+            try:
+                newer = events.get_nowait()
+            except queue.Empty:
+                break
+            if newer is None:
+                yield partial
+                return
+            partial = newer
+        if partial is None:
+            return
+        yield partial
+
+def _wait_for_gemini(gemini_future, deadline=None):
+    """
+    Waits for a Gemini analysis submitted with _timed_call or _stream_gemini until the
+    deadline (a time.perf_counter() value, by default GEMINI_TIMEOUT seconds from now).
+    
+    Returns:
+        tuple: (gemini_analysis, (started, finished)); a timeout or exception becomes a
+               failed analysis so the local model result is used on its own
+    """
+    if deadline is None:
+        deadline = time.perf_counter() + GEMINI_TIMEOUT
+    try:
+        return gemini_future.result(timeout=max(0.0, deadline - time.perf_counter()))
+    except Exception as e:
+        gemini_future.cancel()
+        if isinstance(e, FuturesTimeoutError):
+            error = f"Gemini analysis timed out after {GEMINI_TIMEOUT:.3g} seconds"
+        else:
+            error = f"Gemini analysis failed: {str(e)}"
+        return {
+            "success": False,
+            "error": error,
+            "credibility_score": 5,
+            "reasoning": "The AI analysis did not complete, so only the local model was used.",
+            "recommendations": "Please try again later or use alternative fact-checking methods."
+        }, None
+
+def _timing_summary(started, local_finished, gemini_window, finished, local_stages=None):
+    """
+    Builds the per-request timing fields, including how much the two analyses overlapped
+    and, for transformer backends, how the local model batch split its time between
+    tokenization and forward passes
+    """
+    timing = {
+        "local_ms": round((local_finished - started) * 1000, 1),
+        "total_ms": round((finished - started) * 1000, 1)
+    }
+    if local_stages:
+        timing.update(local_stages)
+    if gemini_window is not None:
+        gemini_started, gemini_finished = gemini_window
+        overlap = max(0.0, min(local_finished, gemini_finished) - max(started, gemini_started))
+        timing["gemini_queue_ms"] = round((gemini_started - started) * 1000, 1)
+        timing["gemini_ms"] = round((gemini_finished - gemini_started) * 1000, 1)
+        timing["overlap_ms"] = round(overlap * 1000, 1)
+    return timing
+
+def predict_fake_news_batch(articles, endpoint=None):
+    """
+    Analyze many news articles at once.
+    
+    The local model scores all articles in shared batched forward passes, and the
+    Gemini calls for articles that request it run concurrently on a pool of their own
+    (GEMINI_BATCH_MAX_CONCURRENCY), so a large batch does not hold up interactive
+    analyses. Results are merged exactly as in predict_fake_news. The whole batch waits
+    at most GEMINI_TIMEOUT for Gemini: calls that fail or are still pending (or queued)
+    by then leave their articles with the local model result.
+    
+    Args:
+        articles (list): Dictionaries with 'content' and optional 'title', 'source',
+                         'use_gemini' and 'backend' keys
+        endpoint (str, optional): Name of the calling endpoint, used by LOCAL_MODEL_ROUTES
+        
+    Returns:
+        list: One dictionary per article, in input order, containing either
+              'result', 'confidence' and 'additional_data', or an 'error'
+    """
+    results = [None] * len(articles)
+    cache_keys = {}
+    fingerprints = {}
+    local_futures = {}
+    pending = {}
+    # Copies of the same story within this batch are scored once
+    batch_index = NearDuplicateIndex(max_distance=near_duplicate_index.max_distance, max_entries=len(articles))
+    followers = {}
+    
+    for index, item in enumerate(articles):
+        if not isinstance(item, dict) or not item.get('content'):
+            results[index] = {'error': 'Missing content field', 'result': 'Error', 'confidence': 0.5}
+            continue
+        try:
+            local_backend = backend_registry.select(item['content'], endpoint, item.get('backend'))
+        except ValueError as e:
+            results[index] = {'error': str(e), 'result': 'Error', 'confidence': 0.5}
+            continue
+        
+        model_version = local_backend.version()
+        cache_keys[index] = make_cache_key(item['content'], item.get('title'), item.get('source'),
+                                           item.get('use_gemini', False), model_version)
+        cached = _get_cached_result(cache_keys[index])
+        if cached is None:
+            namespace = _near_duplicate_namespace(item.get('use_gemini', False), model_version)
+            fingerprints[index] = (near_duplicate_index.fingerprint(item['content']), namespace)
+            cached = _get_near_duplicate_result(*fingerprints[index])
+        if cached is not None:
+            result, confidence, additional_data = cached
+            results[index] = {'result': result, 'confidence': confidence, 'additional_data': additional_data}
+            continue
+        
+        if index in fingerprints:
+            leader, distance, _ = batch_index.lookup(*fingerprints[index])
+            if leader is not None:
+                followers[index] = (leader, distance)
+                continue
+            batch_index.add(fingerprints[index][0], index, fingerprints[index][1])
+        pending.setdefault(local_backend, []).append(index)
+    
+    # Queue everything at once so each backend's batcher can fill whole batches
+    for local_backend, indices in pending.items():
+        futures = local_backend.submit_many([articles[index]['content'] for index in indices])
+        local_futures.update(zip(indices, futures))
+    
+    gemini_futures = {
+        index: _batch_gemini_executor.submit(_timed_call, analyze_with_gemini, articles[index]['content'],
+                                             articles[index].get('title'), articles[index].get('source'))
+        for index in local_futures if articles[index].get('use_gemini', False)
+    }
+    # One deadline for the whole batch, however many calls are queued behind the pool
+    gemini_deadline = time.perf_counter() + GEMINI_TIMEOUT
+    
+    for index, local_future in local_futures.items():
+        try:
+            local_result, local_confidence, local_details = local_future.result()
+            local_details.pop("timing", None)
+            gemini_analysis = _wait_for_gemini(gemini_futures[index], gemini_deadline)[0] if index in gemini_futures else None
+            result, confidence, additional_data = _combine_results(local_result, local_confidence, gemini_analysis, local_details)
+            _store_result(cache_keys[index], result, confidence, additional_data, *fingerprints[index])
+            results[index] = {'result': result, 'confidence': confidence, 'additional_data': additional_data}
+        except Exception as e:
+            if index in gemini_futures:
+                gemini_futures[index].cancel()
+            results[index] = {'error': str(e), 'result': 'Error', 'confidence': 0.5}
+    
+    for index, (leader, distance) in followers.items():
+        results[index] = copy.deepcopy(results[leader])
+        if 'additional_data' in results[index]:
+            results[index]['additional_data']['reused'] = _reused_marker(distance)
+    
+    return results
+
+def get_model_version(backend=None, endpoint=None):
+    """Identifies the local model in use, so cached results from another model are not reused"""
+    return backend_registry.select(requested=backend, endpoint=endpoint).version()
+
+def _transformer_version(handle):
+    """Model version of a loaded transformer backend"""
+    model, tokenizer = handle
+    if hasattr(tokenizer, 'fake_count'):
+        return "keyword-fallback"
+    if isinstance(model, TFLiteClassifier):
+        return _expected_transformer_version(model.metadata.get('quantization', TFLITE_QUANTIZATION))
+    return _expected_transformer_version()
+
+def _expected_transformer_version(tflite_quantization=None):
+    """Model version of a transformer backend from configuration, without loading it"""
+    version = MODEL_NAME
+    if tflite_quantization:
+        version += f"+tflite-{tflite_quantization}"
+    if CHUNKING_ENABLED:
+        version += f"+windows-{CHUNK_AGGREGATION}-{MAX_WINDOWS}-{CHUNK_STRIDE}"
+    return version
+
+def _get_cached_result(cache_key):
+    """Returns a cached (result, confidence, additional_data) tuple, or None on a miss"""
+    cached, tier = result_cache.get(cache_key)
+    if cached is None:
+        return None
+    cached["additional_data"]["cache"] = {"hit": True, "tier": tier}
+    # Timings describe the original analysis, not this lookup
+    cached["additional_data"].pop("timing", None)
+    return cached["result"], cached["confidence"], cached["additional_data"]
+
+def _store_result(cache_key, result, confidence, additional_data, fingerprint=None, namespace=""):
+    """
+    Caches a finished analysis, skipping errors and failed Gemini calls that may be
+    transient, and keyword-fallback verdicts (the cache key may have been built from the
+    expected model version before the model failed to load). With a fingerprint the
+    analysis is also indexed for near-duplicate reuse.
+    """
+    gemini_analysis = additional_data.get("gemini")
+    if (result != "Error" and additional_data.get("backend") != "keyword-fallback"
+            and (gemini_analysis is None or gemini_analysis.get("success", False))):
+        result_cache.set(cache_key, {
+            "result": result,
+            "confidence": confidence,
+            "additional_data": additional_data
+        })
+        near_duplicate_index.add(fingerprint, cache_key, namespace)
+    additional_data["cache"] = {"hit": False}
+
+def _near_duplicate_namespace(use_gemini, model_version):
+    """Only analyses made with the same settings are reused for near-duplicates"""
+    return f"{bool(use_gemini)}|{model_version}"
+
+def _get_near_duplicate_result(fingerprint, namespace):
+    """
+    Returns the cached analysis of an earlier article whose SimHash is within
+    NEAR_DUPLICATE_MAX_DISTANCE bits, marked as reused, or None
+    """
+    cache_key, distance, matched = near_duplicate_index.lookup(fingerprint, namespace)
+    if cache_key is None:
+        return None
+    cached = _get_cached_result(cache_key)
+    if cached is None:
+        # The analysis it pointed to has expired or been evicted from the result cache
+        near_duplicate_index.discard(matched, namespace)
+        return None
+    result, confidence, additional_data = cached
+    additional_data["reused"] = _reused_marker(distance)
+    return result, confidence, additional_data
+
+def _reused_marker(distance):
+    """The additional_data entry marking an analysis reused from a near-duplicate article"""
+    return {
+        "near_duplicate": True,
+        "distance": distance,
+        "similarity": round(1 - distance / FINGERPRINT_BITS, 3)
+    }
+
+def _combine_results(local_result, local_confidence, gemini_analysis=None, local_details=None):
+    """
+    Merges the local model verdict with an optional Gemini analysis.
+    
+    Returns:
+        tuple: (result, confidence, additional_data) as returned by predict_fake_news
+    """
+    additional_data = {}
     additional_data["local_model"] = {
         "result": local_result,
-        "confidence": local_confidence
+        "confidence": local_confidence,
+        **(local_details or {})
     }
     
-    # If Gemini is requested, use it and combine results
-    if use_gemini:
-        gemini_analysis = analyze_with_gemini(article, title, source)
+    if gemini_analysis is not None:
         additional_data["gemini"] = gemini_analysis
         
         # Convert Gemini's 1-10 score to a 0-1 range, inverting since 
@@ -88,18 +631,19 @@ def predict_fake_news(article, title=None, source=None, use_gemini=False):
         # Give Gemini higher weight if it succeeded
         if gemini_analysis["success"]:
             combined_confidence = (local_confidence * 0.3) + (gemini_confidence * 0.7)
-        else:
-            # If Gemini analysis failed, rely more on local model
-            combined_confidence = local_confidence
             
-        confidence = combined_confidence
-        # Set result based on combined confidence
-        if confidence > 0.7:
-            result = "Fake"
-        elif confidence < 0.3:
-            result = "Real"
+            confidence = combined_confidence
+            # Set result based on combined confidence
+            if confidence > 0.7:
+                result = "Fake"
+            elif confidence < 0.3:
+                result = "Real"
+            else:
+                result = "Uncertain"
         else:
-            result = "Uncertain"
+            # If Gemini analysis failed (or is unavailable), use the local model alone
+            result = local_result
+            confidence = local_confidence
     else:
         # Use only local model results if Gemini is not requested
         result = local_result
@@ -107,42 +651,357 @@ def predict_fake_news(article, title=None, source=None, use_gemini=False):
     
     return result, confidence, additional_data
 
-def _predict_with_local_model(article):
-    """Internal helper to get prediction from local model only"""
+def _predict_with_local_model(article, backend=None):
+    """Internal helper to get prediction from local model only (batched with concurrent callers)"""
+    return (backend or backend_registry.default).predict(article)
+
+def _predict_batch_with_transformer(handle, articles):
+    """
+    Internal helper to score a batch of articles with batched forward passes.
+    
+    Args:
+        handle (tuple): (model, tokenizer) pair of a transformer backend
+        articles (list): Article texts to analyze
+        
+    Returns:
+        list: (result, confidence, details) tuples in the same order as the articles,
+              where details is a dict of extra local model information (e.g. windows used)
+    """
+    model, tokenizer = handle
     if model is None or tokenizer is None:
-        return "Error", 0.0
+        return [("Error", 0.0, {})] * len(articles)
     
     try:
         # Handle fallback simple model
         if hasattr(tokenizer, 'fake_count'):
-            # Simple rule-based prediction based on keyword matching
-            fake_count = sum(1 for word in ['clickbait', 'shocking', 'conspiracy'] 
-                            if word.lower() in article.lower())
-            fake_prob = min(fake_count * 0.2, 0.9)  # Scale probability based on matches
-            result = 'Fake' if fake_prob > 0.5 else 'Real'
-            confidence = fake_prob if result == 'Fake' else 1 - fake_prob
-            return result, confidence
+            return _predict_batch_with_keywords(articles)
             
         # Normal model prediction flow
-        max_length = 512
-        inputs = tokenizer(article, return_tensors="tf", max_length=max_length, 
-                          truncation=True, padding="max_length")
+        stages = {}
+        if CHUNKING_ENABLED:
+            probabilities, windows = _chunked_fake_probabilities(articles, handle=handle, timings=stages)
+            details = [{"windows": int(w), "aggregation": CHUNK_AGGREGATION} for w in windows]
+        else:
+            probabilities = _fake_probabilities(articles, handle=handle, timings=stages)
+            details = [{} for _ in articles]
+        
+        # Batch-level split of the local model time, moved into additional_data["timing"]
+        timing = {"batch_size": len(articles),
+                  "tokenize_ms": round(stages["tokenize"] * 1000, 2),
+                  "forward_ms": round(stages["forward"] * 1000, 2)}
+        return [_verdict_from_fake_prob(float(p)) + ({**extra, "timing": timing},)
+                for p, extra in zip(probabilities, details)]
         
+    except Exception as e:
+        print(f"Error during prediction: {e}")
+        # Ultimate fallback
+        return [("Uncertain", 0.5, {})] * len(articles)
+
+def _fake_probabilities(articles, padding_strategy=None, handle=None, timings=None):
+    """
+    Runs the transformer on a batch of articles and returns the fake-class probabilities.
+    
+    Args:
+        articles (list): Article texts to analyze
+        padding_strategy (str, optional): Overrides PADDING_STRATEGY ("longest", "bucket" or "max_length")
+        handle (tuple, optional): (model, tokenizer) pair to use instead of get_model()
+        timings (dict, optional): Receives the seconds spent in "tokenize" and "forward"
+        
+    Returns:
+        numpy.ndarray: Probability of the fake class for each article, in input order
+    """
+    model, tokenizer = handle or get_model()
+    timings = {} if timings is None else timings
+    fake_probs = np.zeros(len(articles), dtype=np.float32)
+    started = time.perf_counter()
+    groups = _tokenize_groups(articles, padding_strategy or PADDING_STRATEGY, tokenizer)
+    timings["tokenize"] = time.perf_counter() - started
+    TOKENIZE_SECONDS.observe(timings["tokenize"])
+    timings["forward"] = 0.0
+    for indices, inputs in groups:
+        started = time.perf_counter()
         outputs = model(inputs)
-        logits = outputs.logits.numpy()
+        logits = np.asarray(outputs.logits)
+        elapsed = time.perf_counter() - started
+        timings["forward"] += elapsed
+        FORWARD_SECONDS.observe(elapsed)
         
         # Convert logits to probabilities
-        probabilities = tf.nn.softmax(logits, axis=-1).numpy()[0]
+        probabilities = _softmax(logits)
         
         # For binary classification: Index 1 typically indicates positive class probability
-        fake_prob = float(probabilities[1])
-        
-        result = 'Fake' if fake_prob > 0.7 else 'Real'
+        fake_probs[indices] = probabilities[:, 1]
+    return fake_probs
+
+def _tokenize_groups(articles, padding_strategy, tokenizer):
+    """
+    Tokenizes a batch and splits it into padded model inputs.
+    
+    Padding tokens are masked out by the attention mask, so every strategy yields the
+    same probabilities within float tolerance; shorter padding just costs fewer FLOPs.
+    
+    Returns:
+        list: (indices, inputs) pairs, where indices are the positions of the grouped
+              articles in the original batch
+    """
+    return _pad_groups(_token_ids(articles, tokenizer), padding_strategy, tokenizer.pad_token_id)
+
+def _token_ids(articles, tokenizer, windows=False):
+    """
+    Token IDs of each article, served from the token cache where possible.
+    
+    By default sequences are truncated to MAX_LENGTH and include the special tokens;
+    with windows=True they are complete and without special tokens, ready to be split
+    into sliding windows.
+    """
+    encode, namespace = _token_encoder(tokenizer, windows)
+    return token_cache.encode(list(articles), encode, namespace)
+
+def _token_encoder(tokenizer, windows=False):
+    """Returns the batch encode function and token cache namespace for a tokenization mode"""
+    if windows:
+        def encode(texts):
+            return tokenizer(texts, add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+    else:
+        def encode(texts):
+            return tokenizer(texts, max_length=MAX_LENGTH, truncation=True)["input_ids"]
+    return encode, f"{tokenizer.name_or_path}|{'windows' if windows else MAX_LENGTH}"
+
+def _prefetch_tokens(handle, articles):
+    """Starts tokenizing queued articles on the pre-tokenization pool (transformer backends only)"""
+    _, tokenizer = handle
+    if hasattr(tokenizer, 'fake_count'):
+        return
+    encode, namespace = _token_encoder(tokenizer, CHUNKING_ENABLED)
+    token_cache.prefetch(list(articles), encode, namespace)
+
+def _pad_groups(sequences, padding_strategy, pad_token_id):
+    """
+    Groups token ID sequences by padded length and pads each group into model inputs.
+    
+    Returns:
+        list: (indices, inputs) pairs, where indices are the positions of the grouped
+              sequences in the input list
+    """
+    lengths = [len(ids) for ids in sequences]
+    longest = max(lengths, default=0)
+    
+    # Map each padded length to the sequences that share it
+    groups = {}
+    for index, length in enumerate(lengths):
+        if padding_strategy == "max_length":
+            pad_to = MAX_LENGTH
+        elif padding_strategy == "bucket":
+            pad_to = _bucket_for_length(length)
+        else:
+            pad_to = longest
+        groups.setdefault(pad_to, []).append(index)
+    
+    batches = []
+    for pad_to, indices in sorted(groups.items()):
+        # Right-pad with the pad token, exactly like the tokenizer's own padding
+        input_ids = np.full((len(indices), pad_to), pad_token_id, dtype=np.int32)
+        attention_mask = np.zeros((len(indices), pad_to), dtype=np.int32)
+        for row, index in enumerate(indices):
+            ids = sequences[index]
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        batches.append((indices, inputs))
+    return batches
+
+def _chunked_fake_probabilities(articles, aggregation=None, padding_strategy=None, handle=None, timings=None):
+    """
+    Scores articles with sliding windows so text beyond MAX_LENGTH tokens is not ignored.
+    
+    The windows of all articles are scored together in shared batches. timings, if
+    given, receives the seconds spent in "tokenize" and "forward".
+    
+    Returns:
+        tuple: (fake_probs, windows) arrays with the aggregated fake-class probability
+               and the number of windows scored for each article
+    """
+    model, tokenizer = handle or get_model()
+    aggregation = aggregation or CHUNK_AGGREGATION
+    timings = {} if timings is None else timings
+    
+    tokenize_started = time.perf_counter()
+    # Tokenize without special tokens or truncation; each window gets its own <s> ... </s>
+    token_ids = _token_ids(articles, tokenizer, windows=True)
+    body_length = MAX_LENGTH - tokenizer.num_special_tokens_to_add()
+    
+    sequences = []
+    owners = []
+    for article_index, ids in enumerate(token_ids):
+        for window in _split_windows(ids, body_length, CHUNK_STRIDE, MAX_WINDOWS):
+            sequences.append(tokenizer.build_inputs_with_special_tokens(window))
+            owners.append(article_index)
+    owners = np.array(owners)
+    groups = _pad_groups(sequences, padding_strategy or PADDING_STRATEGY, tokenizer.pad_token_id)
+    timings["tokenize"] = time.perf_counter() - tokenize_started
+    TOKENIZE_SECONDS.observe(timings["tokenize"])
+    
+    timings["forward"] = 0.0
+    window_logits = np.zeros((len(sequences), 2), dtype=np.float32)
+    for indices, inputs in groups:
+        started = time.perf_counter()
+        window_logits[indices] = np.asarray(model(inputs).logits)
+        elapsed = time.perf_counter() - started
+        timings["forward"] += elapsed
+        FORWARD_SECONDS.observe(elapsed)
+    window_probs = _softmax(window_logits)[:, 1]
+    
+    fake_probs = np.zeros(len(articles), dtype=np.float32)
+    windows = np.bincount(owners, minlength=len(articles))
+    for article_index in range(len(articles)):
+        mask = owners == article_index
+        probs = window_probs[mask]
+        if aggregation == "max":
+            fake_probs[article_index] = probs.max()
+        elif aggregation == "attention":
+            # Weight windows by how decisive their logits are
+            weights = _softmax(np.abs(window_logits[mask, 1] - window_logits[mask, 0]))
+            fake_probs[article_index] = float(np.dot(weights, probs))
+        else:
+            fake_probs[article_index] = probs.mean()
+    return fake_probs, windows
+
+def _split_windows(ids, body_length, stride, max_windows):
+    """
+    Splits token IDs into windows of body_length tokens overlapping by stride tokens.
+    
+    If more than max_windows windows would be needed, max_windows evenly spaced windows
+    are used so that the start, middle and end of the article are still covered. The
+    overlap is capped at half a window, so a stride close to (or above) body_length
+    cannot shrink the step to a few tokens.
+    """
+    if len(ids) <= body_length:
+        return [ids]
+    last_start = len(ids) - body_length
+    step = body_length - min(stride, body_length // 2)
+    count = -(-last_start // step) + 1
+    positions = range(count)
+    if count > max_windows:
+        positions = np.linspace(0, count - 1, max_windows).round().astype(int).tolist()
+    # The last window ends at the end of the article
+    starts = [min(position * step, last_start) for position in positions]
+    return [ids[start:start + body_length] for start in starts]
+
+def _softmax(logits):
+    """Numerically stable softmax over the last axis"""
+    exp = np.exp(logits - np.max(logits, axis=-1, keepdims=True))
+    return exp / np.sum(exp, axis=-1, keepdims=True)
+
+def _bucket_for_length(length):
+    """Returns the smallest configured length bucket that fits a sequence"""
+    for bucket in LENGTH_BUCKETS:
+        if length <= bucket:
+            return bucket
+    return max(MAX_LENGTH, length)
+
+def _predict_batch_with_keywords(articles, lexicon=None):
+    """Simple rule-based prediction based on weighted phrase matching"""
+    verdicts = []
+    for score in (lexicon or get_default_lexicon()).score_batch(articles):
+        fake_prob = score["fake_prob"]  # Scaled from the weights of the phrases found
+        result = 'Fake' if fake_prob > 0.5 else 'Real'
         confidence = fake_prob if result == 'Fake' else 1 - fake_prob
-        
-        return result, confidence
-        
+        verdicts.append((result, confidence, {}))
+    return verdicts
+
+def _verdict_from_fake_prob(fake_prob):
+    """Maps the model's fake-class probability to a (result, confidence) pair"""
+    result = 'Fake' if fake_prob > 0.7 else 'Real'
+    confidence = fake_prob if result == 'Fake' else 1 - fake_prob
+    return result, confidence
+
+def get_result_cache_stats():
+    """Returns hit/miss statistics for the analysis result cache and the near-duplicate index"""
+    stats = result_cache.get_stats()
+    stats["near_duplicates"] = near_duplicate_index.get_stats()
+    return stats
+
+def get_local_model_stats():
+    """Returns routing, latency, memory and micro-batching statistics for every local model backend"""
+    stats = backend_registry.get_stats()
+    stats["token_cache"] = token_cache.get_stats()
+    return stats
+
+def _token_cache_lookups():
+    stats = token_cache.get_stats()
+    return {"hit": stats["hits"], "prefetched": stats["prefetch_hits"], "miss": stats["misses"]}
+
+def _result_cache_lookups():
+    stats = result_cache.get_stats()
+    return {"memory": stats["memory_hits"], "disk": stats["disk_hits"], "miss": stats["misses"]}
+
+def _near_duplicate_lookups():
+    stats = near_duplicate_index.get_stats()
+    return {"hit": stats["hits"], "miss": stats["lookups"] - stats["hits"]}
+
+def _load_transformer(backend):
+    try:
+        return load_model(backend)
     except Exception as e:
-        print(f"Error during prediction: {e}")
-        # Ultimate fallback
-        return "Uncertain", 0.5
\ No newline at end of file
+        # load_model already falls back on errors; this covers a failed import
+        print(f"Error loading model: {e}")
+        return create_fallback_model()
+
+def _register_backends():
+    """Creates the registry of local classifier backends; each loads on first use"""
+    registry = BackendRegistry(LOCAL_MODEL_BACKEND, parse_routes(LOCAL_MODEL_ROUTES))
+    # Concurrent requests to a backend are queued and scored together in one forward pass
+    batching = {
+        "max_batch_size": int(os.getenv("LOCAL_MODEL_MAX_BATCH_SIZE", 16)),
+        "max_wait_ms": float(os.getenv("LOCAL_MODEL_MAX_WAIT_MS", 5))
+    }
+    
+    def is_fallback(handle):
+        return hasattr(handle[1], 'fake_count')
+    
+    registry.register(ClassifierBackend(
+        "tf", lambda: _load_transformer("tf"), _predict_batch_with_transformer, _transformer_version,
+        fallback_fn=is_fallback, prefetch_fn=_prefetch_tokens, description="Full-precision TensorFlow transformer",
+        expected_version_fn=_expected_transformer_version, **batching))
+    registry.register(ClassifierBackend(
+        "tflite", lambda: _load_transformer("tflite"), _predict_batch_with_transformer, _transformer_version,
+        fallback_fn=is_fallback, prefetch_fn=_prefetch_tokens,
+        description=f"TFLite transformer ({TFLITE_QUANTIZATION} quantization)",
+        expected_version_fn=lambda: _expected_transformer_version(TFLITE_QUANTIZATION), **batching))
+    registry.register(ClassifierBackend(
+        "lexicon", get_default_lexicon, lambda lexicon, articles: _predict_batch_with_keywords(articles, lexicon),
+        lambda lexicon: "lexicon", description="Weighted phrase matching, no model weights",
+        expected_version_fn=lambda: "lexicon", **batching))
+    return registry.validate(fallback_default="tf")
+
+backend_registry = _register_backends()
+
+# Read from the existing statistics when /metrics is scraped
+metrics.callback_counter(
+    "verinews_result_cache_lookups_total", "Analysis result cache lookups by outcome (hit tier or miss)",
+    _result_cache_lookups, ["outcome"])
+metrics.callback_counter(
+    "verinews_near_duplicate_lookups_total", "Near-duplicate index lookups by outcome (hit or miss)",
+    _near_duplicate_lookups, ["outcome"])
+metrics.callback_counter(
+    "verinews_token_cache_lookups_total", "Token ID cache lookups by outcome (hit, prefetched or miss)",
+    _token_cache_lookups, ["outcome"])
+metrics.gauge(
+    "verinews_local_model_queue_depth", "Articles waiting for a local model micro-batcher, by backend",
+    ["backend"], callback=lambda: {name: backend_registry.get(name).batcher.get_stats()["queue_depth"]
+                                   for name in backend_registry.names()})
+metrics.gauge(
+    "verinews_local_model_ready", "1 when the local model is loaded and warmed up",
+    callback=lambda: int(get_model_status()["ready"]))
+
+# Bounded pool for the Gemini calls of single (interactive) analyses
+_gemini_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GEMINI_MAX_CONCURRENCY", 4)),
+    thread_name_prefix="gemini"
+)
+
+# Separate pool for batch analyses, so a large batch cannot starve interactive requests
+_batch_gemini_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GEMINI_BATCH_MAX_CONCURRENCY", 2)),
+    thread_name_prefix="gemini-batch"
+)
@@ -0,0 +1,217 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+FINGERPRINT_BITS = 64
+# Lookups compare fingerprints sharing a band, i.e. a 16-bit slice of the fingerprint
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+_BAND_MASK = (1 << BAND_BITS) - 1
+_WORD = re.compile(r'\w+')
+_BIT_POSITIONS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+
+def normalize_words(text):
+    """Lowercased NFKC words of a text, ignoring punctuation and whitespace"""
+    if not text:
+        return []
+    return _WORD.findall(unicodedata.normalize("NFKC", str(text)).lower())
+
+
+def simhash(words, shingle_size=2):
+    """
+    64-bit SimHash of a word sequence.
+
+    Every run of shingle_size words is hashed to 64 bits; each bit of the fingerprint
+    is set if more shingle hashes have it set than not. Texts that share most of their
+    shingles get fingerprints that differ in few bits.
+    """
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    hashes = np.array([int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+                       for shingle in shingles], dtype=np.uint64)
+    bits = (hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.sum(np.left_shift(np.uint64(1), _BIT_POSITIONS[majority]), dtype=np.uint64))
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    SimHash index that finds earlier articles within max_distance bits of a new one.
+
+    Lookups use banding: the 64-bit fingerprint is cut into four 16-bit bands, and two
+    fingerprints within max_distance bits differ in at most max_distance // 4 bits in at
+    least one band (pigeonhole). A lookup therefore probes, per band, the buckets of the
+    band values within that many bits and only compares the articles found there. With
+    max_distance up to 3 that is one bucket per band, up to 7 it is 17. Each entry maps
+    a fingerprint to a value (e.g. the cache key of the article's analysis) within a
+    namespace, so analyses made with different settings are never matched. The index
+    keeps the max_entries most recently added or matched fingerprints.
+    """
+
+    def __init__(self, max_distance=5, max_entries=200000, min_words=40, shingle_size=2, enabled=True):
+        # Beyond 11 bits a lookup would have to probe more than two bits per band
+        self.max_distance = max(0, min(int(max_distance), 3 * BANDS - 1))
+        self.max_entries = max(0, int(max_entries))
+        self.min_words = int(min_words)
+        self.shingle_size = max(1, int(shingle_size))
+        self.enabled = enabled
+
+        # XOR masks of the band values probed around a band value
+        radius = self.max_distance // BANDS
+        single = [1 << bit for bit in range(BAND_BITS)]
+        self._probes = [0]
+        if radius >= 1:
+            self._probes += single
+        if radius >= 2:
+            self._probes += [a | b for i, a in enumerate(single) for b in single[i + 1:]]
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (namespace, fingerprint) -> value
+        self._buckets = {}              # namespace -> {band << 16 | band value: [fingerprints]}
+
+        self.lookups = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.candidates = 0
+        self.evictions = 0
+        self.discarded = 0
+        self.skipped_short = 0
+
+    def fingerprint(self, text):
+        """Returns the SimHash of a text, or None if the index is off or the text is too short to match reliably"""
+        if not self.enabled or self.max_entries == 0:
+            return None
+        words = normalize_words(text)
+        if len(words) < self.min_words:
+            with self._lock:
+                self.skipped_short += 1
+            return None
+        return simhash(words, self.shingle_size)
+
+    @staticmethod
+    def _band_keys(fingerprint):
+        return [band << BAND_BITS | (fingerprint >> (band * BAND_BITS)) & _BAND_MASK for band in range(BANDS)]
+
+    def add(self, fingerprint, value, namespace=""):
+        """Indexes a fingerprint; a fingerprint already present is refreshed with the new value"""
+        if fingerprint is None or self.max_entries == 0:
+            return
+        key = (namespace, fingerprint)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                buckets = self._buckets.setdefault(namespace, {})
+                for band_key in self._band_keys(fingerprint):
+                    buckets.setdefault(band_key, []).append(fingerprint)
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._remove_from_buckets(*old_key)
+                self.evictions += 1
+
+    def _remove_from_buckets(self, namespace, fingerprint):
+        buckets = self._buckets.get(namespace, {})
+        for band_key in self._band_keys(fingerprint):
+            bucket = buckets.get(band_key)
+            if bucket is not None and fingerprint in bucket:
+                bucket.remove(fingerprint)
+                if not bucket:
+                    del buckets[band_key]
+        if not buckets:
+            self._buckets.pop(namespace, None)
+
+    def lookup(self, fingerprint, namespace=""):
+        """
+        Finds the closest indexed fingerprint within max_distance bits.
+
+        Returns:
+            tuple: (value, distance, matched_fingerprint), or (None, None, None) if there
+                   is no near duplicate
+        """
+        if fingerprint is None:
+            return None, None, None
+        with self._lock:
+            self.lookups += 1
+            exact = self._entries.get((namespace, fingerprint))
+            if exact is not None:
+                self._entries.move_to_end((namespace, fingerprint))
+                self.hits += 1
+                self.exact_hits += 1
+                return exact, 0, fingerprint
+            best, best_distance = None, None
+            seen = set()
+            buckets = self._buckets.get(namespace, {})
+            for band_key in self._band_keys(fingerprint):
+                for probe in self._probes:
+                    for candidate in buckets.get(band_key ^ probe, ()):
+                        if candidate in seen:
+                            continue
+                        seen.add(candidate)
+                        distance = hamming_distance(fingerprint, candidate)
+                        if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                            best, best_distance = candidate, distance
+            self.candidates += len(seen)
+            if best is None:
+                return None, None, None
+            self._entries.move_to_end((namespace, best))
+            self.hits += 1
+            return self._entries[(namespace, best)], best_distance, best
+
+    def discard(self, fingerprint, namespace=""):
+        """Removes a fingerprint, e.g. once the analysis it points to is gone"""
+        with self._lock:
+            if self._entries.pop((namespace, fingerprint), None) is not None:
+                self._remove_from_buckets(namespace, fingerprint)
+                self.discarded += 1
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def get_stats(self):
+        """Returns index size and lookup counters for diagnostics"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "probes_per_band": len(self._probes),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "avg_candidates": round(self.candidates / self.lookups, 2) if self.lookups else 0.0,
+                "evictions": self.evictions,
+                "discarded": self.discarded,
+                "skipped_short": self.skipped_short
+            }
+
+
+# Shared index of analyzed articles, pointing at their result cache entries
+near_duplicate_index = NearDuplicateIndex(
+    max_distance=int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", 5)),
+    max_entries=int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", 200000)),
+    min_words=int(os.getenv("NEAR_DUPLICATE_MIN_WORDS", 40)),
+    shingle_size=int(os.getenv("NEAR_DUPLICATE_SHINGLE_SIZE", 2)),
+    enabled=os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() in ("1", "true", "yes")
+)
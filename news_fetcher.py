@@ -1,10 +1,53 @@
 import requests
 import os
+import http_client
+import metrics
+import threading
+import time
+from collections import OrderedDict
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# News cache settings: seconds before a cached feed is refreshed (search results
+# have their own TTL) and the maximum number of cached feeds
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", 300))
+NEWS_CACHE_SEARCH_TTL = float(os.getenv("NEWS_CACHE_SEARCH_TTL", 120))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", 256))
+# Seconds an empty feed is cached when there is no earlier good result to fall back on,
+# so a feed that was first fetched during an outage is retried soon
+NEWS_CACHE_EMPTY_TTL = float(os.getenv("NEWS_CACHE_EMPTY_TTL", 15))
+# Longest a request waits for another request's fetch of the same feed
+NEWS_FETCH_WAIT = 30
+
+# Provider endpoints (overridable, e.g. to point the benchmarks at local stub servers)
+NEWSDATA_API_URL = os.getenv("NEWSDATA_API_URL", "https://newsdata.io/api/1/news")
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/top-headlines")
+
+# (country, category, search term, page size, page) -> {'articles', 'fetched_at', 'ttl'}
+_news_cache = OrderedDict()
+_news_cache_lock = threading.Lock()
+_refreshing_keys = set()
+# Feeds being fetched on a cache miss -> event set once the fetch is stored
+_inflight_fetches = {}
+_news_cache_stats = {
+    'hits': 0,
+    'stale_hits': 0,
+    'misses': 0,
+    'coalesced_misses': 0,
+    'empty_results': 0,
+    'background_refreshes': 0,
+    'kept_stale_on_error': 0,
+    'evictions': 0
+}
+
+# Upstream fetch latency and failures per news provider
+NEWS_FETCH_SECONDS = metrics.histogram(
+    "verinews_news_fetch_seconds", "Latency of upstream news API requests", ["provider"])
+NEWS_FETCH_ERRORS = metrics.counter(
+    "verinews_news_fetch_errors_total", "Failed upstream news API requests", ["provider"])
+
 # Dictionary mapping country codes to country names for UI display
 COUNTRIES = {
     'ar': 'Argentina', 'au': 'Australia', 'at': 'Austria', 'be': 'Belgium',
@@ -47,6 +90,125 @@ def get_available_categories():
     return CATEGORIES
 
 def fetch_live_news(country_code='us', category=None, search_term=None, page_size=10, page=None):
+    """
+    Fetch news articles, served from a TTL cache with stale-while-revalidate.
+    
+    Fresh cache entries are returned immediately. Expired entries are also returned
+    immediately while a background thread refreshes them, and a refresh that comes
+    back empty (e.g. during an upstream outage) keeps the last good result. Concurrent
+    misses for the same feed share one upstream fetch.
+    
+    Args:
+        country_code (str): Two-letter country code (ISO 3166-1)
+        category (str, optional): News category (business, entertainment, health, etc.)
+        search_term (str, optional): Keyword to search for
+        page_size (int): Number of articles to retrieve (max 10 for free tier)
+        page (str): Page token for pagination
+    
+    Returns:
+        list: List of news articles with title, description, source, etc.
+    """
+    key = (country_code, category or None, search_term or None, page_size, page or None)
+    
+    with _news_cache_lock:
+        entry = _news_cache.get(key)
+        if entry is not None:
+            _news_cache.move_to_end(key)
+            if time.time() - entry['fetched_at'] < entry['ttl']:
+                _news_cache_stats['hits'] += 1
+                return list(entry['articles'])
+            
+            # Serve the stale copy and refresh it in the background (once per key)
+            _news_cache_stats['stale_hits'] += 1
+            if key not in _refreshing_keys:
+                _refreshing_keys.add(key)
+                threading.Thread(target=_refresh_news_cache, args=(key,),
+                                 name="news-refresh", daemon=True).start()
+            return list(entry['articles'])
+        
+        _news_cache_stats['misses'] += 1
+        inflight = _inflight_fetches.get(key)
+        if inflight is None:
+            inflight = _inflight_fetches[key] = threading.Event()
+            leader = True
+        else:
+            _news_cache_stats['coalesced_misses'] += 1
+            leader = False
+    
+    if not leader:
+        # Another request is already fetching this feed; use its result
+        inflight.wait(NEWS_FETCH_WAIT)
+        with _news_cache_lock:
+            entry = _news_cache.get(key)
+            return list(entry['articles']) if entry is not None else []
+    
+    try:
+        articles = _fetch_live_news_uncached(country_code, category, search_term, page_size, page)
+        _store_news(key, articles)
+    finally:
+        with _news_cache_lock:
+            _inflight_fetches.pop(key, None)
+        inflight.set()
+    return list(articles)
+
+def _refresh_news_cache(key):
+    """Background refresh of one cached feed"""
+    try:
+        country_code, category, search_term, page_size, page = key
+        articles = _fetch_live_news_uncached(country_code, category, search_term, page_size, page)
+        _store_news(key, articles)
+        with _news_cache_lock:
+            _news_cache_stats['background_refreshes'] += 1
+    except Exception as e:
+        print(f"Error refreshing news cache for {key}: {e}")
+    finally:
+        with _news_cache_lock:
+            _refreshing_keys.discard(key)
+
+def _store_news(key, articles):
+    """
+    Caches a fetched feed, keeping the last good result if the new one is empty. An
+    empty feed without an earlier good result is only cached for NEWS_CACHE_EMPTY_TTL.
+    """
+    search_term = key[2]
+    ttl = NEWS_CACHE_SEARCH_TTL if search_term else NEWS_CACHE_TTL
+    with _news_cache_lock:
+        previous = _news_cache.get(key)
+        if not articles and previous is not None and previous['articles']:
+            # Upstream returned nothing (most likely an outage); keep serving the
+            # last good result and try again after another TTL
+            _news_cache_stats['kept_stale_on_error'] += 1
+            articles = previous['articles']
+        elif not articles:
+            _news_cache_stats['empty_results'] += 1
+            ttl = min(ttl, NEWS_CACHE_EMPTY_TTL)
+        
+        _news_cache[key] = {
+            'articles': articles,
+            'fetched_at': time.time(),
+            'ttl': ttl
+        }
+        _news_cache.move_to_end(key)
+        while len(_news_cache) > NEWS_CACHE_MAX_ENTRIES:
+            _news_cache.popitem(last=False)
+            _news_cache_stats['evictions'] += 1
+
+def get_news_cache_stats():
+    """Returns news cache statistics for monitoring"""
+    with _news_cache_lock:
+        stats = dict(_news_cache_stats)
+        stats['entries'] = len(_news_cache)
+        stats['max_entries'] = NEWS_CACHE_MAX_ENTRIES
+        stats['refreshing'] = len(_refreshing_keys)
+        return stats
+
+metrics.callback_counter(
+    "verinews_news_cache_lookups_total", "News feed cache lookups by outcome",
+    lambda: {outcome: _news_cache_stats[key] for outcome, key in
+             (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses"))},
+    ["outcome"])
+
+def _fetch_live_news_uncached(country_code='us', category=None, search_term=None, page_size=10, page=None):
     """
     Fetch live news articles from NewsData.io API.
     
@@ -67,7 +229,7 @@ def fetch_live_news(country_code='us', category=None, search_term=None, page_siz
             return _fetch_from_newsapi(country_code, category, search_term, page_size)
             
         # Base URL and parameters for NewsData.io API
-        url = 'https://newsdata.io/api/1/news'
+        url = NEWSDATA_API_URL
         params = {
             'apikey': api_key,
             'size': min(page_size, 10),  # Limit to max 10 as per API free tier restrictions
@@ -85,12 +247,14 @@ def fetch_live_news(country_code='us', category=None, search_term=None, page_siz
         if page:
             params['page'] = page
             
-        response = requests.get(url, params=params)
+        with NEWS_FETCH_SECONDS.time(provider="newsdata"):
+            response = http_client.get(url, params=params)
         response.raise_for_status()  # Raise exception for HTTP errors
         
         news_data = response.json()
         
         if news_data.get('status') != 'success':
+            NEWS_FETCH_ERRORS.inc(provider="newsdata")
             error_message = news_data.get('message', 'Unknown error')
             print(f"NewsData.io API Error: {error_message}")
             # Fall back to NewsAPI if there's an error
@@ -128,10 +292,12 @@ def fetch_live_news(country_code='us', category=None, search_term=None, page_siz
         return formatted_articles
         
     except requests.exceptions.RequestException as e:
+        NEWS_FETCH_ERRORS.inc(provider="newsdata")
         print(f"NewsData.io API Request Error: {e}")
         # Fall back to NewsAPI if there's a request error
         return _fetch_from_newsapi(country_code, category, search_term, page_size)
     except Exception as e:
+        NEWS_FETCH_ERRORS.inc(provider="newsdata")
         print(f"Unexpected Error with NewsData.io API: {e}")
         # Fall back to NewsAPI if there's any other error
         return _fetch_from_newsapi(country_code, category, search_term, page_size)
@@ -144,7 +310,7 @@ def _fetch_from_newsapi(country_code='us', category=None, search_term=None, page
             raise ValueError("NEWS_API_KEY not found in environment variables")
             
         # Base URL and parameters
-        url = 'https://newsapi.org/v2/top-headlines'
+        url = NEWSAPI_URL
         params = {
             'apiKey': api_key,
             'pageSize': min(page_size, 100),  # Limit to max 100 as per API restrictions
@@ -157,7 +323,8 @@ def _fetch_from_newsapi(country_code='us', category=None, search_term=None, page
         if search_term:
             params['q'] = search_term
             
-        response = requests.get(url, params=params)
+        with NEWS_FETCH_SECONDS.time(provider="newsapi"):
+            response = http_client.get(url, params=params)
         response.raise_for_status()  # Raise exception for HTTP errors
         
         news_data = response.json()
@@ -181,12 +348,15 @@ def _fetch_from_newsapi(country_code='us', category=None, search_term=None, page
         return articles
         
     except requests.exceptions.RequestException as e:
+        NEWS_FETCH_ERRORS.inc(provider="newsapi")
         print(f"NewsAPI Request Error: {e}")
         return []
     except ValueError as e:
+        NEWS_FETCH_ERRORS.inc(provider="newsapi")
         print(f"Value Error: {e}")
         return []
     except Exception as e:
+        NEWS_FETCH_ERRORS.inc(provider="newsapi")
         print(f"Unexpected Error with NewsAPI: {e}")
         return []
 
@@ -0,0 +1,209 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def normalize_text(text):
+    """Normalizes text for cache keys: Unicode NFKC, collapsed whitespace, trimmed"""
+    if not text:
+        return ""
+    return re.sub(r'\s+', ' ', unicodedata.normalize("NFKC", str(text))).strip()
+
+
+def make_cache_key(content, title=None, source=None, use_gemini=False, model_version=""):
+    """Returns a content-addressed key (SHA-256 hex digest) for an analysis request"""
+    payload = json.dumps([
+        normalize_text(content),
+        normalize_text(title),
+        normalize_text(source),
+        bool(use_gemini),
+        model_version
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of analysis results.
+
+    The first tier is a bounded in-memory LRU. The optional second tier is a SQLite
+    database so results survive restarts. Both tiers expire entries after the TTL;
+    the SQLite tier is trimmed to max_db_entries by least recent access.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=21600, db_path=None, max_db_entries=100000):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.db_path = db_path
+        self.max_db_entries = int(max_db_entries)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._db = None
+        self._db_writes = 0
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Error opening result cache database {db_path}: {e}")
+            self._db = None
+
+    def get(self, key):
+        """
+        Look up a cached result.
+
+        Returns:
+            tuple: (value, tier) where tier is 'memory' or 'disk', or (None, None) on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return copy.deepcopy(value), "memory"
+                del self._memory[key]
+                self.expired += 1
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and row[1] > now:
+                        self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        value = json.loads(row[0])
+                        self._put_memory(key, row[1], value)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return copy.deepcopy(value), "disk"
+                    if row is not None:
+                        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                        self._db.commit()
+                        self.expired += 1
+                except (sqlite3.Error, ValueError) as e:
+                    print(f"Result cache read error: {e}")
+
+            self.misses += 1
+            return None, None
+
+    def set(self, key, value):
+        """Store a JSON-serializable result in both tiers"""
+        expires_at = time.time() + self.ttl_seconds
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._put_memory(key, expires_at, value)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO results (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(value), expires_at, time.time())
+                    )
+                    self._db_writes += 1
+                    # Trimming needs a COUNT(*), so only do it every so often
+                    if self._db_writes % 100 == 0:
+                        self._trim_db()
+                    self._db.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    print(f"Result cache write error: {e}")
+
+    def _put_memory(self, key, expires_at, value):
+        if self.max_entries == 0:
+            return
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _trim_db(self):
+        self._db.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = count - self.max_db_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def reopen(self):
+        """Opens a fresh SQLite connection, e.g. in a worker forked after the cache was created"""
+        with self._lock:
+            if self.db_path:
+                self._open_db(self.db_path)
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def get_stats(self):
+        """Returns cache counters for diagnostics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": self._db is not None
+            }
+            if self._db is not None:
+                try:
+                    stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                except sqlite3.Error:
+                    stats["disk_entries"] = None
+            return stats
+
+
+# Shared cache of predict_fake_news results
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", 21600)),
+    db_path=os.getenv("RESULT_CACHE_DB") or None,
+    max_db_entries=int(os.getenv("RESULT_CACHE_DB_MAX_ENTRIES", 100000))
+)
@@ -0,0 +1,228 @@
+"""
+Pre-fork multi-worker server for VeriNews.
+
+The parent process imports the app, loads and warms up the local model backends once,
+freezes the garbage collector and forks SERVE_WORKERS workers that accept connections
+on one shared listening socket. The workers share the model weights copy-on-write, so
+adding a worker costs little memory and no load time. The parent only supervises:
+it restarts workers that die and stops them all on SIGTERM or Ctrl-C.
+
+Thread pools are sized per worker so the workers do not fight over the same cores:
+TF_INTRA_OP_THREADS and TF_INTER_OP_THREADS (both default 1) are applied to TensorFlow,
+and the TFLite interpreter gets CPU count / workers threads (or TF_INTRA_OP_THREADS if
+set). TensorFlow's thread pools do not survive fork, so the full-precision "tf" backend
+is only loaded in the parent when both TensorFlow counts are 1 (ops then run on the
+calling thread, and the workers provide the parallelism); raising either makes every
+worker load its own copy after the fork, which the startup report says. The TFLite and
+lexicon backends are always shared. Convert TFLite artifacts before the first pre-fork start
+(e.g. by running the app once), since conversion starts TensorFlow in the parent.
+The parent never contacts Gemini either, since gRPC channels are not fork-safe: every
+worker creates its own Gemini client and runs its own health check.
+
+Other pre-fork servers (e.g. gunicorn with preload_app) can call prepare_parent()
+before forking and init_worker() in each worker.
+
+Usage:
+    python serve.py [--workers 4] [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SERVE_HOST = os.getenv("SERVE_HOST", "127.0.0.1")
+SERVE_PORT = int(os.getenv("SERVE_PORT", 8000))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", 0)) or os.cpu_count() or 1
+# Load the model in the parent and share it with the workers (otherwise each worker loads its own)
+SERVE_PRELOAD = os.getenv("SERVE_PRELOAD", "true").lower() in ("1", "true", "yes")
+# Per-worker thread counts. More than one TensorFlow thread keeps the tf backend from
+# being shared, so intra-op defaults to 1 (and TFLite, always shared, to CPU count / workers)
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", 0))
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", 1))
+
+
+def configure_threads(workers, intra_op_threads=None, inter_op_threads=None):
+    """
+    Sets the per-worker thread counts through the environment. Must run before
+    TensorFlow and the model module are imported.
+
+    Returns:
+        tuple: (intra_op_threads, inter_op_threads)
+    """
+    per_worker = max(1, (os.cpu_count() or 1) // workers)
+    intra = intra_op_threads or TF_INTRA_OP_THREADS or 1
+    inter = inter_op_threads or TF_INTER_OP_THREADS or 1
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra)
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(inter)
+    os.environ.setdefault("OMP_NUM_THREADS", str(intra))
+    os.environ.setdefault("LOCAL_MODEL_TFLITE_THREADS", str(intra_op_threads or TF_INTRA_OP_THREADS or per_worker))
+    # The Rust tokenizer's own thread pool does not survive fork either
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    return intra, inter
+
+
+def defer_background_threads():
+    """
+    Keeps the app from starting its background threads (model warm-up, ingestion,
+    Gemini health check) when it is imported in the parent. Threads do not survive
+    fork, so init_worker() starts them per worker instead. Must run before the app
+    is imported; ingestion itself stays enabled so every worker serves the store.
+    """
+    os.environ["INGESTION_AUTOSTART"] = "false"
+    os.environ["LOCAL_MODEL_WARMUP"] = "false"
+    # Gemini's gRPC channels are not fork-safe, so the parent does not check Gemini at all
+    os.environ["GEMINI_HEALTH_STARTUP_CHECK"] = "false"
+
+
+def prepare_parent(preload=True, share_tf=False):
+    """
+    Loads and warms up the local model backends in the parent before forking.
+
+    Returns:
+        list: Names of the backends the workers have to load themselves
+    """
+    import model
+
+    deferred = []
+    shared = []
+    for backend in model.backend_registry.routed_backends():
+        if not preload or (backend.name == "tf" and not share_tf):
+            deferred.append(backend.name)
+            continue
+        print(f"Loading the {backend.name} backend in the parent...")
+        backend.warm_up()
+        shared.append(backend.name)
+    print(f"Backends shared with every worker: {', '.join(shared) or 'none'}; "
+          f"loaded separately in each worker: {', '.join(deferred) or 'none'}")
+    if "tf" in deferred and preload:
+        print("The tf backend is NOT shared: every worker loads its own copy, since TensorFlow thread "
+              "pools with more than one thread do not survive fork (set TF_INTRA_OP_THREADS=1 and "
+              "TF_INTER_OP_THREADS=1 to share it)")
+
+    # Objects that exist now are never collected, so the collector does not write to
+    # (and un-share) the pages holding them in every worker
+    gc.collect()
+    gc.freeze()
+    return deferred
+
+
+def init_worker(index, deferred=(), ingestion=False):
+    """Re-initializes per-process state in a freshly forked worker"""
+    from result_cache import result_cache
+    from diagnostics_store import diagnostics_store
+    from ingestion import article_store, ingestion_worker
+    from gemini_health import health_monitor
+    from gemini_analyze import reset_gemini_after_fork
+    import model
+
+    result_cache.reopen()
+    diagnostics_store.reopen()
+    article_store.reopen()
+    # The parent never talks to Gemini, but drop anything it may have set up anyway:
+    # gRPC channels do not survive fork
+    reset_gemini_after_fork()
+    health_monitor.reset_after_fork()
+    health_monitor.refresh_async()
+    # One worker keeps the feeds fresh; share INGESTION_DB so the others can serve them
+    if ingestion and index == 0:
+        ingestion_worker.start()
+    if deferred:
+        def warm_up_deferred():
+            for name in deferred:
+                model.backend_registry.get(name).warm_up()
+        threading.Thread(target=warm_up_deferred, name="model-warmup", daemon=True).start()
+
+
+def run_worker(index, listener, deferred, ingestion):
+    from werkzeug.serving import make_server
+    from app import app
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The parent handles Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    init_worker(index, deferred, ingestion)
+
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    print(f"Worker {index} (pid {os.getpid()}) serving on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except SystemExit:
+        pass
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--no-preload", action="store_true", help="Load the model in every worker instead")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    intra, inter = configure_threads(workers)
+    preload = SERVE_PRELOAD and not args.no_preload
+    print(f"Starting {workers} workers ({intra} intra-op / {inter} inter-op TensorFlow threads and "
+          f"{os.environ['LOCAL_MODEL_TFLITE_THREADS']} TFLite threads each, preload {'on' if preload else 'off'})")
+
+    defer_background_threads()
+    import app  # noqa: F401  (imported before forking so the workers share it)
+    from ingestion import INGESTION_ENABLED
+
+    deferred = prepare_parent(preload, share_tf=(intra == 1 and inter == 1))
+
+    listener = socket.create_server((args.host, args.port), backlog=128)
+    listener.set_inheritable(True)
+
+    children = {}
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = run_worker(index, listener, deferred, INGESTION_ENABLED)
+            finally:
+                os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {index} (pid {pid}) exited with status {status}; restarting it")
+            time.sleep(1)
+            if not stopping:
+                spawn(index)
+    listener.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
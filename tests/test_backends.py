@@ -0,0 +1,50 @@
+import pytest
+
+from backends import BackendRegistry, parse_routes
+
+
+class StubBackend:
+    def __init__(self, name):
+        self.name = name
+
+    def get_stats(self):
+        return {}
+
+
+def make_registry(default, routes):
+    registry = BackendRegistry(default, parse_routes(routes))
+    for name in ("tf", "tflite", "lexicon"):
+        registry.register(StubBackend(name))
+    return registry
+
+
+def test_parse_routes_skips_malformed_rules():
+    assert parse_routes("endpoint:ingestion=lexicon, chars<400=tflite,bogus,chars>=9000=tf") == [
+        ("endpoint", "==", "ingestion", "lexicon"),
+        ("chars", "<", 400, "tflite"),
+        ("chars", ">=", 9000, "tf")
+    ]
+
+
+def test_select_prefers_requested_then_routes_then_default():
+    registry = make_registry("tf", "endpoint:ingestion=lexicon,chars<10=tflite")
+    assert registry.select("short", endpoint="ingestion").name == "lexicon"
+    assert registry.select("short", endpoint="api").name == "tflite"
+    assert registry.select("long enough text", endpoint="api").name == "tf"
+    assert registry.select("short", endpoint="ingestion", requested="tf").name == "tf"
+    with pytest.raises(ValueError):
+        registry.select(requested="onnx")
+
+
+def test_validate_drops_routes_to_unknown_backends():
+    registry = make_registry("tf", "endpoint:ingestion=lexcion,chars<10=tflite").validate(fallback_default="tf")
+    assert registry.get_stats()["routes"] == ["chars<10=tflite"]
+    # The misspelt route no longer makes matching requests fail
+    assert registry.select("a long ingestion text", endpoint="ingestion").name == "tf"
+    assert [backend.name for backend in registry.routed_backends()] == ["tf", "tflite"]
+
+
+def test_validate_replaces_an_unknown_default():
+    registry = make_registry("tff", "").validate(fallback_default="tf")
+    assert registry.default.name == "tf"
+    assert registry.get_stats()["default"] == "tf"
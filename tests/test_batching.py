@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def test_results_go_back_to_their_callers():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_batch_size=4, max_wait_ms=20)
+    futures = [batcher.submit(i) for i in range(10)]
+    assert [future.result(timeout=5) for future in futures] == [i * 2 for i in range(10)]
+
+    stats = batcher.get_stats()
+    assert stats["items"] == 10
+    assert stats["largest_batch"] <= 4
+    assert sum(size * count for size, count in stats["batch_size_counts"].items()) == 10
+
+
+def test_concurrent_callers_share_a_batch():
+    release = threading.Event()
+    batches = []
+
+    def batch_fn(items):
+        # Hold the first batch so the remaining items queue up behind it
+        release.wait(5)
+        batches.append(list(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+    first = batcher.submit("first")
+    rest = [batcher.submit(i) for i in range(5)]
+    release.set()
+
+    assert first.result(timeout=5) == "first"
+    assert [future.result(timeout=5) for future in rest] == list(range(5))
+    assert any(len(batch) > 1 for batch in batches)
+
+
+def test_a_failing_batch_fails_every_caller_and_the_worker_survives():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise RuntimeError("model exploded")
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="model exploded"):
+        batcher.predict("a", timeout=5)
+    assert batcher.predict("b", timeout=5) == "b"
+    assert batcher.get_stats()["errors"] == 1
+
+
+def test_wrong_number_of_results_is_an_error():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=1, max_wait_ms=0)
+    with pytest.raises(ValueError, match="0 results for 1 items"):
+        batcher.predict("a", timeout=5)
@@ -0,0 +1,75 @@
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryPolicy
+
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=60)
+    for _ in range(2):
+        breaker.record_failure("boom")
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure("boom")
+    # The success reset the count, so two more failures keep it closed
+    assert breaker.state == CLOSED
+
+    breaker.record_failure("boom")
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    stats = breaker.get_stats()
+    assert (stats["trips"], stats["rejected"], stats["last_failure"]) == (1, 1, "boom")
+    assert 0 < stats["seconds_until_half_open"] <= 60
+
+
+def test_half_open_allows_limited_trials_and_closes_on_success():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0, half_open_max_calls=1)
+    breaker.record_failure()
+    assert breaker.state == HALF_OPEN
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=5, recovery_timeout=60)
+    for _ in range(5):
+        breaker.record_failure()
+    breaker.recovery_timeout = 0
+    assert breaker.allow_request()
+
+    breaker.recovery_timeout = 60
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.get_stats()["trips"] == 2
+
+
+def test_release_gives_back_an_abandoned_trial():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_retry_delays_grow_exponentially_up_to_max_delay():
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0, multiplier=2.0, jitter=False, max_total_delay=100)
+    assert [policy.delay(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 3.0]
+    assert policy.get_stats()["retries"] == 4
+
+
+def test_jitter_stays_within_the_backoff():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10, jitter=True, max_total_delay=100)
+    for _ in range(50):
+        assert 0 <= policy.delay(2) <= 4.0
+
+
+def test_retry_budget_caps_the_total_wait():
+    policy = RetryPolicy(base_delay=1.0, jitter=False, max_total_delay=2.5)
+    assert policy.delay(0, waited_so_far=0.0) == 1.0
+    assert policy.delay(1, waited_so_far=1.0) is None
+    assert policy.get_stats()["budget_exhausted"] == 1
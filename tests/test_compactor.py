@@ -0,0 +1,62 @@
+from compactor import GAP_MARKER, PromptCompactor, estimate_tokens, split_sentences
+from lexicon import Lexicon
+
+
+def make_compactor(**kwargs):
+    return PromptCompactor(lexicon=Lexicon({"miracle cure": 1.0}), **kwargs)
+
+
+def test_split_sentences_keeps_abbreviations_and_paragraphs():
+    text = "Mr. Smith met Gen. Lee today. They talked.\n\nA new paragraph starts here."
+    assert split_sentences(text) == [
+        (0, "Mr. Smith met Gen. Lee today."),
+        (0, "They talked."),
+        (1, "A new paragraph starts here.")
+    ]
+
+
+def test_drops_duplicates_boilerplate_title_and_inline_noise():
+    text = ("Storm Hits Coast. The storm reached the coast on Monday. Advertisement\n\n"
+            "The storm reached the coast on Monday! Read more: our coverage of the storm. "
+            "Officials said 3,000 homes lost power [+1234 chars]")
+    compacted, report = make_compactor(token_budget=1000).compact(text, title="Storm hits coast")
+
+    assert compacted == "The storm reached the coast on Monday.\n\nOfficials said 3,000 homes lost power"
+    assert (report["duplicates"], report["boilerplate"], report["dropped_for_budget"]) == (1, 3, 0)
+
+
+def test_over_budget_keeps_claim_dense_sentences_in_order_with_gap_markers():
+    filler = " ".join(f"The weather was nice and people walked around town number{i} slowly." for i in range(30))
+    claim = "The minister said 45% of the 2,000 clinics sell a miracle cure, according to Reuters."
+    text = f"It was a quiet day in the city. Nothing much happened at first. {filler} {claim} {filler}"
+
+    compacted, report = make_compactor(token_budget=60).compact(text)
+
+    assert claim in compacted
+    assert GAP_MARKER in compacted
+    assert estimate_tokens(compacted) <= 60 + 10
+    assert report["dropped_for_budget"] > 0
+    assert compacted.index("It was a quiet day") < compacted.index(claim)
+
+
+def test_all_boilerplate_falls_back_to_the_original_text():
+    text = "Advertisement\n\nSubscribe to our newsletter."
+    compacted, report = make_compactor().compact(text)
+    assert compacted == text
+    assert report["boilerplate"] == 2
+
+
+def test_disabled_compactor_passes_text_through():
+    compacted, report = make_compactor(enabled=False).compact("Some text. Some text.")
+    assert compacted == "Some text. Some text."
+    assert report == {"enabled": False, "original_tokens": 6}
+
+
+def test_shadow_comparisons_are_aggregated():
+    compactor = make_compactor()
+    assert compactor.record_shadow({"ratio": 0.5}, 6, 8) == -2
+    compactor.record_shadow({"ratio": 0.5}, 7, 6)
+
+    shadow = compactor.get_stats()["shadow"]
+    assert (shadow["comparisons"], shadow["mean_abs_delta"], shadow["max_abs_delta"]) == (2, 1.5, 2)
+    assert [entry["delta"] for entry in shadow["recent"]] == [-2, 1]
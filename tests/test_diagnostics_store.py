@@ -0,0 +1,75 @@
+import pytest
+
+from diagnostics_store import DiagnosticsStore
+
+
+def make_records(store):
+    ok = store.save({"time": "t1", "duration_ms": 100, "predict_result": "Real"})
+    slow = store.save({"time": "t2", "duration_ms": 2000, "stream_duration_ms": 1500})
+    failed = store.save({"time": "t3", "duration_ms": 50, "gemini_error": "timeout"})
+    return ok, slow, failed
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    db_path = str(tmp_path / "diagnostics.db") if request.param == "sqlite" else None
+    return DiagnosticsStore(max_entries=10, db_path=db_path, slow_ms=3000)
+
+
+def test_save_get_and_update(store):
+    record_id = store.save({"duration_ms": 10, "steps": ["cache"]})
+    record = store.get(record_id)
+    assert record["id"] == record_id
+    assert record["steps"] == ["cache"]
+
+    # get() hands out copies
+    record["steps"].append("model")
+    assert store.get(record_id)["steps"] == ["cache"]
+
+    assert store.update(record_id, {"stream_duration_ms": 5})
+    assert DiagnosticsStore.duration_ms(store.get(record_id)) == 15
+    assert not store.update("unknown", {"x": 1})
+    assert store.get("unknown") is None
+    assert store.get(None) is None
+
+
+def test_recent_filters_by_kind_newest_first(store):
+    ok, slow, failed = make_records(store)
+    assert [r["id"] for r in store.recent()] == [failed, slow, ok]
+    assert [r["id"] for r in store.recent("slow")] == [slow]
+    assert [r["id"] for r in store.recent("failed")] == [failed]
+    assert store.recent("failed")[0]["error"] == "timeout"
+    assert len(store.recent(limit=2)) == 2
+    with pytest.raises(ValueError):
+        store.recent("bogus")
+
+
+def test_recent_only_lists_the_given_ids(store):
+    ok, slow, failed = make_records(store)
+    assert [r["id"] for r in store.recent(ids=[ok, failed])] == [failed, ok]
+    assert [r["id"] for r in store.recent("failed", ids=[ok])] == []
+    assert store.recent(ids=[]) == []
+
+
+def test_memory_ring_buffer_is_bounded():
+    store = DiagnosticsStore(max_entries=2)
+    first = store.save({"duration_ms": 1})
+    store.save({"duration_ms": 2})
+    store.save({"duration_ms": 3})
+    assert store.get(first) is None
+    assert store.get_stats()["evictions"] == 1
+
+
+def test_records_outlive_the_memory_tier_in_sqlite(tmp_path):
+    db_path = str(tmp_path / "diagnostics.db")
+    record_id = DiagnosticsStore(db_path=db_path).save({"duration_ms": 10, "error": "boom"})
+
+    store = DiagnosticsStore(max_entries=0, db_path=db_path)
+    assert store.get(record_id)["error"] == "boom"
+    assert store.update(record_id, {"stream_duration_ms": 1})
+    assert DiagnosticsStore(db_path=db_path).get(record_id)["stream_duration_ms"] == 1
+    assert [r["id"] for r in store.recent("failed")] == [record_id]
+
+    store.clear()
+    assert store.get(record_id) is None
+    assert store.get_stats()["disk_entries"] == 0
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+import gemini_analyze
+from circuit_breaker import CircuitBreaker, RetryPolicy
+from gemini_analyze import GeminiStreamParser
+
+RESPONSE = json.dumps({
+    "credibility_score": 7,
+    "reasoning": 'The "source" is named.\nEmoji: \U0001F600 and café',
+    "recommendations": "Check the original report."
+})
+
+
+def feed_in_chunks(text, size):
+    parser = GeminiStreamParser()
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+    return parser
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 50])
+def test_stream_parser_handles_any_chunking(size):
+    parser = feed_in_chunks(RESPONSE, size)
+    result = parser.finish()
+    assert result["parse_method"] == "stream"
+    assert result["credibility_score"] == 7
+    assert result["reasoning"] == 'The "source" is named.\nEmoji: \U0001F600 and café'
+    assert result["recommendations"] == "Check the original report."
+
+
+def test_stream_parser_joins_a_surrogate_pair_split_between_chunks():
+    text = '{"credibility_score": 4, "reasoning": "smile \\ud83d\\ude00 end", "recommendations": ""}'
+    split = text.index("\\ude00") - 3
+    parser = GeminiStreamParser()
+    parser.feed(text[:split])
+    assert "\ud83d" not in parser.snapshot()["reasoning"]
+    parser.feed(text[split:])
+    assert parser.snapshot()["reasoning"] == "smile \U0001F600 end"
+
+
+def test_stream_parser_finds_keys_split_across_chunks():
+    parser = GeminiStreamParser()
+    parser.feed('{"credibility_sc')
+    parser.feed('ore": 3, "reaso')
+    parser.feed('ning": "Partly')
+    assert parser.snapshot() == {"credibility_score": 3, "reasoning": "Partly", "recommendations": ""}
+
+
+def test_stream_parser_reports_score_and_verdict_before_the_closing_brace():
+    parser = GeminiStreamParser()
+    assert not parser.feed('```json\n{"credibility_score": 8')
+    assert parser.score is None  # "8" could still become "80"
+    assert parser.feed(', "reasoning": "Well sourced')
+    assert parser.snapshot() == {"credibility_score": 8, "reasoning": "Well sourced", "recommendations": ""}
+
+
+def test_stream_parser_falls_back_to_parse_gemini_response():
+    parser = feed_in_chunks("Credibility score: 2. The claims are unsupported.", 5)
+    result = parser.finish()
+    assert result["credibility_score"] == 2
+    assert result["parse_method"] != "stream"
+
+
+class FlakyStream:
+    """A streamed response whose first attempts fail after the first chunk"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        failing = self.calls <= self.failures
+
+        class Chunk:
+            def __init__(self, text):
+                self.text = text
+
+        def chunks():
+            yield Chunk(RESPONSE[:30])
+            if failing:
+                raise ConnectionError("stream reset")
+            yield Chunk(RESPONSE[30:])
+
+        return chunks(), "gemini-test"
+
+
+@pytest.fixture
+def flaky_gemini(monkeypatch):
+    client = FlakyStream(failures=2)
+    monkeypatch.setattr(gemini_analyze.gemini_client, "generate_content", client.generate_content)
+    monkeypatch.setattr(gemini_analyze, "gemini_breaker", CircuitBreaker("test", failure_threshold=10))
+    monkeypatch.setattr(gemini_analyze, "gemini_retry_policy",
+                        RetryPolicy(max_retries=2, base_delay=0, jitter=False))
+    monkeypatch.setattr(gemini_analyze, "_prepare_gemini_request",
+                        lambda *args: ("prompt", {"enabled": False, "original_tokens": 1}, None))
+    return client
+
+
+def test_non_progressive_streaming_retries_mid_stream_failures(flaky_gemini):
+    result = gemini_analyze.analyze_with_gemini("article text", stream=True)
+    assert result["success"] is True
+    assert result["credibility_score"] == 7
+    assert flaky_gemini.calls == 3
+
+
+def test_progressive_stream_does_not_retry_after_showing_partials(flaky_gemini):
+    events = list(gemini_analyze.analyze_with_gemini_stream("article text"))
+    assert [event for event, _ in events[:-1]] == ["partial"]
+    assert events[-1][1]["success"] is False
+    assert flaky_gemini.calls == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from lexicon import DEFAULT_LEXICON_PATH, MAX_FAKE_PROB, Lexicon
+
+
+def test_matches_whole_phrases_case_insensitively_across_line_breaks():
+    lexicon = Lexicon({"secret": 1.0, "you won't believe": 2.0})
+    text = "You WON'T\nbelieve this secret. The secretary declined to comment. Another secret."
+    assert lexicon.match(text) == {"you won't believe": 1, "secret": 2}
+
+
+def test_prefers_the_longest_phrase_and_backs_off_at_word_boundaries():
+    lexicon = Lexicon({"fake": 1.0, "fake news": 1.0})
+    assert lexicon.match("this is fake news") == {"fake news": 1}
+    assert lexicon.match("a fake newsroom") == {"fake": 1}
+
+
+def test_score_sums_distinct_phrase_weights_and_is_capped():
+    lexicon = Lexicon({"shocking": 1.0, "miracle cure": 2.0})
+    result = lexicon.score("Shocking! Shocking! A miracle cure")
+    assert result["weight"] == 3.0
+    assert result["hits"] == {"shocking": 2, "miracle cure": 1}
+    assert result["fake_prob"] == pytest.approx(0.6)
+
+    assert Lexicon({"hoax": 10.0}).score("hoax")["fake_prob"] == MAX_FAKE_PROB
+    assert lexicon.score("A calm report")["fake_prob"] == 0.0
+    assert [r["weight"] for r in lexicon.score_batch(["shocking", ""])] == [1.0, 0.0]
+
+
+def test_empty_lexicon_matches_nothing():
+    lexicon = Lexicon({})
+    assert len(lexicon) == 0
+    assert lexicon.score("anything")["hits"] == {}
+
+
+def test_from_file_reads_weights_and_skips_comments(tmp_path):
+    path = tmp_path / "lexicon.txt"
+    path.write_text("# comment\n\nhoax\t2.5\nclickbait|0.5\nbreaking\nbad weight|x\n", encoding="utf-8")
+    lexicon = Lexicon.from_file(str(path))
+    assert lexicon.weights == {"hoax": 2.5, "clickbait": 0.5, "breaking": 1.0, "bad weight": 1.0}
+
+
+def test_default_lexicon_file_loads():
+    assert len(Lexicon.from_file(DEFAULT_LEXICON_PATH)) > 0
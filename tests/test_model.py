@@ -0,0 +1,64 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+pytest.importorskip("tensorflow")
+pytest.importorskip("transformers")
+
+import model  # noqa: E402
+
+
+def make_articles(count, use_gemini=True):
+    # Short, unique texts: not cached from earlier runs and too short for near-duplicate matching
+    return [{'content': f"Shocking claim {uuid.uuid4().hex}", 'title': f"Title {i}",
+             'use_gemini': use_gemini, 'backend': 'lexicon'} for i in range(count)]
+
+
+def test_batch_waits_for_gemini_once_for_the_whole_batch(monkeypatch):
+    release = threading.Event()
+
+    def hanging_gemini(content, title, source):
+        release.wait(10)
+        return {"success": True, "credibility_score": 8, "reasoning": "", "recommendations": ""}
+
+    monkeypatch.setattr(model, "analyze_with_gemini", hanging_gemini)
+    monkeypatch.setattr(model, "GEMINI_TIMEOUT", 0.5)
+    try:
+        started = time.perf_counter()
+        results = model.predict_fake_news_batch(make_articles(8))
+        elapsed = time.perf_counter() - started
+    finally:
+        release.set()
+
+    # Eight calls on a pool of two would take 4 x GEMINI_TIMEOUT with a timeout per item
+    assert elapsed < 1.5
+    for result in results:
+        assert "error" not in result
+        assert result['additional_data']['gemini']['error'] == "Gemini analysis timed out after 0.5 seconds"
+
+
+def test_batch_merges_gemini_results_in_order(monkeypatch):
+    def gemini(content, title, source):
+        if title == "Title 1":
+            raise RuntimeError("boom")
+        return {"success": True, "credibility_score": 9, "reasoning": title, "recommendations": ""}
+
+    monkeypatch.setattr(model, "analyze_with_gemini", gemini)
+    articles = make_articles(3) + [{'title': 'no content'}]
+    results = model.predict_fake_news_batch(articles)
+
+    assert [r['additional_data']['gemini'].get('reasoning') for r in results[:3:2]] == ["Title 0", "Title 2"]
+    assert results[1]['additional_data']['gemini']['error'] == "Gemini analysis failed: boom"
+    assert results[3]['error'] == "Missing content field"
+
+
+def test_misconfigured_routes_fall_back_to_the_default_backend(monkeypatch):
+    monkeypatch.setattr(model, "LOCAL_MODEL_BACKEND", "tensorflow")
+    monkeypatch.setattr(model, "LOCAL_MODEL_ROUTES", "endpoint:ingestion=lexicn,chars<400=lexicon")
+    registry = model._register_backends()
+
+    assert registry.default.name == "tf"
+    assert registry.select("x" * 1000, endpoint="ingestion").name == "tf"
+    assert registry.select("short", endpoint="api").name == "lexicon"
@@ -0,0 +1,81 @@
+import random
+
+from near_duplicates import NearDuplicateIndex, hamming_distance, normalize_words, simhash
+
+ARTICLE = " ".join(
+    f"Paragraph {i} of the report says the council approved {i * 7} new homes near the river "
+    f"after a long debate about traffic and schools." for i in range(12)
+)
+
+
+def flip_bits(fingerprint, count, rng):
+    for bit in rng.sample(range(64), count):
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_simhash_is_stable_and_close_for_small_edits():
+    words = normalize_words(ARTICLE)
+    edited = normalize_words(ARTICLE.replace("long debate", "lengthy debate", 1) + " Updated.")
+    assert simhash(words) == simhash(normalize_words(ARTICLE.upper()))
+    assert hamming_distance(simhash(words), simhash(edited)) <= 5
+    assert hamming_distance(simhash(words), simhash(normalize_words("Something else entirely " * 20))) > 5
+
+
+def test_finds_every_fingerprint_within_max_distance():
+    rng = random.Random(7)
+    for max_distance in (3, 5, 11):
+        index = NearDuplicateIndex(max_distance=max_distance, min_words=1)
+        for _ in range(200):
+            fingerprint = rng.getrandbits(64)
+            index.add(fingerprint, "value")
+            distance = rng.randint(1, max_distance)
+            near = flip_bits(fingerprint, distance, rng)
+            assert index.lookup(near) == ("value", distance, fingerprint)
+            index.clear()
+
+
+def test_ignores_fingerprints_beyond_max_distance():
+    index = NearDuplicateIndex(max_distance=3)
+    index.add(0, "value")
+    assert index.lookup(0b1111) == (None, None, None)
+    assert index.lookup(0) == ("value", 0, 0)
+    assert index.get_stats()["exact_hits"] == 1
+
+
+def test_returns_the_closest_match():
+    index = NearDuplicateIndex(max_distance=5)
+    index.add(0b111, "far")
+    index.add(0b1, "near")
+    assert index.lookup(0) == ("near", 1, 0b1)
+
+
+def test_namespaces_are_separate():
+    index = NearDuplicateIndex()
+    index.add(42, "local", namespace="local")
+    assert index.lookup(42, namespace="gemini") == (None, None, None)
+    assert index.lookup(42, namespace="local")[0] == "local"
+
+
+def test_evicts_least_recently_used_and_discards():
+    a, b, c = 0, (1 << 64) - 1, (1 << 32) - 1
+    index = NearDuplicateIndex(max_entries=2)
+    index.add(a, "a")
+    index.add(b, "b")
+    index.lookup(a)
+    index.add(c, "c")
+
+    assert index.lookup(b) == (None, None, None)
+    assert index.lookup(a)[0] == "a"
+    index.discard(a)
+    assert index.lookup(a) == (None, None, None)
+    stats = index.get_stats()
+    assert (stats["entries"], stats["evictions"], stats["discarded"]) == (1, 1, 1)
+
+
+def test_short_texts_and_disabled_index_are_not_fingerprinted():
+    index = NearDuplicateIndex(min_words=40)
+    assert index.fingerprint("Too short to match reliably") is None
+    assert index.get_stats()["skipped_short"] == 1
+    assert index.fingerprint(ARTICLE) == simhash(normalize_words(ARTICLE))
+    assert NearDuplicateIndex(enabled=False).fingerprint(ARTICLE) is None
@@ -0,0 +1,79 @@
+from result_cache import ResultCache, make_cache_key
+
+
+def test_cache_key_ignores_whitespace_and_unicode_form_but_not_the_model():
+    key = make_cache_key("Some  article\ntext", title="Title", model_version="v1")
+    assert key == make_cache_key(" Some article text ", title="Title ", model_version="v1")
+    assert key == make_cache_key("Some article text", title="Ｔｉｔｌｅ", model_version="v1")
+    assert key != make_cache_key("Some article text", title="Title", model_version="v2")
+    assert key != make_cache_key("Some article text", title="Title", use_gemini=True, model_version="v1")
+
+
+def test_memory_tier_hits_and_returns_copies():
+    cache = ResultCache(max_entries=4)
+    cache.set("k", {"result": "Fake", "details": [1]})
+
+    value, tier = cache.get("k")
+    assert (value, tier) == ({"result": "Fake", "details": [1]}, "memory")
+    value["details"].append(2)
+    assert cache.get("k")[0]["details"] == [1]
+    assert cache.get("missing") == (None, None)
+
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["misses"]) == (2, 1)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (None, None)
+    assert cache.get("a") == (1, "memory")
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_expired_entries_are_not_served():
+    cache = ResultCache(ttl_seconds=-1)
+    cache.set("k", "stale")
+    assert cache.get("k") == (None, None)
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_disk_tier_survives_a_new_cache_instance(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    ResultCache(db_path=db_path).set("k", {"result": "Real"})
+
+    cache = ResultCache(db_path=db_path)
+    assert cache.get("k") == ({"result": "Real"}, "disk")
+    # A disk hit is promoted to the memory tier
+    assert cache.get("k") == ({"result": "Real"}, "memory")
+
+
+def test_expired_disk_entries_are_deleted(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    ResultCache(ttl_seconds=-1, db_path=db_path).set("k", "stale")
+
+    cache = ResultCache(db_path=db_path)
+    assert cache.get("k") == (None, None)
+    assert cache.get_stats()["disk_entries"] == 0
+
+
+def test_disk_tier_is_trimmed_to_max_db_entries(tmp_path):
+    cache = ResultCache(max_entries=0, db_path=str(tmp_path / "results.db"), max_db_entries=10)
+    for i in range(100):
+        cache.set(f"k{i}", i)
+
+    assert cache.get_stats()["disk_entries"] == 10
+    assert cache.get("k99") == (99, "disk")
+    assert cache.get("k0") == (None, None)
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = ResultCache(db_path=str(tmp_path / "results.db"))
+    cache.set("k", 1)
+    cache.clear()
+    assert cache.get("k") == (None, None)
+    assert cache.get_stats()["disk_entries"] == 0
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: the app reads its configuration when it is imported
+FORKED_WORKER = textwrap.dedent("""
+    import json, os, sys
+    import jinja2
+    import serve
+    serve.defer_background_threads()
+    import app
+    from ingestion import INGESTION_ENABLED, article_store, ingestion_worker, scoring_model_version
+
+    article_store.save_feed("us", None, [{"title": "Stored headline", "url": "https://example.com/a",
+                                          "source": {"name": "Example"}}],
+                            [("Fake", 0.9)], scoring_model_version())
+    parent_running = ingestion_worker.get_stats()["running"]
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        serve.init_worker(1, ingestion=INGESTION_ENABLED)
+        # The templates sit next to the app rather than in templates/
+        app.app.jinja_loader = jinja2.FileSystemLoader(os.getcwd())
+        client = app.app.test_client()
+        page = client.get("/").get_data(as_text=True)
+        stats = client.get("/api/stats").get_json()["ingestion"]
+        os.write(write_fd, json.dumps({
+            "served": "Stored headline" in page and "Fake 90%" in page,
+            "enabled": stats["enabled"],
+            "running": stats["running"]
+        }).encode())
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    worker = json.loads(os.read(read_fd, 65536))
+    print(json.dumps({"parent_running": parent_running, "worker": worker}))
+    sys.stdout.flush()
+    os._exit(0)
+""")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork serving needs os.fork")
+def test_forked_worker_serves_the_ingestion_store(tmp_path):
+    pytest.importorskip("flask")
+    pytest.importorskip("tensorflow")
+    env = dict(os.environ, INGESTION_ENABLED="true", INGESTION_DB=str(tmp_path / "articles.db"),
+               RESULT_CACHE_DB="", DIAGNOSTICS_DB="", GEMINI_API_KEY="", HF_HUB_OFFLINE="1",
+               TF_CPP_MIN_LOG_LEVEL="3")
+    output = subprocess.run([sys.executable, "-c", FORKED_WORKER], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=300)
+    assert output.returncode == 0, output.stderr
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+
+    # Neither the parent nor worker 1 runs the ingestion thread, but the worker serves the store
+    assert result == {"parent_running": False, "worker": {"served": True, "enabled": True, "running": False}}
+
+
+def test_default_threads_let_workers_share_the_tf_backend(monkeypatch):
+    import serve
+
+    for name in ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "OMP_NUM_THREADS",
+                 "LOCAL_MODEL_TFLITE_THREADS", "TOKENIZERS_PARALLELISM"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(serve, "TF_INTRA_OP_THREADS", 0)
+    monkeypatch.setattr(serve, "TF_INTER_OP_THREADS", 1)
+    monkeypatch.setattr(serve.os, "cpu_count", lambda: 16)
+
+    # One TensorFlow thread keeps the tf backend shareable; TFLite still gets its share of the cores
+    assert serve.configure_threads(4) == (1, 1)
+    assert os.environ["LOCAL_MODEL_TFLITE_THREADS"] == "4"
+
+    monkeypatch.delenv("LOCAL_MODEL_TFLITE_THREADS")
+    monkeypatch.setattr(serve, "TF_INTRA_OP_THREADS", 2)
+    assert serve.configure_threads(4) == (2, 1)
+    assert os.environ["LOCAL_MODEL_TFLITE_THREADS"] == "2"
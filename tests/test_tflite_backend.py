@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+import tflite_backend
+
+
+class FakeClassifier:
+    def __init__(self, path, num_threads=None):
+        with open(path) as f:
+            self.content = f.read()
+        self.path = path
+
+
+@pytest.fixture
+def conversions(monkeypatch, tmp_path):
+    """Replaces TensorFlow conversion with a fake whose parity drift the test sets"""
+    state = {"drift": 0.01, "converted": 0, "tf_loads": 0, "published_during_check": None}
+    checkpoint = tmp_path / "checkpoint"
+    checkpoint.mkdir()
+    (checkpoint / "config.json").write_text("{}")
+
+    def convert(tf_model, tokenizer, output_path, quantization="dynamic", calibration_texts=None):
+        state["converted"] += 1
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "w") as f:
+            f.write(f"artifact {state['converted']}")
+        return {"quantization": quantization, "size_bytes": 10, "convert_seconds": 0.0}
+
+    def check_parity(tf_model, classifier, tokenizer):
+        state["published_during_check"] = os.path.exists(path())
+        return {"max_drift": state["drift"], "mean_drift": state["drift"], "verdict_agreement": 1.0, "samples": 1}
+
+    def load_tf_model():
+        state["tf_loads"] += 1
+        return "tf model"
+
+    def load(max_drift=0.05):
+        return tflite_backend.load_tflite_classifier(str(checkpoint), None, load_tf_model, "dynamic",
+                                                     str(tmp_path / "cache"), max_drift=max_drift)
+
+    def path():
+        return tflite_backend.artifact_path(str(checkpoint), "dynamic", str(tmp_path / "cache"))
+
+    monkeypatch.setattr(tflite_backend, "convert_to_tflite", convert)
+    monkeypatch.setattr(tflite_backend, "check_parity", check_parity)
+    monkeypatch.setattr(tflite_backend, "TFLiteClassifier", FakeClassifier)
+    state.update(load=load, path=path)
+    return state
+
+
+def test_artifact_is_published_only_after_the_parity_check(conversions):
+    classifier, tf_model = conversions["load"]()
+    assert conversions["published_during_check"] is False
+    assert (classifier.path, classifier.content, tf_model) == (conversions["path"](), "artifact 1", None)
+    assert tflite_backend.read_metadata(conversions["path"]())["parity"]["max_drift"] == 0.01
+    assert [name for name in os.listdir(os.path.dirname(conversions["path"]())) if name.endswith(".tmp")] == []
+
+    # The next start uses the checked artifact without loading TensorFlow
+    classifier, _ = conversions["load"]()
+    assert (conversions["converted"], conversions["tf_loads"]) == (1, 1)
+
+
+def test_rejected_conversion_is_remembered_until_the_drift_limit_allows_it(conversions):
+    conversions["drift"] = 0.2
+    classifier, tf_model = conversions["load"]()
+    assert (classifier, tf_model) == (None, "tf model")
+    assert tflite_backend.read_metadata(conversions["path"]())["rejected"] is True
+
+    assert conversions["load"]() == (None, "tf model")
+    assert conversions["converted"] == 1
+
+    classifier, _ = conversions["load"](max_drift=0.5)
+    assert classifier.content == "artifact 1"
+    assert conversions["converted"] == 1
+
+
+def test_artifact_without_a_parity_record_is_converted_again(conversions):
+    path = conversions["path"]()
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        f.write("unchecked")
+
+    classifier, _ = conversions["load"]()
+    assert classifier.content == "artifact 1"
+    assert conversions["converted"] == 1
+    with open(f"{path}.json") as f:
+        assert json.load(f)["parity"]["max_drift"] == 0.01
+
+
+def test_failed_conversion_leaves_nothing_behind(conversions, monkeypatch):
+    def failing_parity(*args):
+        raise RuntimeError("interpreter crashed")
+
+    monkeypatch.setattr(tflite_backend, "check_parity", failing_parity)
+    with pytest.raises(RuntimeError):
+        conversions["load"]()
+    assert os.listdir(os.path.dirname(conversions["path"]())) == []
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Quantization used when converting the classifier: "dynamic" (int8 weights, float
+# activations), "int8" (int8 weights and activations, calibrated on sample texts;
+# ops without an int8 kernel stay in float) or "none" (plain float32 TFLite)
+TFLITE_QUANTIZATION = os.getenv("LOCAL_MODEL_TFLITE_QUANTIZATION", "dynamic")
+TFLITE_CACHE_DIR = os.getenv("LOCAL_MODEL_TFLITE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_cache"))
+# Largest fake-probability difference from the TF model accepted by the parity check
+TFLITE_MAX_DRIFT = float(os.getenv("LOCAL_MODEL_TFLITE_MAX_DRIFT", 0.05))
+TFLITE_THREADS = int(os.getenv("LOCAL_MODEL_TFLITE_THREADS", 0)) or None
+
+QUANTIZATION_MODES = ("none", "dynamic", "int8")
+
+# Texts used to calibrate int8 activations and to check parity after conversion
+CALIBRATION_TEXTS = [
+    "Government officials said on Tuesday that the new policy would take effect next month.",
+    "SHOCKING: Doctors don't want you to know about this miracle cure that big pharma is hiding!",
+    "The central bank kept interest rates unchanged, citing steady inflation and a strong labour market.",
+    "Scientists have discovered that the moon landing was staged in a secret Hollywood studio, sources claim.",
+    "Local residents gathered at the town hall to discuss plans for a new public library.",
+    "You won't believe what this celebrity said about the government conspiracy they uncovered.",
+    "The company reported quarterly revenue of 4.2 billion dollars, up 8 percent from a year earlier.",
+    "Breaking: anonymous insiders reveal the election was decided before a single vote was cast.",
+]
+
+
+def _get_interpreter_class():
+    """Prefers the standalone LiteRT runtime when installed, else TensorFlow's interpreter"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+
+
+def checkpoint_revision(model_name):
+    """
+    Identifies the checkpoint behind a model name without loading it: for a local
+    directory a hash of its files' names, sizes and modification times, for a Hugging
+    Face Hub model the commit of the cached snapshot ("unknown" if it is not cached)
+    """
+    if os.path.isdir(model_name):
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(model_name)):
+            path = os.path.join(model_name, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+        return digest.hexdigest()[:12]
+    try:
+        from huggingface_hub import try_to_load_from_cache
+        config_path = try_to_load_from_cache(model_name, "config.json")
+    except Exception:
+        config_path = None
+    if isinstance(config_path, str):
+        # .../snapshots/<commit>/config.json
+        return os.path.basename(os.path.dirname(config_path))[:12]
+    return "unknown"
+
+
+def artifact_path(model_name, quantization, cache_dir=None, revision=None):
+    """Path of the cached .tflite file for a checkpoint (name and revision) and quantization mode"""
+    revision = revision or checkpoint_revision(model_name)
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name).strip('_')
+    source = os.path.abspath(model_name) if os.path.isdir(model_name) else model_name
+    digest = hashlib.sha256(f"{source}@{revision}".encode("utf-8")).hexdigest()[:8]
+    return os.path.join(cache_dir or TFLITE_CACHE_DIR, f"{safe_name}-{digest}-{quantization}.tflite")
+
+
+def convert_to_tflite(tf_model, tokenizer, output_path, quantization="dynamic", calibration_texts=None):
+    """
+    Converts a TF sequence classifier to TFLite and writes it to output_path.
+
+    The converted model takes int32 input_ids and attention_mask of any batch size and
+    sequence length, and returns float32 logits.
+
+    Returns:
+        dict: Conversion metadata (also written next to the artifact as .json)
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown TFLite quantization '{quantization}', expected one of {QUANTIZATION_MODES}")
+
+    @tf.function(input_signature=[
+        tf.TensorSpec([None, None], tf.int32, name="input_ids"),
+        tf.TensorSpec([None, None], tf.int32, name="attention_mask")
+    ])
+    def serve(input_ids, attention_mask):
+        return {"logits": tf_model(input_ids=input_ids, attention_mask=attention_mask, training=False).logits}
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([serve.get_concrete_function()], tf_model)
+    if quantization != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        texts = calibration_texts or CALIBRATION_TEXTS
+
+        def representative_dataset():
+            for text in texts:
+                encoding = tokenizer([text], truncation=True, max_length=512, return_tensors="np")
+                yield {"input_ids": encoding["input_ids"].astype(np.int32),
+                       "attention_mask": encoding["attention_mask"].astype(np.int32)}
+
+        converter.representative_dataset = representative_dataset
+
+    start = time.perf_counter()
+    flatbuffer = converter.convert()
+    metadata = {
+        "quantization": quantization,
+        "size_bytes": len(flatbuffer),
+        "convert_seconds": round(time.perf_counter() - start, 2),
+        "tensorflow": tf.__version__,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    # Write to a temporary file first so a crash never leaves a truncated artifact behind
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(flatbuffer)
+    os.replace(temp_path, output_path)
+    return metadata
+
+
+def _write_metadata(path, metadata):
+    temp_path = f"{path}.json.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(temp_path, f"{path}.json")
+
+
+def read_metadata(path):
+    try:
+        with open(f"{path}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class TFLiteClassifier:
+    """
+    Runs a converted classifier with the TFLite interpreter.
+
+    Calling it with {"input_ids", "attention_mask"} numpy arrays returns an object with a
+    numpy .logits attribute, like the TF model, so the batching and padding code is shared.
+    The interpreter is not thread-safe, so calls are serialized.
+    """
+
+    class Outputs:
+        def __init__(self, logits):
+            self.logits = logits
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.metadata = read_metadata(path)
+        self._interpreter = _get_interpreter_class()(model_path=path, num_threads=num_threads)
+        self._runner = self._interpreter.get_signature_runner()
+        self._lock = threading.Lock()
+
+    def __call__(self, inputs):
+        with self._lock:
+            outputs = self._runner(
+                input_ids=np.asarray(inputs["input_ids"], dtype=np.int32),
+                attention_mask=np.asarray(inputs["attention_mask"], dtype=np.int32)
+            )
+        return self.Outputs(np.asarray(outputs["logits"]))
+
+
+def _fake_probs(classifier, tokenizer, texts):
+    encoding = tokenizer(list(texts), truncation=True, max_length=512, padding=True, return_tensors="np")
+    inputs = {"input_ids": encoding["input_ids"].astype(np.int32),
+              "attention_mask": encoding["attention_mask"].astype(np.int32)}
+    logits = np.asarray(classifier(inputs).logits, dtype=np.float64)
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return (exp / exp.sum(axis=-1, keepdims=True))[:, 1]
+
+
+def check_parity(tf_model, tflite_model, tokenizer, texts=None, threshold=0.7):
+    """
+    Compares fake-class probabilities of the TF and TFLite models on sample texts.
+
+    Returns:
+        dict: max_drift and mean_drift (absolute probability difference) and the
+              fraction of texts on which both models give the same verdict
+    """
+    texts = texts or CALIBRATION_TEXTS
+    reference = _fake_probs(tf_model, tokenizer, texts)
+    converted = _fake_probs(tflite_model, tokenizer, texts)
+    drift = np.abs(reference - converted)
+    return {
+        "max_drift": round(float(drift.max()), 6),
+        "mean_drift": round(float(drift.mean()), 6),
+        "verdict_agreement": round(float(np.mean((reference > threshold) == (converted > threshold))), 4),
+        "samples": len(texts)
+    }
+
+
+def load_tflite_classifier(model_name, tokenizer, load_tf_model, quantization=None, cache_dir=None,
+                           max_drift=None, num_threads=None):
+    """
+    Returns a TFLiteClassifier for model_name, converting and caching it on first use.
+
+    Artifacts are keyed by checkpoint revision, so an updated checkpoint is converted
+    again. A cached artifact is only used if its metadata records a parity check with
+    a drift within max_drift; one without that record (e.g. left by an older version)
+    is converted again. Otherwise load_tf_model() is called to get the TF model, which
+    is converted to a temporary file and parity-checked against the TF model; only then
+    are the artifact and its metadata published under the cached path, so a crash or a
+    worker loading concurrently never picks up an unchecked artifact. A conversion whose
+    drift exceeds max_drift is published too, with its metadata marking it rejected, and
+    None is returned so the caller keeps serving the TF model; later starts do not
+    convert it again unless max_drift is raised above its drift.
+
+    Returns:
+        tuple: (classifier or None, tf_model or None) - the TF model is only returned
+               when it had to be loaded and the TFLite model was rejected
+    """
+    quantization = quantization or TFLITE_QUANTIZATION
+    max_drift = TFLITE_MAX_DRIFT if max_drift is None else max_drift
+    revision = checkpoint_revision(model_name)
+    path = artifact_path(model_name, quantization, cache_dir, revision)
+
+    if os.path.exists(path):
+        drift = read_metadata(path).get("parity", {}).get("max_drift")
+        if drift is None:
+            print(f"Cached TFLite model {path} has no parity check on record; converting again")
+            os.remove(path)
+        elif drift > max_drift:
+            print(f"Cached TFLite model {path} was rejected (drift {drift:.4f} > {max_drift}); using TensorFlow")
+            return None, load_tf_model()
+        else:
+            print(f"Using cached TFLite model {path}")
+            return TFLiteClassifier(path, num_threads=num_threads or TFLITE_THREADS), None
+
+    print(f"Converting {model_name} to TFLite ({quantization} quantization)...")
+    tf_model = load_tf_model()
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        metadata = convert_to_tflite(tf_model, tokenizer, temp_path, quantization)
+        parity = check_parity(tf_model, TFLiteClassifier(temp_path, num_threads=num_threads or TFLITE_THREADS),
+                              tokenizer)
+        print(f"TFLite conversion done in {metadata['convert_seconds']}s "
+              f"({metadata['size_bytes'] / 1e6:.1f} MB, max drift {parity['max_drift']:.4f})")
+
+        metadata.update({"model_name": model_name, "revision": revision, "parity": parity})
+        rejected = parity["max_drift"] > max_drift
+        if rejected:
+            # Remember the rejection so the next start does not convert again
+            metadata.update({"rejected": True, "max_drift_allowed": max_drift})
+        # Publish the metadata first: an artifact is never visible without its parity record
+        _write_metadata(path, metadata)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    if rejected:
+        print(f"WARNING: TFLite drift {parity['max_drift']:.4f} exceeds {max_drift}; keeping the TF model")
+        return None, tf_model
+    return TFLiteClassifier(path, num_threads=num_threads or TFLITE_THREADS), None
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def make_token_key(text, namespace=""):
+    """Returns the cache key (SHA-256 hex digest) of a text tokenized in a given way"""
+    return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of token ID lists keyed on a content hash.
+
+    The namespace of a lookup identifies the tokenizer and its settings, so the same
+    text tokenized in two ways is cached twice. With workers > 0, prefetch() tokenizes
+    texts on a background pool so the inference thread finds them ready (or waits for
+    the batch already in flight instead of tokenizing the text a second time).
+    """
+
+    def __init__(self, max_entries=4096, workers=0):
+        self.max_entries = max(0, int(max_entries))
+        self.workers = max(0, int(workers))
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pretokenize") \
+            if self.workers else None
+
+        self.hits = 0
+        self.prefetch_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+        self.tokenize_seconds = 0.0
+        self.tokenized = 0
+
+    def prefetch(self, texts, encode_fn, namespace=""):
+        """
+        Starts tokenizing texts that are neither cached nor in flight on the worker pool.
+
+        Args:
+            texts (list): Texts to tokenize
+            encode_fn (callable): Batch tokenizer, list of texts -> list of token ID lists
+            namespace (str): Identifies the tokenizer and its settings
+        """
+        if self._executor is None:
+            return
+        missing = {}
+        with self._lock:
+            for text in texts:
+                key = make_token_key(text, namespace)
+                if key not in self._memory and key not in self._pending and key not in missing:
+                    missing[key] = text
+            if not missing:
+                return
+            future = self._executor.submit(self._encode_and_store, list(missing), list(missing.values()), encode_fn)
+            for key in missing:
+                self._pending[key] = future
+            self.prefetched += len(missing)
+
+    def encode(self, texts, encode_fn, namespace=""):
+        """
+        Returns the token IDs of every text, in order.
+
+        Cached texts are served from memory, texts being prefetched are waited for and
+        the rest are tokenized together in one batch call in the calling thread.
+        """
+        keys = [make_token_key(text, namespace) for text in texts]
+        results = [None] * len(texts)
+        waiting = {}
+        missing = {}
+        with self._lock:
+            for index, key in enumerate(keys):
+                ids = self._memory.get(key)
+                if ids is not None:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    results[index] = ids
+                elif key in self._pending:
+                    self.prefetch_hits += 1
+                    waiting.setdefault(key, []).append(index)
+                else:
+                    self.misses += 1
+                    missing.setdefault(key, []).append(index)
+            futures = {key: self._pending[key] for key in waiting}
+
+        for key, indices in waiting.items():
+            try:
+                ids = futures[key].result()[key]
+            except Exception:
+                # A failed prefetch is retried inline with the other misses
+                missing.setdefault(key, []).extend(indices)
+                continue
+            for index in indices:
+                results[index] = ids
+
+        if missing:
+            encoded = self._encode_and_store(list(missing), [texts[indices[0]] for indices in missing.values()],
+                                             encode_fn)
+            for key, indices in missing.items():
+                for index in indices:
+                    results[index] = encoded[key]
+        return results
+
+    def _encode_and_store(self, keys, texts, encode_fn):
+        start = time.perf_counter()
+        try:
+            encoded = dict(zip(keys, encode_fn(texts)))
+        except Exception:
+            with self._lock:
+                for key in keys:
+                    self._pending.pop(key, None)
+            raise
+        elapsed = time.perf_counter() - start
+        # Store before clearing the in-flight marker so a concurrent lookup sees one or the other
+        with self._lock:
+            self.tokenize_seconds += elapsed
+            self.tokenized += len(texts)
+            for key, ids in encoded.items():
+                self._put_memory(key, ids)
+                self._pending.pop(key, None)
+        return encoded
+
+    def _put_memory(self, key, ids):
+        if self.max_entries == 0:
+            return
+        self._memory[key] = ids
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self):
+        """Returns cache counters and tokenization time for diagnostics"""
+        with self._lock:
+            lookups = self.hits + self.prefetch_hits + self.misses
+            return {
+                "hits": self.hits,
+                "prefetch_hits": self.prefetch_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.prefetch_hits) / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "workers": self.workers,
+                "prefetched": self.prefetched,
+                "in_flight": len(self._pending),
+                "tokenized": self.tokenized,
+                "avg_tokenize_ms": round(self.tokenize_seconds / self.tokenized * 1000, 3) if self.tokenized else 0.0
+            }